@@ -1,12 +1,20 @@
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
-import json
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
 import os
+import threading
 import time
-import numpy as np
-from collections import Counter
+import uuid
+
+import charts
+import habitcore
+import persister
+import profiler
+import storage
+import tenants
+from habitcore import DIFFICULTIES, DONE, MISSED, WEEKDAY_NAMES, HabitStore, get_today
+
+profiler.start_run()
 
 # ==================== PAGE CONFIG ====================
 st.set_page_config(
@@ -17,645 +25,328 @@ st.set_page_config(
 )
 
 # ==================== CUSTOM CSS ====================
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Space+Mono:wght@400;700&family=Inter:wght@300;400;500;600;700&display=swap');
-    
-    * {
-        margin: 0;
-        padding: 0;
-        box-sizing: border-box;
-    }
-    
-    html, body {
-        font-family: 'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif;
-        background: linear-gradient(135deg, #0a0e27 0%, #1a1a3e 50%, #0f0f2e 100%);
-        color: #e0e0e0;
-        letter-spacing: 0.3px;
-    }
-    
-    .main { background: rgba(0, 0, 0, 0) !important; }
-    [data-testid="stAppViewContainer"] { 
-        background: linear-gradient(135deg, #0a0e27 0%, #1a1a3e 50%, #0f0f2e 100%);
-    }
-    [data-testid="stSidebar"] { 
-        background: rgba(15, 15, 46, 0.8) !important;
-        backdrop-filter: blur(10px);
-        border-right: 1px solid rgba(255, 255, 255, 0.05);
-    }
-    
-    h1, h2, h3 { font-family: 'Space Mono', monospace; letter-spacing: 1px; }
-    h1 { color: #ff6b6b; font-size: 2.5rem; font-weight: 700; }
-    h2 { color: #e0e0e0; font-size: 1.3rem; font-weight: 600; }
-    h3 { color: #b8b8b8; font-size: 1rem; font-weight: 500; }
-    
-    /* VERDICT CARDS */
-    .verdict-box {
-        border-radius: 12px;
-        padding: 24px;
-        margin: 20px 0;
-        backdrop-filter: blur(10px);
-        border: 1px solid rgba(255, 255, 255, 0.1);
-        transition: all 0.3s ease;
-    }
-    
-    .verdict-good {
-        background: linear-gradient(135deg, rgba(16, 185, 129, 0.15) 0%, rgba(16, 185, 129, 0.05) 100%);
-        border: 2px solid #10b981;
-        box-shadow: 0 8px 32px rgba(16, 185, 129, 0.1);
-    }
-    
-    .verdict-warning {
-        background: linear-gradient(135deg, rgba(245, 158, 11, 0.15) 0%, rgba(245, 158, 11, 0.05) 100%);
-        border: 2px solid #f59e0b;
-        box-shadow: 0 8px 32px rgba(245, 158, 11, 0.1);
-    }
-    
-    .verdict-critical {
-        background: linear-gradient(135deg, rgba(239, 68, 68, 0.2) 0%, rgba(239, 68, 68, 0.08) 100%);
-        border: 2px solid #ef4444;
-        box-shadow: 0 8px 32px rgba(239, 68, 68, 0.15);
-        animation: pulse-critical 2s ease-in-out infinite;
-    }
-    
-    .verdict-brutal {
-        background: linear-gradient(135deg, rgba(127, 29, 29, 0.3) 0%, rgba(127, 29, 29, 0.1) 100%);
-        border: 2px solid #991b1b;
-        box-shadow: 0 8px 32px rgba(127, 29, 29, 0.2);
-        animation: pulse-critical 1.5s ease-in-out infinite;
-    }
-    
-    @keyframes pulse-critical {
-        0%, 100% { box-shadow: 0 8px 32px rgba(239, 68, 68, 0.15); }
-        50% { box-shadow: 0 8px 40px rgba(239, 68, 68, 0.3); }
-    }
-    
-    /* HABIT CARDS */
-    .habit-card {
-        background: linear-gradient(135deg, rgba(255, 255, 255, 0.08) 0%, rgba(255, 255, 255, 0.02) 100%);
-        border: 1px solid rgba(255, 255, 255, 0.1);
-        border-radius: 12px;
-        padding: 16px;
-        margin: 12px 0;
-        transition: all 0.3s ease;
-        display: flex;
-        align-items: center;
-        justify-content: space-between;
-    }
-    
-    .habit-card:hover {
-        background: linear-gradient(135deg, rgba(255, 255, 255, 0.12) 0%, rgba(255, 255, 255, 0.04) 100%);
-        border: 1px solid rgba(255, 255, 255, 0.2);
-        box-shadow: 0 8px 24px rgba(99, 102, 241, 0.1);
-        transform: translateY(-2px);
-    }
-    
-    .habit-focus {
-        background: linear-gradient(135deg, rgba(99, 102, 241, 0.2) 0%, rgba(99, 102, 241, 0.05) 100%);
-        border: 2px solid #6366f1;
-        box-shadow: 0 8px 32px rgba(99, 102, 241, 0.15);
-    }
-    
-    .habit-blur {
-        opacity: 0.35;
-        pointer-events: none;
-    }
-    
-    .habit-warning {
-        background: linear-gradient(135deg, rgba(220, 38, 38, 0.15) 0%, rgba(220, 38, 38, 0.03) 100%);
-        border-left: 4px solid #dc2626;
-        padding: 12px;
-        border-radius: 8px;
-        margin-top: 8px;
-        color: #fca5a5;
-        font-size: 0.9rem;
-    }
-    
-    /* INTERVENTION BOX */
-    .intervention-box {
-        background: linear-gradient(135deg, rgba(127, 29, 29, 0.4) 0%, rgba(127, 29, 29, 0.15) 100%);
-        border: 3px solid #991b1b;
-        border-radius: 16px;
-        padding: 32px;
-        margin: 20px 0;
-        box-shadow: 0 12px 48px rgba(127, 29, 29, 0.2);
-        text-align: center;
-        animation: pulse-critical 1.2s ease-in-out infinite;
-    }
-    
-    .intervention-box h2 {
-        color: #fca5a5;
-        margin-bottom: 16px;
-        letter-spacing: 2px;
-    }
-    
-    /* METRICS */
-    .metric-card {
-        background: linear-gradient(135deg, rgba(99, 102, 241, 0.1) 0%, rgba(99, 102, 241, 0.02) 100%);
-        border: 1px solid rgba(99, 102, 241, 0.3);
-        border-radius: 12px;
-        padding: 20px;
-        text-align: center;
-        transition: all 0.3s ease;
-    }
-    
-    .metric-card:hover {
-        background: linear-gradient(135deg, rgba(99, 102, 241, 0.15) 0%, rgba(99, 102, 241, 0.05) 100%);
-        border: 1px solid rgba(99, 102, 241, 0.5);
-        transform: translateY(-4px);
-        box-shadow: 0 12px 32px rgba(99, 102, 241, 0.15);
-    }
-    
-    .metric-value {
-        font-family: 'Space Mono', monospace;
-        font-size: 2.2rem;
-        font-weight: 700;
-        color: #6366f1;
-        line-height: 1;
-        margin: 8px 0;
-    }
-    
-    .metric-label {
-        font-size: 0.85rem;
-        color: #999;
-        letter-spacing: 1px;
-        text-transform: uppercase;
-    }
-    
-    /* STREAK DANGER */
-    .streak-danger {
-        background: linear-gradient(135deg, rgba(239, 68, 68, 0.2) 0%, rgba(239, 68, 68, 0.05) 100%);
-        border: 1px dashed #ef4444;
-        padding: 12px;
-        border-radius: 8px;
-        color: #fca5a5;
-        margin: 8px 0;
-    }
-    
-    /* FROZEN STATE */
-    .frozen-notice {
-        background: linear-gradient(135deg, rgba(59, 130, 246, 0.15) 0%, rgba(59, 130, 246, 0.05) 100%);
-        border: 2px solid #3b82f6;
-        border-radius: 12px;
-        padding: 20px;
-        text-align: center;
-        margin: 20px 0;
-    }
-    
-    .frozen-notice h3 { color: #60a5fa; }
-    .frozen-notice p { color: #93c5fd; margin-top: 8px; }
-    
-    /* PROFILE BADGE */
-    .profile-badge {
-        display: inline-block;
-        background: linear-gradient(135deg, rgba(168, 85, 247, 0.2) 0%, rgba(168, 85, 247, 0.05) 100%);
-        border: 1px solid rgba(168, 85, 247, 0.4);
-        border-radius: 20px;
-        padding: 8px 16px;
-        font-family: 'Space Mono', monospace;
-        font-size: 0.9rem;
-        color: #d8b4fe;
-        margin: 8px 0;
-        letter-spacing: 1px;
-    }
-    
-    /* BUTTONS */
-    .stButton > button {
-        background: linear-gradient(135deg, #6366f1 0%, #4f46e5 100%);
-        color: white;
-        border: none;
-        border-radius: 8px;
-        padding: 10px 20px;
-        font-weight: 600;
-        transition: all 0.3s ease;
-        font-family: 'Inter', sans-serif;
-        letter-spacing: 0.5px;
-        box-shadow: 0 4px 15px rgba(99, 102, 241, 0.3);
-    }
-    
-    .stButton > button:hover {
-        background: linear-gradient(135deg, #7c3aed 0%, #6d28d9 100%);
-        box-shadow: 0 8px 25px rgba(99, 102, 241, 0.5);
-        transform: translateY(-2px);
-    }
-    
-    .stButton > button:disabled {
-        background: rgba(99, 102, 241, 0.3);
-        color: #999;
-        cursor: not-allowed;
-        box-shadow: none;
-    }
-</style>
-""", unsafe_allow_html=True)
+THEME_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "theme.css")
+# Google Fonts needs outbound network; HABITS_WEB_FONTS=0 keeps the system font fallbacks
+WEB_FONTS = os.environ.get("HABITS_WEB_FONTS", "1") != "0"
+FONTS_IMPORT = "@import url('https://fonts.googleapis.com/css2?family=Space+Mono:wght@400;700&family=Inter:wght@300;400;500;600;700&display=swap');\n"
+
+@st.cache_resource(show_spinner=False)
+def load_theme(web_fonts):
+    """Theme stylesheet, read from disk once per process"""
+    with open(THEME_FILE, 'r') as f:
+        css = f.read()
+    return f"<style>\n{FONTS_IMPORT if web_fonts else ''}{css}</style>"
+
+# Identical bytes on every rerun: once a browser has it, Streamlit sends only a hash
+# reference (messages over global.minCachedMessageSize, see .streamlit/config.toml)
+st.html(load_theme(WEB_FONTS))
 
 # ==================== DATA MANAGEMENT ====================
 DATA_FILE = "habits_enforcement.json"
+SQLITE_FILE = "habits_enforcement.db"
+STORAGE_BACKEND = os.environ.get("HABITS_STORAGE", "json")
+# Whose store a session opens: "" the one shared store above, "login" the signed-in
+# st.user's own, "query" the ?user= parameter (behind a proxy that authenticates it)
+USER_MODE = os.environ.get("HABITS_USERS", "")
+# "lazy" renders only the selected view; "tabs" renders every tab body on each rerun
+NAVIGATION_MODE = os.environ.get("HABITS_NAVIGATION", "lazy")
+
+def session_user():
+    """Id of the user this session belongs to, or None for the shared store"""
+    if USER_MODE == "login":
+        return st.user.get("email") if st.user.get("is_logged_in") else None
+    if USER_MODE == "query":
+        return st.query_params.get("user") or None
+    return None
+
+def store_path_for(user):
+    filename = SQLITE_FILE if STORAGE_BACKEND == 'sqlite' else DATA_FILE
+    return tenants.user_store_path(user, filename) if user else filename
+
+def get_store():
+    return storage.get_storage(STORAGE_BACKEND, st.session_state.store_path)
+
+class SharedStore(HabitStore):
+    """Parsed store shared by every session on the same file and day, holding the one matrix their clicks update
+    
+    Sessions read and write it under its lock. Their events carry the store's writer_id,
+    so merge() counts points only for what other processes appended to the journal.
+    """
+    
+    def __init__(self, data, rollups=()):
+        # The store is parsed for one day; a new day parses it again (see load_shared_store)
+        self.day = get_today()
+        super().__init__(data, date.fromisoformat(self.day), rollups)
+        self.lock = threading.RLock()
+        self.revision = 0
+        self.analytics = {}
+        self.writer_id = uuid.uuid4().hex[:12]
+        self.journal_cursor = data.get('journal_cursor')
+    
+    def apply_event(self, event, points=True):
+        applied = super().apply_event(event, points)
+        if applied:
+            self.revision += 1
+        return applied
+    
+    def snapshot_for(self, today):
+        """Analytics for the store as it is now, computed once per change and day for all sessions"""
+        with self.lock:
+            key = (today, self.revision)
+            if key not in self.analytics:
+                with profiler.section("analytics.snapshot"):
+                    self.analytics = {key: self.snapshot()}
+            return self.analytics[key]
+    
+    def merge(self, store):
+        """Fold in what was appended to the journal since the store last looked; False if it must be parsed again"""
+        with self.lock:
+            with profiler.section("disk.merge"):
+                changes = store.changes_since(self.journal_cursor)
+            if changes is None:
+                # The journal was compacted, or the event log trimmed, since: start again from a fresh load
+                return False
+            events, cursor = changes
+            for event in events:
+                # Replayed in journal order, so both sides of a clash end on the later click;
+                # this store's own events had their points counted when they were applied
+                self.apply_event(event, points=event.get('writer') != self.writer_id)
+            self.journal_cursor = cursor
+            return True
+
+def parse_store(backend, path):
+    store = storage.get_storage(backend, path)
+    with profiler.section("disk.load"):
+        data = store.load()
+    with profiler.section("disk.rollups"):
+        rollups = store.load_rollups()
+    with profiler.section("analytics.build_matrix"):
+        return SharedStore(data, rollups)
+
+def refresh_store(backend, path, shared, old_version, new_version):
+    """Catch a loaded store up with its files by merging the journal, instead of parsing them again"""
+    store = storage.get_storage(backend, path)
+    # A new day needs a fresh parse; a store loaded without a cursor has no event log to read;
+    # and until this process's own clicks are on disk, an older event from elsewhere could land over them
+    if old_version[1] != new_version[1] or shared.journal_cursor is None or persister.get_persister(store).backlog():
+        return False
+    return shared.merge(store)
+
+@st.cache_resource(show_spinner=False)
+def store_cache():
+    """Process-wide LRU of parsed stores, bounded by their memory (see tenants.StoreCache)"""
+    return tenants.StoreCache(parse_store, refresh_store)
+
+def load_shared_store(backend, path, version):
+    # version (file mtimes and sizes) is checked on every call: a changed file is merged into
+    # the loaded store or parsed again. So is a new day, whose matrix then covers today
+    return store_cache().get(backend, path, (version, get_today()))
+
+def lease_shared_store(backend, path, version):
+    """A session's lease (see tenants.Lease) on the store load_shared_store() returns"""
+    return store_cache().lease(backend, path, (version, get_today()))
+
+# One tiny entry per store and day, so every user's store is closed once a day
+@st.cache_resource(max_entries=4096, show_spinner=False)
+def close_days(backend, path, today):
+    """Roll over, then roll up, every closed day not yet processed, once per process per day"""
+    store = storage.get_storage(backend, path)
+    today = date.fromisoformat(today)
+    shared = load_shared_store(backend, path, store.version_key())
+    # Both passes apply the events they persist to shared as well, so the rollups see the
+    # misses the rollover recorded and no session has to parse the store again for them
+    with profiler.section("disk.rollover"), shared.lock:
+        habitcore.roll_over(shared, store, today)
+    with profiler.section("disk.rollups"), shared.lock:
+        habitcore.update_rollups(shared, store, today)
+
+def adopt_store(lease):
+    """Point the session at a new lease on a shared store, letting go of its old one"""
+    if 'lease' in st.session_state:
+        st.session_state.lease.release()
+    lease.acquire()
+    st.session_state.lease = lease
+
+def session():
+    """This session's lease, held for the rest of the run; the store is reloaded first if the cache revoked it"""
+    if not st.session_state.lease.acquire():
+        reload_store()
+    return st.session_state.lease
+
+@contextmanager
+def holding_lease():
+    """Release the session's lease when the run or fragment ends, however it ends (st.rerun and st.stop raise)"""
+    try:
+        yield
+    finally:
+        if 'lease' in st.session_state:
+            st.session_state.lease.release()
+
+def reload_store():
+    """Reload the session from disk once everything queued has been written"""
+    store = get_store()
+    persister.get_persister(store).flush()
+    adopt_store(lease_shared_store(STORAGE_BACKEND, store.path, store.version_key()))
+
+def merge_changes():
+    """Fold what other processes persisted since the shared store last looked into it"""
+    store = get_store()
+    # Until this process's own clicks are on disk, an older event from elsewhere could land over them
+    if persister.get_persister(store).backlog():
+        return
+    if not session().store.merge(store):
+        reload_store()
 
 def init_session_state():
-    if 'habits' not in st.session_state:
-        if os.path.exists(DATA_FILE):
-            with open(DATA_FILE, 'r') as f:
-                data = json.load(f)
-                st.session_state.habits = data.get('habits', [])
-                st.session_state.total_points = data.get('total_points', 0)
+    user = session_user()
+    if 'lease' in st.session_state and st.session_state.user != user:
+        # Signed in as someone else: open their store instead
+        st.session_state.lease.release()
+        del st.session_state['lease']
+    if 'lease' not in st.session_state:
+        if USER_MODE and not user:
+            if USER_MODE == "login":
+                st.button("Log in", on_click=st.login)
+            else:
+                st.info("Open this app with ?user=<your id> to load your habits.")
+            st.stop()
+        st.session_state.user = user
+        st.session_state.store_path = store_path_for(user)
+        store = get_store()
+        # Clicks other sessions made are still queued for a moment; a fresh load should see them
+        with profiler.section("disk.flush"):
+            persister.get_persister(store).flush()
+        # Runs before the load below, so the events it appends are part of that version
+        close_days(STORAGE_BACKEND, store.path, get_today())
+        adopt_store(lease_shared_store(STORAGE_BACKEND, store.path, store.version_key()))
+    else:
+        store_cache().touch(STORAGE_BACKEND, st.session_state.store_path)
+        if session().store.day != get_today():
+            # Open past midnight: close yesterday, then move to the store parsed for today.
+            # Yesterday's last clicks may still be queued, and the rollover must see them
+            with profiler.section("disk.flush"):
+                persister.get_persister(get_store()).flush()
+            close_days(STORAGE_BACKEND, st.session_state.store_path, get_today())
+            reload_store()
         else:
-            st.session_state.habits = []
-            st.session_state.total_points = 0
-
-init_session_state()
+            merge_changes()
 
-def save_data():
-    with open(DATA_FILE, 'w') as f:
-        json.dump({
-            'habits': st.session_state.habits,
-            'total_points': st.session_state.total_points
-        }, f, indent=2)
+def record_event(event):
+    """Apply one change to the shared store and queue it for the background writer, in the same order"""
+    shared = session().store
+    with shared.lock:
+        shared.apply_event(event)
+        with profiler.section("disk.enqueue"):
+            persister.get_persister(get_store()).submit(dict(event, writer=shared.writer_id))
 
 # ==================== ADVANCED ANALYTICS FUNCTIONS ====================
-
-def get_today():
-    return datetime.now().date().strftime('%Y-%m-%d')
-
-def get_week_start():
-    today = datetime.now().date()
-    return (today - timedelta(days=today.weekday())).strftime('%Y-%m-%d')
-
-def get_month_start():
-    today = datetime.now().date()
-    return today.replace(day=1).strftime('%Y-%m-%d')
-
+# Session-facing wrappers over habitcore; the computations themselves live there.
+
+@profiler.timed("analytics")
+def get_analytics():
+    """Return the snapshot of the shared store, computed at most once per change and day"""
+    return session().store.snapshot_for(get_today())
+
+@profiler.timed("analytics")
+def completion_rate(start, end, habit_ids=None, difficulty=None):
+    """Completion % between two dates (inclusive), optionally for some habit ids and/or one difficulty"""
+    with session().store.lock:
+        return habitcore.completion_rate(session().store.matrix, start, end, habit_ids, difficulty)
+
+@profiler.timed("analytics")
+def completion_series(start, end, habit_ids=None, bucket=None):
+    """Completion % per day, week or month between two dates, coarser buckets for long ranges"""
+    with session().store.lock:
+        return habitcore.CompletionSeries(session().store.matrix, start, end, habit_ids, bucket)
+
+@profiler.timed("analytics")
 def calculate_streak():
     """Calculate current and longest streak from completed_dates"""
-    if not st.session_state.habits:
-        return 0, 0
-    
-    all_completed_dates = []
-    for habit in st.session_state.habits:
-        for date_str in habit['completed_dates']:
-            try:
-                all_completed_dates.append(datetime.strptime(date_str, '%Y-%m-%d').date())
-            except:
-                pass
-    
-    if not all_completed_dates:
-        return 0, 0
-    
-    all_completed_dates = sorted(set(all_completed_dates), reverse=True)
-    
-    today = datetime.now().date()
-    current_streak = 0
-    
-    if all_completed_dates[0] == today or all_completed_dates[0] == today - timedelta(days=1):
-        current_streak = 1
-        for i in range(1, len(all_completed_dates)):
-            if all_completed_dates[i] == all_completed_dates[i-1] - timedelta(days=1):
-                current_streak += 1
-            else:
-                break
-    
-    longest_streak = 1
-    temp_streak = 1
-    for i in range(1, len(all_completed_dates)):
-        if all_completed_dates[i] == all_completed_dates[i-1] - timedelta(days=1):
-            temp_streak += 1
-            longest_streak = max(longest_streak, temp_streak)
-        else:
-            temp_streak = 1
-    
-    return current_streak, longest_streak
+    analytics = get_analytics()
+    return analytics.current_streak, analytics.longest_streak
 
+@profiler.timed("analytics")
 def get_today_status():
     """Get today's completion status"""
-    today = get_today()
-    completed = 0
-    total = 0
-    
-    for habit in st.session_state.habits:
-        if today in habit['completed_dates'] or today in habit['missed_dates']:
-            total += 1
-            if today in habit['completed_dates']:
-                completed += 1
-    
-    return completed, total
+    analytics = get_analytics()
+    return analytics.today_completed, analytics.today_total
 
+@profiler.timed("analytics")
 def calculate_daily_verdict():
     """Generate harsh verdict based on last 3 days"""
-    today = datetime.now().date()
-    last_3_days = [today - timedelta(days=i) for i in range(3)]
-    
-    all_attempts = []
-    for habit in st.session_state.habits:
-        for day in last_3_days:
-            day_str = day.strftime('%Y-%m-%d')
-            if day_str in habit['completed_dates']:
-                all_attempts.append(True)
-            elif day_str in habit['missed_dates']:
-                all_attempts.append(False)
-    
-    if not all_attempts:
-        return {
-            "type": "CRITICAL",
-            "message": "🚨 No activity in 3 days. You've already quit.",
-            "emoji": "🚨"
-        }
-    
-    rate = sum(all_attempts) / len(all_attempts)
-    
-    current_streak, _ = calculate_streak()
-    
-    recent = all_attempts[-5:] if len(all_attempts) >= 5 else all_attempts
-    fails_in_recent = sum(1 for x in recent if not x)
-    
-    if fails_in_recent >= 3:
-        return {
-            "type": "BRUTAL",
-            "message": "🔥 You've failed 3+ times. This is a pattern, not a bad day.",
-            "emoji": "🔥"
-        }
-    
-    if rate < 0.3:
-        return {
-            "type": "CRITICAL",
-            "message": "🚨 70% failure rate. Stop adding habits. Fix existing ones.",
-            "emoji": "🚨"
-        }
-    
-    if rate < 0.6:
-        return {
-            "type": "WARNING",
-            "message": f"⚠️ Weak (60% failing). Your {current_streak}-day streak is at risk.",
-            "emoji": "⚠️"
-        }
-    
-    if current_streak > 0 and rate >= 0.8:
-        return {
-            "type": "GOOD",
-            "message": f"✓ You did what you said. {current_streak}-day streak alive. Don't slip.",
-            "emoji": "✓"
-        }
-    
-    if rate >= 0.8:
-        return {
-            "type": "GOOD",
-            "message": "✓ Strong performance. Build this into a streak.",
-            "emoji": "✓"
-        }
-    
-    return {
-        "type": "WARNING",
-        "message": "⚠️ One more slip breaks your streak.",
-        "emoji": "⚠️"
-    }
+    return get_analytics().verdict
 
+@profiler.timed("analytics")
 def should_freeze_habits():
     """Check if new habits should be frozen"""
-    if len(st.session_state.habits) < 2:
+    if len(session().store.habits) < 2:
         return False
     
-    total_completed = sum(len(h['completed_dates']) for h in st.session_state.habits)
-    total_attempts = sum(len(h['completed_dates']) + len(h['missed_dates']) for h in st.session_state.habits)
-    
-    if total_attempts == 0:
+    analytics = get_analytics()
+    if analytics.total_attempts == 0:
         return False
     
-    completion_rate = total_completed / total_attempts
-    return completion_rate < 0.3
+    return analytics.overall_rate < 0.3
 
+@profiler.timed("analytics")
 def calculate_weekly_performance():
     """Calculate performance for last 7 days"""
-    today = datetime.now().date()
-    week_start = today - timedelta(days=7)
-    
-    week_completed = 0
-    week_total = 0
-    
-    for habit in st.session_state.habits:
-        for date_str in habit['completed_dates']:
-            try:
-                d = datetime.strptime(date_str, '%Y-%m-%d').date()
-                if week_start <= d <= today:
-                    week_completed += 1
-                    week_total += 1
-            except:
-                pass
-        
-        for date_str in habit['missed_dates']:
-            try:
-                d = datetime.strptime(date_str, '%Y-%m-%d').date()
-                if week_start <= d <= today:
-                    week_total += 1
-            except:
-                pass
-    
-    if week_total == 0:
-        return 0
-    
-    return (week_completed / week_total) * 100
+    return get_analytics().weekly_performance
 
+@profiler.timed("analytics")
 def calculate_monthly_performance():
     """Calculate performance for last 30 days"""
-    today = datetime.now().date()
-    month_start = today - timedelta(days=30)
-    
-    month_completed = 0
-    month_total = 0
-    
-    for habit in st.session_state.habits:
-        for date_str in habit['completed_dates']:
-            try:
-                d = datetime.strptime(date_str, '%Y-%m-%d').date()
-                if month_start <= d <= today:
-                    month_completed += 1
-                    month_total += 1
-            except:
-                pass
-        
-        for date_str in habit['missed_dates']:
-            try:
-                d = datetime.strptime(date_str, '%Y-%m-%d').date()
-                if month_start <= d <= today:
-                    month_total += 1
-            except:
-                pass
-    
-    if month_total == 0:
-        return 0
-    
-    return (month_completed / month_total) * 100
+    return get_analytics().monthly_performance
 
+@profiler.timed("analytics")
 def detect_personality():
     """Detect user's habit personality"""
-    if not st.session_state.habits:
-        return "Uninitialized", "📋"
-    
-    total = len(st.session_state.habits)
-    completed = sum(len(h['completed_dates']) for h in st.session_state.habits)
-    missed = sum(len(h['missed_dates']) for h in st.session_state.habits)
-    
-    if total > 5 and completed < total * 0.2:
-        return "Starter", "🚀"
-    
-    hard_completed = sum(len(h['completed_dates']) for h in st.session_state.habits if h['difficulty'] == 'Hard')
-    hard_total = sum(len(h['completed_dates']) + len(h['missed_dates']) for h in st.session_state.habits if h['difficulty'] == 'Hard')
-    
-    if hard_total > 0 and hard_completed / hard_total < 0.3:
-        return "Avoider", "🙈"
-    
-    attempt_lengths = []
-    for h in st.session_state.habits:
-        attempts = len(h['completed_dates']) + len(h['missed_dates'])
-        if attempts > 0:
-            attempt_lengths.append(attempts)
-    
-    if attempt_lengths and np.median(attempt_lengths) < 3:
-        return "Quitter", "🛑"
-    
-    completion_rates = []
-    for h in st.session_state.habits:
-        total_h = len(h['completed_dates']) + len(h['missed_dates'])
-        if total_h > 0:
-            completion_rates.append(len(h['completed_dates']) / total_h)
-    
-    if completion_rates and np.std(completion_rates) > 0.35:
-        return "Sprinter", "⚡"
-    
-    if completed > missed and completed > total * 0.6:
-        return "Finisher", "🏆"
-    
-    return "Developing", "🔄"
+    return get_analytics().personality
 
+@profiler.timed("analytics")
 def get_focus_habit():
     """Identify the habit breaking the user"""
-    if not st.session_state.habits:
-        return None
-    
-    worst_habit = None
-    worst_rate = -1
-    
-    for habit in st.session_state.habits:
-        total = len(habit['completed_dates']) + len(habit['missed_dates'])
-        if total > 0:
-            miss_rate = len(habit['missed_dates']) / total
-            if miss_rate > worst_rate and miss_rate > 0.4:
-                worst_rate = miss_rate
-                worst_habit = habit
-    
-    return worst_habit
+    return get_analytics().focus_habit
 
+@profiler.timed("analytics")
 def check_intervention():
     """Check if user should enter intervention mode"""
-    weekly_perf = calculate_weekly_performance()
-    return weekly_perf < 40
+    return get_analytics().intervention
 
+@profiler.timed("analytics")
 def get_level():
     """Get current level"""
-    points = st.session_state.total_points
-    
-    if points >= 1000:
-        return {"name": "Legendary", "icon": "👑", "color": "#fbbf24"}
-    elif points >= 600:
-        return {"name": "Elite", "icon": "💎", "color": "#a855f7"}
-    elif points >= 300:
-        return {"name": "Discipline", "icon": "🎯", "color": "#6366f1"}
-    elif points >= 100:
-        return {"name": "Consistent", "icon": "⚡", "color": "#10b981"}
-    else:
-        return {"name": "Beginner", "icon": "🌱", "color": "#999"}
+    return get_analytics().level
 
+@profiler.timed("analytics")
 def get_best_day():
     """Find the day user succeeds most"""
-    day_completions = Counter()
-    for habit in st.session_state.habits:
-        for date_str in habit['completed_dates']:
-            try:
-                date = datetime.strptime(date_str, '%Y-%m-%d')
-                day = date.strftime('%A')
-                day_completions[day] += 1
-            except:
-                pass
-    
-    if day_completions:
-        return day_completions.most_common(1)[0][0]
-    return None
+    return get_analytics().best_day
 
+@profiler.timed("analytics")
 def get_worst_day():
     """Find the day user fails most"""
-    day_failures = Counter()
-    for habit in st.session_state.habits:
-        for date_str in habit['missed_dates']:
-            try:
-                date = datetime.strptime(date_str, '%Y-%m-%d')
-                day = date.strftime('%A')
-                day_failures[day] += 1
-            except:
-                pass
-    
-    if day_failures:
-        return day_failures.most_common(1)[0][0]
-    return None
+    return get_analytics().worst_day
 
+@profiler.timed("analytics")
 def calculate_daily_completion_trend():
     """Calculate completion trend for last 7 days"""
-    today = datetime.now().date()
-    trend = {}
-    
-    for i in range(7):
-        day = today - timedelta(days=i)
-        day_str = day.strftime('%Y-%m-%d')
-        
-        day_completed = 0
-        day_total = 0
-        
-        for habit in st.session_state.habits:
-            if day_str in habit['completed_dates']:
-                day_completed += 1
-                day_total += 1
-            elif day_str in habit['missed_dates']:
-                day_total += 1
-        
-        if day_total > 0:
-            trend[day.strftime('%a')] = (day_completed / day_total) * 100
-        else:
-            trend[day.strftime('%a')] = 0
-    
-    return dict(reversed(list(trend.items())))
+    return get_analytics().daily_completion_trend
+
+@profiler.timed("analytics")
+def recent_rollups(days):
+    """Stored daily rollup rows for the last `days` closed days, oldest first"""
+    return habitcore.recent_rollups(get_store(), days, date.fromisoformat(get_today()))
 
+@profiler.timed("analytics")
 def get_habit_momentum(habit):
     """Calculate if habit is rising, stable, or falling"""
-    total_attempts = len(habit['completed_dates']) + len(habit['missed_dates'])
-    if total_attempts < 3:
-        return "📊 New"
-    
-    all_dates = []
-    for date_str in habit['completed_dates']:
-        try:
-            all_dates.append((datetime.strptime(date_str, '%Y-%m-%d'), True))
-        except:
-            pass
-    
-    for date_str in habit['missed_dates']:
-        try:
-            all_dates.append((datetime.strptime(date_str, '%Y-%m-%d'), False))
-        except:
-            pass
-    
-    all_dates.sort(reverse=True)
-    recent_attempts = [completed for _, completed in all_dates[:5]]
-    
-    if len(recent_attempts) >= 3:
-        recent_rate = sum(recent_attempts[-3:]) / 3
-        older_rate = sum(recent_attempts[:3]) / 3 if len(recent_attempts) >= 3 else recent_rate
-        
-        if recent_rate > older_rate + 0.2:
-            return "📈 Rising"
-        elif recent_rate < older_rate - 0.2:
-            return "📉 Falling"
-    
-    return "➡️ Stable"
+    with session().store.lock:
+        return habitcore.habit_momentum(session().store.matrix, habit)
 
 def estimate_next_level():
     """Calculate points needed for next level"""
-    points = st.session_state.total_points
+    points = session().store.total_points
     level = get_level()
     
     levels = [0, 100, 300, 600, 1000]
@@ -668,44 +359,24 @@ def estimate_next_level():
     
     return 0
 
+@profiler.timed("analytics")
 def get_habit_breakdown():
     """Get breakdown of habits by difficulty"""
-    easy = sum(1 for h in st.session_state.habits if h['difficulty'] == 'Easy')
-    medium = sum(1 for h in st.session_state.habits if h['difficulty'] == 'Medium')
-    hard = sum(1 for h in st.session_state.habits if h['difficulty'] == 'Hard')
-    
-    return {"Easy": easy, "Medium": medium, "Hard": hard}
+    return get_analytics().habit_breakdown
 
+@profiler.timed("analytics")
 def calculate_difficulty_completion_rate():
     """Calculate completion rate by difficulty"""
-    rates = {}
-    
-    for difficulty in ["Easy", "Medium", "Hard"]:
-        habits_with_diff = [h for h in st.session_state.habits if h['difficulty'] == difficulty]
-        if not habits_with_diff:
-            rates[difficulty] = 0
-        else:
-            total_all = sum(len(h['completed_dates']) + len(h['missed_dates']) for h in habits_with_diff)
-            total_completed = sum(len(h['completed_dates']) for h in habits_with_diff)
-            rates[difficulty] = (total_completed / total_all * 100) if total_all > 0 else 0
-    
-    return rates
+    return get_analytics().difficulty_rates
 
+@profiler.timed("analytics")
 def get_consistency_score():
     """Calculate advanced consistency score (0-100)"""
-    if not st.session_state.habits:
-        return 0
-    
-    weekly_perf = calculate_weekly_performance()
-    monthly_perf = calculate_monthly_performance()
-    current_streak, _ = calculate_streak()
-    
-    consistency = (weekly_perf * 0.6) + (monthly_perf * 0.3) + min(current_streak * 5, 20)
-    
-    return max(0, min(100, consistency))
+    return get_analytics().consistency_score
 
 # ==================== UI RENDERING FUNCTIONS ====================
 
+@profiler.timed("render")
 def render_verdict_card(verdict):
     """Render the daily verdict"""
     color_map = {
@@ -718,36 +389,124 @@ def render_verdict_card(verdict):
     st.markdown(f"""
     <div class='{color_map.get(verdict['type'], 'verdict-warning')}'>
         <h2>TODAY'S VERDICT</h2>
-        <p style='font-size: 1.1rem; margin-top: 12px; line-height: 1.6;'>{verdict['message']}</p>
+        <p class='verdict-message'>{verdict['message']}</p>
     </div>
     """, unsafe_allow_html=True)
 
-def render_habit_card(habit, idx):
-    """Render individual habit card"""
+def log_result(idx, value):
+    """Done/Miss button callback: record today's result for one habit and persist it"""
     today = get_today()
-    is_completed_today = today in habit['completed_dates']
-    
-    total_attempts = len(habit['completed_dates']) + len(habit['missed_dates'])
-    completion_pct = (len(habit['completed_dates']) / total_attempts * 100) if total_attempts > 0 else 0
-    
-    diff_colors = {
-        "Easy": "#10b981",
-        "Medium": "#f59e0b",
-        "Hard": "#ef4444"
-    }
+    shared = session().store
+    with shared.lock:
+        habit = shared.habits[idx]
+        if today in habit['completed_dates' if value == DONE else 'missed_dates']:
+            return
+        
+        if value == DONE:
+            points_map = {"Easy": 5, "Medium": 10, "Hard": 20}
+        else:
+            points_map = {"Easy": -2, "Medium": -5, "Hard": -10}
+        points_before = shared.total_points
+        record_event({
+            "op": "complete" if value == DONE else "miss",
+            "id": habit['id'],
+            "day": today,
+            "points": max(0, points_before + points_map[habit['difficulty']]) - points_before
+        })
+    st.session_state.counters_stale = True
+
+@profiler.timed("render")
+def render_counters(summary_slot, metrics_slot):
+    """Summary line and metric cards, drawn into placeholders so a card click can refresh them in place"""
+    analytics = get_analytics()
+    completed_today, total_today = analytics.today_completed, analytics.today_total
+    current_streak = analytics.current_streak
+    consistency = analytics.consistency_score
+    
+    summary_text = f"**Today: {completed_today} completed • {max(0, total_today - completed_today)} avoided • Streak: {current_streak} days • Consistency: {consistency:.0f}%**"
+    
+    summary_slot.markdown(f"<p class='summary-line'>{summary_text}</p>", unsafe_allow_html=True)
+    
+    with metrics_slot.container():
+        col1, col2, col3, col4, col5 = st.columns(5)
+        
+        with col1:
+            st.markdown(f"""
+            <div class='metric-card'>
+                <div class='metric-label'>Points</div>
+                <div class='metric-value'>{session().store.total_points}</div>
+                <div class='metric-sub'>{analytics.level['icon']} {analytics.level['name']}</div>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        with col2:
+            st.markdown(f"""
+            <div class='metric-card'>
+                <div class='metric-label'>Total</div>
+                <div class='metric-value'>{len(session().store.habits)}</div>
+                <div class='metric-sub'>Habits</div>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        with col3:
+            completion_pct = (completed_today / total_today * 100) if total_today > 0 else 0
+            st.markdown(f"""
+            <div class='metric-card'>
+                <div class='metric-label'>Today</div>
+                <div class='metric-value'>{completion_pct:.0f}%</div>
+                <div class='metric-sub'>Complete</div>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        with col4:
+            st.markdown(f"""
+            <div class='metric-card'>
+                <div class='metric-label'>Streak</div>
+                <div class='metric-value'>{current_streak}</div>
+                <div class='metric-sub'>Days</div>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        with col5:
+            st.markdown(f"""
+            <div class='metric-card'>
+                <div class='metric-label'>Consistency</div>
+                <div class='metric-value'>{consistency:.0f}</div>
+                <div class='metric-sub'>Score</div>
+            </div>
+            """, unsafe_allow_html=True)
+
+@st.fragment
+@holding_lease()
+@profiler.timed("render")
+def render_habit_card(idx):
+    """Render individual habit card; its buttons rerun only this card and the counters"""
+    today = get_today()
+    # Met over expected occurrences, like every other rate (see habitcore.habit_rates)
+    analytics = get_analytics()
+    shared = session().store
+    # Other sessions' clicks and merges change the habit and its matrix row in place
+    with shared.lock:
+        habit = shared.habits[idx]
+        is_completed_today = today in habit['completed_dates']
+        row = shared.matrix.row_of(habit)
+        momentum = get_habit_momentum(habit)
+        schedule = habitcore.describe_schedule(habit)
+        habit = dict(habit)
+    met, expected = int(analytics.habit_met[row]), float(analytics.habit_expected[row])
+    completion_pct = habitcore.completion_pct(met, expected)
     
     status_icon = "✓" if is_completed_today else "◯"
-    momentum = get_habit_momentum(habit)
     
     st.markdown(f"""
     <div class="habit-card">
-        <div style='flex: 1;'>
-            <div style='display: flex; gap: 16px; align-items: center;'>
-                <span style='font-size: 1.5rem; font-weight: 700; color: {"#10b981" if is_completed_today else "#999"};'>{status_icon}</span>
-                <div style='flex: 1;'>
-                    <div style='font-weight: 600; font-size: 1rem;'>{habit['name']}</div>
-                    <div style='font-size: 0.85rem; color: #999; margin-top: 4px;'>
-                        {momentum} • {completion_pct:.0f}% • {len(habit['completed_dates'])}/{total_attempts} • <span style='color: {diff_colors.get(habit['difficulty'], "#999")};'>{habit['difficulty']}</span>
+        <div class='habit-body'>
+            <div class='habit-row'>
+                <span class='habit-status{" done" if is_completed_today else ""}'>{status_icon}</span>
+                <div class='habit-body'>
+                    <div class='habit-name'>{habit['name']}</div>
+                    <div class='habit-meta'>
+                        {momentum} • {schedule} • {completion_pct:.0f}% • {met}/{expected:.0f}{f" • {habit['debt']} owed" if habit.get('debt') else ''} • <span class='difficulty-{str(habit['difficulty']).lower()}'>{habit['difficulty']}</span>
                     </div>
                 </div>
             </div>
@@ -757,352 +516,459 @@ def render_habit_card(habit, idx):
     
     col1, col2 = st.columns(2)
     with col1:
-        if st.button("✓ Done", key=f"complete_{idx}", use_container_width=True):
-            if today not in habit['completed_dates']:
-                habit['completed_dates'].append(today)
-                if today in habit['missed_dates']:
-                    habit['missed_dates'].remove(today)
-                
-                points_map = {"Easy": 5, "Medium": 10, "Hard": 20}
-                st.session_state.total_points += points_map[habit['difficulty']]
-                save_data()
-                st.rerun()
-    
+        st.button("✓ Done", key=f"complete_{idx}", use_container_width=True, on_click=log_result, args=(idx, DONE))
     with col2:
-        if st.button("✗ Miss", key=f"miss_{idx}", use_container_width=True):
-            if today not in habit['missed_dates']:
-                habit['missed_dates'].append(today)
-                if today in habit['completed_dates']:
-                    habit['completed_dates'].remove(today)
-                
-                points_map = {"Easy": -2, "Medium": -5, "Hard": -10}
-                st.session_state.total_points = max(0, st.session_state.total_points + points_map[habit['difficulty']])
-                save_data()
-                st.rerun()
+        st.button("✗ Miss", key=f"miss_{idx}", use_container_width=True, on_click=log_result, args=(idx, MISSED))
+    
+    if st.session_state.pop('counters_stale', False):
+        # Entering or leaving intervention mode changes the whole page layout
+        if check_intervention() != intervention_active:
+            st.rerun()
+        render_counters(*counter_slots)
+
+HABITS_PER_PAGE = 20
+HABIT_STATUSES = ["Any status", "Done today", "Pending", "Failing"]
+
+@profiler.timed("analytics")
+def filter_habits(query="", difficulty=None, htype=None, status=None):
+    """Indices of habits matching a name search and difficulty/type/status filters"""
+    with session().store.lock:
+        return habitcore.filter_habits(session().store.habits, session().store.matrix, query, difficulty, htype, status)
+
+def reset_habit_page():
+    st.session_state.habit_page = 1
+
+@st.fragment
+@holding_lease()
+@profiler.timed("render")
+def render_habit_list():
+    """Filtered, paginated habit cards; only the visible page is rendered"""
+    col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
+    with col1:
+        query = st.text_input("Search", key="habit_search", placeholder="Search habits", label_visibility="collapsed", on_change=reset_habit_page)
+    with col2:
+        difficulty = st.selectbox("Difficulty", ["Any difficulty"] + DIFFICULTIES, key="habit_filter_difficulty", label_visibility="collapsed", on_change=reset_habit_page)
+    with col3:
+        htype = st.selectbox("Type", ["Any type", "Daily", "Weekly"], key="habit_filter_type", label_visibility="collapsed", on_change=reset_habit_page)
+    with col4:
+        status = st.selectbox("Status", HABIT_STATUSES, key="habit_filter_status", label_visibility="collapsed", on_change=reset_habit_page)
+    
+    rows = filter_habits(
+        query,
+        None if difficulty == "Any difficulty" else difficulty,
+        None if htype == "Any type" else htype,
+        None if status == "Any status" else status
+    )
+    if len(rows) == 0:
+        st.info("No habits match these filters.")
+        return
+    
+    pages = (len(rows) - 1) // HABITS_PER_PAGE + 1
+    if st.session_state.get('habit_page', 1) > pages:
+        st.session_state.habit_page = pages
+    page = st.session_state.get('habit_page', 1)
+    start = (page - 1) * HABITS_PER_PAGE
+    
+    for idx in rows[start:start + HABITS_PER_PAGE]:
+        render_habit_card(int(idx))
+    
+    if pages > 1:
+        col1, col2 = st.columns([1, 3])
+        with col1:
+            st.number_input("Page", min_value=1, max_value=pages, key="habit_page")
+        with col2:
+            st.caption(f"Showing {start + 1}–{min(start + HABITS_PER_PAGE, len(rows))} of {len(rows)} habits • page {page} of {pages}")
 
 # ==================== MAIN APP ====================
 
-st.markdown("<h1 style='text-align: center;'>⚔️ HABIT ENFORCEMENT SYSTEM</h1>", unsafe_allow_html=True)
-
-intervention_active = check_intervention()
-
-if intervention_active:
-    st.markdown("""
-    <div class='intervention-box'>
-        <h2>🚨 INTERVENTION MODE ACTIVE 🚨</h2>
-        <p style='font-size: 1.1rem; margin: 16px 0; color: #fca5a5;'>Your weekly completion rate is below 40%.</p>
-        <div style='background: rgba(0,0,0,0.3); padding: 20px; border-radius: 8px; margin: 16px 0; text-align: left;'>
-            <p style='color: #60a5fa; font-weight: 600; margin-bottom: 8px;'>Recovery Plan:</p>
-            <p style='color: #ccc; line-height: 1.8;'>
-                1. Complete ONE habit 7 days straight<br/>
-                2. No new habits allowed<br/>
-                3. System unlocks when successful
-            </p>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-else:
-    verdict = calculate_daily_verdict()
-    render_verdict_card(verdict)
-
-st.markdown("---")
-
-completed_today, total_today = get_today_status()
-current_streak, longest_streak = calculate_streak()
-consistency = get_consistency_score()
-
-summary_text = f"**Today: {completed_today} completed • {max(0, total_today - completed_today)} avoided • Streak: {current_streak} days • Consistency: {consistency:.0f}%**"
-
-st.markdown(f"<p style='text-align: center; font-size: 1.1rem; color: #e0e0e0;'>{summary_text}</p>", unsafe_allow_html=True)
-
-st.markdown("---")
-
-personality, personality_emoji = detect_personality()
-st.markdown(f"""
-<div style='text-align: center;'>
-    <p style='color: #999; font-size: 0.9rem; text-transform: uppercase; letter-spacing: 1px; margin-bottom: 8px;'>Your Habit Personality</p>
-    <div class='profile-badge'>{personality_emoji} {personality}</div>
-</div>
-""", unsafe_allow_html=True)
-
-st.markdown("---")
-
-# Metrics
-col1, col2, col3, col4, col5 = st.columns(5)
-
-with col1:
-    st.markdown(f"""
-    <div class='metric-card'>
-        <div class='metric-label'>Points</div>
-        <div class='metric-value'>{st.session_state.total_points}</div>
-        <div style='font-size: 0.8rem; color: #666; margin-top: 8px;'>{get_level()['icon']} {get_level()['name']}</div>
-    </div>
-    """, unsafe_allow_html=True)
-
-with col2:
-    st.markdown(f"""
-    <div class='metric-card'>
-        <div class='metric-label'>Total</div>
-        <div class='metric-value'>{len(st.session_state.habits)}</div>
-        <div style='font-size: 0.8rem; color: #666; margin-top: 8px;'>Habits</div>
-    </div>
-    """, unsafe_allow_html=True)
-
-with col3:
-    completion_pct = (completed_today / total_today * 100) if total_today > 0 else 0
-    st.markdown(f"""
-    <div class='metric-card'>
-        <div class='metric-label'>Today</div>
-        <div class='metric-value'>{completion_pct:.0f}%</div>
-        <div style='font-size: 0.8rem; color: #666; margin-top: 8px;'>Complete</div>
-    </div>
-    """, unsafe_allow_html=True)
-
-with col4:
-    st.markdown(f"""
-    <div class='metric-card'>
-        <div class='metric-label'>Streak</div>
-        <div class='metric-value'>{current_streak}</div>
-        <div style='font-size: 0.8rem; color: #666; margin-top: 8px;'>Days</div>
-    </div>
-    """, unsafe_allow_html=True)
-
-with col5:
-    st.markdown(f"""
-    <div class='metric-card'>
-        <div class='metric-label'>Consistency</div>
-        <div class='metric-value'>{consistency:.0f}</div>
-        <div style='font-size: 0.8rem; color: #666; margin-top: 8px;'>Score</div>
-    </div>
-    """, unsafe_allow_html=True)
-
-# Sidebar
-with st.sidebar:
-    st.markdown("### Status")
+# The session holds its lease only while a run uses it, so an evicted store is freed between runs
+with holding_lease():
+    init_session_state()
     
-    level = get_level()
-    st.markdown(f"#### {level['icon']} {level['name']}")
-    st.markdown(f"**{st.session_state.total_points} points**")
+    st.markdown("<h1 class='app-title'>⚔️ HABIT ENFORCEMENT SYSTEM</h1>", unsafe_allow_html=True)
     
-    st.divider()
+    # Writes happen behind the clicks, so a failing disk is reported here on the next rerun
+    writer = persister.get_persister(get_store())
+    if writer.error is not None:
+        st.error(f"⚠️ {writer.backlog()} change(s) not saved yet: {writer.error}. Retrying in the background.")
     
-    st.markdown("### Performance")
+    analytics = get_analytics()
+    intervention_active = check_intervention()
     
-    total_all = sum(len(h['completed_dates']) + len(h['missed_dates']) for h in st.session_state.habits)
-    total_done = sum(len(h['completed_dates']) for h in st.session_state.habits)
+    with profiler.section("render.verdict"):
+        if intervention_active:
+            st.markdown("""
+            <div class='intervention-box'>
+                <h2>🚨 INTERVENTION MODE ACTIVE 🚨</h2>
+                <p class='intervention-lead'>Your weekly completion rate is below 40%.</p>
+                <div class='recovery-plan'>
+                    <p class='recovery-plan-title'>Recovery Plan:</p>
+                    <p class='recovery-plan-steps'>
+                        1. Complete ONE habit 7 days straight<br/>
+                        2. No new habits allowed<br/>
+                        3. System unlocks when successful
+                    </p>
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
+        else:
+            verdict = calculate_daily_verdict()
+            render_verdict_card(verdict)
     
-    if total_all > 0:
-        overall_rate = (total_done / total_all) * 100
-        st.metric("Overall Rate", f"{overall_rate:.0f}%")
-        st.metric("Weekly", f"{calculate_weekly_performance():.0f}%")
-        st.metric("Monthly", f"{calculate_monthly_performance():.0f}%")
+    st.markdown("---")
     
-    st.divider()
+    completed_today, total_today = get_today_status()
+    current_streak, longest_streak = calculate_streak()
+    consistency = get_consistency_score()
     
-    st.markdown("### Focus Target")
-    focus = get_focus_habit()
-    if focus:
-        st.markdown(f"**{focus['name']}**")
-        focus_total = len(focus['completed_dates']) + len(focus['missed_dates'])
-        focus_rate = (len(focus['completed_dates']) / focus_total * 100) if focus_total > 0 else 0
-        st.metric("Rate", f"{focus_rate:.0f}%")
-        st.error("Fix this first.")
+    summary_slot = st.empty()
     
-    st.divider()
+    st.markdown("---")
     
-    if current_streak > 0 and current_streak < 3:
-        st.markdown("""
-        <div class='streak-danger'>
-            ⚠️ Your streak is fragile. One miss breaks it.
+    with profiler.section("render.personality"):
+        personality, personality_emoji = detect_personality()
+        st.markdown(f"""
+        <div class='personality'>
+            <p class='personality-label'>Your Habit Personality</p>
+            <div class='profile-badge'>{personality_emoji} {personality}</div>
         </div>
         """, unsafe_allow_html=True)
-
-# Tabs
-tab1, tab2, tab3, tab4 = st.tabs(["🎯 Habits", "📊 Analytics", "📈 Trends", "📋 Reality"])
-
-with tab1:
-    if intervention_active:
-        st.error("🔒 INTERVENTION MODE: Only focus habit available")
-        focus = get_focus_habit()
+    
+    st.markdown("---")
+    
+    # Metrics
+    metrics_slot = st.empty()
+    
+    counter_slots = (summary_slot, metrics_slot)
+    render_counters(*counter_slots)
+    st.session_state.counters_stale = False
+    
+    # Sidebar
+    with st.sidebar, profiler.section("render.sidebar"):
+        st.markdown("### Status")
+        
+        level = analytics.level
+        st.markdown(f"#### {level['icon']} {level['name']}")
+        st.markdown(f"**{session().store.total_points} points**")
+        
+        st.divider()
+        
+        st.markdown("### Performance")
+        
+        if analytics.total_attempts > 0:
+            st.metric("Overall Rate", f"{analytics.overall_rate * 100:.0f}%")
+            st.metric("Weekly", f"{analytics.weekly_performance:.0f}%")
+            st.metric("Monthly", f"{analytics.monthly_performance:.0f}%")
+        
+        st.divider()
+        
+        st.markdown("### Focus Target")
+        focus = analytics.focus_habit
         if focus:
-            st.subheader(focus['name'])
-            render_habit_card(focus, st.session_state.habits.index(focus))
-    else:
-        st.markdown("### Add Habit")
+            st.markdown(f"**{focus['name']}**")
+            st.metric("Rate", f"{analytics.focus_rate:.0f}%")
+            st.error("Fix this first.")
         
-        if should_freeze_habits():
+        st.divider()
+        
+        # Debt and punishment are kept up to date by the end-of-day rollover (habitcore.rollover)
+        shared = session().store
+        with shared.lock:
+            in_debt = sorted(((h['name'], h.get('debt') or 0) for h in shared.habits if h.get('punishment_due')), key=lambda d: -d[1])
+            punishment = shared.data.get('user_punishment')
+            betrayals = shared.data.get('betrayals', 0)
+            malformed = list(shared.report['malformed'])
+        if in_debt:
+            st.markdown("### Debt")
+            for name, debt in in_debt[:5]:
+                st.markdown(f"**{name}** • {debt} owed")
+            if punishment:
+                st.error(f"Punishment due: {punishment}")
+            st.caption(f"{betrayals} betrayals so far")
+            
+            st.divider()
+        
+        if current_streak > 0 and current_streak < 3:
             st.markdown("""
-            <div class='frozen-notice'>
-                <h3>🔒 HABIT FREEZE ACTIVE</h3>
-                <p>You don't need new habits. You need discipline.</p>
+            <div class='streak-danger'>
+                ⚠️ Your streak is fragile. One miss breaks it.
+            </div>
+            """, unsafe_allow_html=True)
+        elif analytics.fragile_habits:
+            st.markdown(f"""
+            <div class='streak-danger'>
+                ⚠️ Fragile streaks: {', '.join(analytics.fragile_habits[:5])}. One miss breaks them.
             </div>
             """, unsafe_allow_html=True)
+        
+        if malformed:
+            with st.expander(f"⚠️ {len(malformed)} malformed dates ignored"):
+                for entry in malformed:
+                    st.caption(f"{entry['habit']} • {entry['field']}: {entry['value']!r}")
+    
+    # Views
+    @profiler.timed("render")
+    def render_habits_view():
+        """Add habits and log today's results"""
+        if intervention_active:
+            st.error("🔒 INTERVENTION MODE: Only focus habit available")
+            focus = get_focus_habit()
+            if focus:
+                st.subheader(focus['name'])
+                shared = session().store
+                with shared.lock:
+                    idx = shared.habits.index(focus)
+                render_habit_card(idx)
         else:
-            col1, col2, col3, col4, col5 = st.columns([2, 1.5, 1.5, 1.5, 1])
+            st.markdown("### Add Habit")
             
-            with col1:
-                name = st.text_input("Name", label_visibility="collapsed", placeholder="Habit name")
-            with col2:
-                htype = st.selectbox("Type", ["Daily", "Weekly"], label_visibility="collapsed")
-            with col3:
-                difficulty = st.selectbox("Difficulty", ["Easy", "Medium", "Hard"], label_visibility="collapsed")
-            with col4:
-                created = st.date_input("Date", value=datetime.now(), label_visibility="collapsed")
-            with col5:
-                if st.button("Add", use_container_width=True):
-                    if name:
-                        st.session_state.habits.append({
-                            "id": int(time.time() * 1000),
-                            "name": name,
-                            "type": htype,
-                            "difficulty": difficulty,
-                            "created_date": created.strftime('%Y-%m-%d'),
-                            "completed_dates": [],
-                            "missed_dates": []
-                        })
-                        save_data()
-                        st.rerun()
-        
-        st.divider()
-        
-        if st.session_state.habits:
-            st.markdown("### Your Habits")
+            if should_freeze_habits():
+                st.markdown("""
+                <div class='frozen-notice'>
+                    <h3>🔒 HABIT FREEZE ACTIVE</h3>
+                    <p>You don't need new habits. You need discipline.</p>
+                </div>
+                """, unsafe_allow_html=True)
+            else:
+                schedule_kind = st.radio("Schedule", ["As type", "On weekdays", "Times per week"], horizontal=True, key="new_habit_schedule", label_visibility="collapsed")
+                schedule = None
+                if schedule_kind == "On weekdays":
+                    weekdays = st.multiselect("Weekdays", [d[:3] for d in WEEKDAY_NAMES], default=["Mon", "Wed", "Fri"], label_visibility="collapsed")
+                    schedule = {"weekdays": weekdays} if weekdays else None
+                elif schedule_kind == "Times per week":
+                    schedule = {"per_week": int(st.number_input("Times per week", min_value=1, max_value=7, value=3))}
+                
+                col1, col2, col3, col4, col5 = st.columns([2, 1.5, 1.5, 1.5, 1])
+                
+                with col1:
+                    name = st.text_input("Name", label_visibility="collapsed", placeholder="Habit name")
+                with col2:
+                    htype = st.selectbox("Type", ["Daily", "Weekly"], label_visibility="collapsed")
+                with col3:
+                    difficulty = st.selectbox("Difficulty", ["Easy", "Medium", "Hard"], label_visibility="collapsed")
+                with col4:
+                    created = st.date_input("Date", value=datetime.now(), label_visibility="collapsed")
+                with col5:
+                    if st.button("Add", use_container_width=True):
+                        if name:
+                            habit = {
+                                "id": int(time.time() * 1000),
+                                "name": name,
+                                "type": htype,
+                                "difficulty": difficulty,
+                                "created_date": created.strftime('%Y-%m-%d'),
+                                "completed_dates": [],
+                                "missed_dates": []
+                            }
+                            if schedule:
+                                habit["schedule"] = schedule
+                            record_event({"op": "add", "habit": habit})
+                            st.rerun()
             
-            for idx, habit in enumerate(st.session_state.habits):
-                render_habit_card(habit, idx)
-        else:
-            st.info("No habits yet. Add one to start.")
-
-with tab2:
-    st.markdown("### Analytics")
+            st.divider()
+            
+            if session().store.habits:
+                st.markdown("### Your Habits")
+                
+                render_habit_list()
+            else:
+                st.info("No habits yet. Add one to start.")
     
-    if st.session_state.habits:
-        current_streak, _ = calculate_streak()
-        total_all = sum(len(h['completed_dates']) + len(h['missed_dates']) for h in st.session_state.habits)
-        total_done = sum(len(h['completed_dates']) for h in st.session_state.habits)
-        overall_rate = (total_done / total_all) if total_all > 0 else 0
+    @profiler.timed("render")
+    def render_analytics_view():
+        """Completion rates and charts"""
+        st.markdown("### Analytics")
         
-        can_view = current_streak >= 3 or overall_rate >= 0.6
+        if session().store.habits:
+            overall_rate = analytics.overall_rate
+            
+            can_view = current_streak >= 3 or overall_rate >= 0.6
+            
+            if not can_view:
+                st.warning("📊 Analytics unlock when: 3+ day streak OR 60%+ completion")
+            else:
+                col1, col2, col3 = st.columns(3)
+                
+                with col1:
+                    st.metric("Overall %", f"{overall_rate*100:.0f}%")
+                with col2:
+                    st.metric("Weekly %", f"{analytics.weekly_performance:.0f}%")
+                with col3:
+                    st.metric("Monthly %", f"{analytics.monthly_performance:.0f}%")
+                
+                st.markdown("#### Custom Range")
+                today_date = datetime.now().date()
+                with session().store.lock:
+                    names = {h['id']: h['name'] for h in session().store.habits}
+                col1, col2, col3 = st.columns([2, 1, 2])
+                with col1:
+                    custom_range = st.date_input("Range", value=(today_date - timedelta(days=13), today_date), key="range_dates", label_visibility="collapsed")
+                with col2:
+                    custom_difficulty = st.selectbox("Difficulty", ["All"] + DIFFICULTIES, key="range_difficulty", label_visibility="collapsed")
+                with col3:
+                    custom_habits = st.multiselect("Habits", list(names), format_func=names.get, key="range_habits", placeholder="All habits", label_visibility="collapsed")
+                
+                if len(custom_range) == 2:
+                    range_rate = completion_rate(
+                        custom_range[0], custom_range[1],
+                        habit_ids=custom_habits or None,
+                        difficulty=None if custom_difficulty == "All" else custom_difficulty
+                    )
+                    st.metric(f"{custom_range[0]:%b %d} – {custom_range[1]:%b %d}", f"{range_rate:.0f}%")
+                
+                st.divider()
+                
+                col1, col2 = st.columns(2)
+                
+                with col1, profiler.section("render.chart.difficulty"):
+                    diff_rates = calculate_difficulty_completion_rate()
+                    charts.bar_chart(diff_rates.keys(), diff_rates.values(), ('#10b981', '#f59e0b', '#ef4444'), "By Difficulty", 350)
+                
+                with col2, profiler.section("render.chart.today"):
+                    done_count = completed_today
+                    missed_count = max(0, total_today - completed_today)
+                    charts.pie_chart(('Done', 'Missed'), (done_count, missed_count), ('#10b981', '#ef4444'), "Today", 350)
+    
+    @profiler.timed("render")
+    def render_trends_view():
+        """Recent trend and best/worst days"""
+        st.markdown("### 7-Day Trend")
         
-        if not can_view:
-            st.warning("📊 Analytics unlock when: 3+ day streak OR 60%+ completion")
-        else:
-            col1, col2, col3 = st.columns(3)
+        if session().store.habits:
+            trend = calculate_daily_completion_trend()
             
-            with col1:
-                st.metric("Overall %", f"{overall_rate*100:.0f}%")
-            with col2:
-                st.metric("Weekly %", f"{calculate_weekly_performance():.0f}%")
-            with col3:
-                st.metric("Monthly %", f"{calculate_monthly_performance():.0f}%")
+            with profiler.section("render.chart.trend"):
+                charts.bar_chart(trend.keys(), trend.values(), '#6366f1', "Daily Completion % (Last 7 Days)", 400)
             
             st.divider()
             
-            col1, col2 = st.columns(2)
+            best_day = get_best_day()
+            worst_day = get_worst_day()
             
+            col1, col2 = st.columns(2)
             with col1:
-                diff_rates = calculate_difficulty_completion_rate()
-                
-                fig1 = go.Figure(data=[
-                    go.Bar(x=list(diff_rates.keys()), y=list(diff_rates.values()), marker=dict(color=['#10b981', '#f59e0b', '#ef4444']))
-                ])
-                fig1.update_layout(
-                    title="By Difficulty",
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    font=dict(color='#e0e0e0'),
-                    height=350
-                )
-                st.plotly_chart(fig1, use_container_width=True)
+                if best_day:
+                    st.success(f"✓ Best day: **{best_day}** (luck, not discipline)")
+            with col2:
+                if worst_day:
+                    st.error(f"✗ Worst day: **{worst_day}** (pattern to fix)")
+            
+            st.divider()
             
+            st.markdown("### Calendar")
+            today_date = datetime.now().date()
+            with session().store.lock:
+                names = {h['id']: h['name'] for h in session().store.habits}
+            col1, col2, col3 = st.columns([2, 2, 1])
+            with col1:
+                calendar_range = st.date_input("Range", value=(today_date - timedelta(days=364), today_date), key="calendar_dates", label_visibility="collapsed")
             with col2:
-                done_count = completed_today
-                missed_count = max(0, total_today - completed_today)
-                
-                fig2 = go.Figure(data=[go.Pie(
-                    labels=['Done', 'Missed'],
-                    values=[done_count, missed_count],
-                    hole=0.3,
-                    marker=dict(colors=['#10b981', '#ef4444'])
-                )])
-                fig2.update_layout(
-                    title="Today",
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    font=dict(color='#e0e0e0'),
-                    height=350
+                calendar_habit = st.selectbox("Habit", [None] + list(names), format_func=lambda h: "All habits" if h is None else names[h], key="calendar_habit", label_visibility="collapsed")
+            with col3:
+                calendar_bucket = st.selectbox("Bucket", ["Auto", "Day", "Week", "Month"], key="calendar_bucket", label_visibility="collapsed")
+            
+            if len(calendar_range) == 2:
+                series = completion_series(
+                    calendar_range[0], calendar_range[1],
+                    habit_ids=None if calendar_habit is None else [calendar_habit],
+                    bucket=None if calendar_bucket == "Auto" else calendar_bucket.lower()
                 )
-                st.plotly_chart(fig2, use_container_width=True)
-
-with tab3:
-    st.markdown("### 7-Day Trend")
+                labels = [d.isoformat() for d in series.starts]
+                
+                with profiler.section("render.chart.calendar"):
+                    z, columns, rows = series.calendar()
+                    charts.heatmap_chart(charts.chart_values(z), [d.isoformat() for d in columns], rows, "Completion % by day", 280)
+                
+                with profiler.section("render.chart.calendar_trend"):
+                    charts.line_chart(labels, charts.chart_values(series.rates), '#6366f1', f"Completion % per {series.bucket}", 320)
     
-    if st.session_state.habits:
-        trend = calculate_daily_completion_trend()
+    @profiler.timed("render")
+    def render_reality_view():
+        """Personality and raw facts"""
+        st.markdown("### Reality Check")
         
-        fig_trend = go.Figure(data=[
-            go.Bar(x=list(trend.keys()), y=list(trend.values()), marker=dict(color='#6366f1'))
-        ])
-        fig_trend.update_layout(
-            title="Daily Completion % (Last 7 Days)",
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='#e0e0e0'),
-            height=400
-        )
-        st.plotly_chart(fig_trend, use_container_width=True)
+        personality, emoji = detect_personality()
+        st.markdown(f"#### {emoji} You are a **{personality}**")
+        
+        personality_meanings = {
+            "Starter": "You start many but finish few. You confuse enthusiasm with discipline.",
+            "Avoider": "You avoid hard habits. You'll never grow doing only easy things.",
+            "Quitter": "You give up after 2-3 days. You're failing yourself, not habits.",
+            "Sprinter": "You're inconsistent. You need systems, not motivation.",
+            "Finisher": "You complete what you start. Build on this.",
+            "Developing": "Your patterns are still forming. Be consistent.",
+            "Uninitialized": "No data yet. Start tracking to get feedback."
+        }
+        
+        st.markdown(f"> {personality_meanings.get(personality, '')}")
         
         st.divider()
         
-        best_day = get_best_day()
-        worst_day = get_worst_day()
+        st.markdown("### Facts")
         
-        col1, col2 = st.columns(2)
-        with col1:
-            if best_day:
-                st.success(f"✓ Best day: **{best_day}** (luck, not discipline)")
-        with col2:
-            if worst_day:
-                st.error(f"✗ Worst day: **{worst_day}** (pattern to fix)")
-
-with tab4:
-    st.markdown("### Reality Check")
-    
-    personality, emoji = detect_personality()
-    st.markdown(f"#### {emoji} You are a **{personality}**")
-    
-    personality_meanings = {
-        "Starter": "You start many but finish few. You confuse enthusiasm with discipline.",
-        "Avoider": "You avoid hard habits. You'll never grow doing only easy things.",
-        "Quitter": "You give up after 2-3 days. You're failing yourself, not habits.",
-        "Sprinter": "You're inconsistent. You need systems, not motivation.",
-        "Finisher": "You complete what you start. Build on this.",
-        "Developing": "Your patterns are still forming. Be consistent.",
-        "Uninitialized": "No data yet. Start tracking to get feedback."
+        total_habits = analytics.habit_count
+        total_completed = analytics.total_completed
+        total_missed = analytics.total_missed
+        
+        st.markdown(f"""
+        - **{total_habits}** habits started
+        - **{total_completed}** times completed
+        - **{total_missed}** times failed
+        """)
+        
+        if total_completed + total_missed > 0:
+            fail_rate = (total_missed / (total_completed + total_missed)) * 100
+            st.markdown(f"- **{fail_rate:.0f}%** failure rate")
+        
+        breakdown = get_habit_breakdown()
+        st.markdown(f"- Distribution: **{breakdown['Easy']} Easy** • **{breakdown['Medium']} Medium** • **{breakdown['Hard']} Hard**")
+        
+        st.divider()
+        
+        st.markdown("### History")
+        
+        history = recent_rollups(30)
+        if not history:
+            st.info("No closed days yet. Each day is recorded here once it ends.")
+            return
+        
+        with profiler.section("render.chart.history"):
+            charts.line_chart([r['date'] for r in history], [r['rate'] for r in history], '#10b981', "Completion % per day (last 30 days)", 300)
+        st.dataframe(
+            [{k: r[k] for k in ('date', 'done', 'missed', 'rate', 'streak', 'verdict', 'personality')} for r in reversed(history)],
+            hide_index=True, use_container_width=True
+        )
+        
+        with session().store.lock:
+            changes = list(session().store.data.get('personality_history') or [])
+        if changes:
+            st.markdown("#### Personality changes")
+            st.markdown("\n".join(f"- {c['date']}: {c.get('emoji', '')} **{c['personality']}**" for c in changes[-10:][::-1]))
+    
+    VIEWS = {
+        "🎯 Habits": render_habits_view,
+        "📊 Analytics": render_analytics_view,
+        "📈 Trends": render_trends_view,
+        "📋 Reality": render_reality_view
     }
     
-    st.markdown(f"> {personality_meanings.get(personality, '')}")
+    if NAVIGATION_MODE == "tabs":
+        # Eager: every tab body runs on every rerun
+        for tab, render_view in zip(st.tabs(list(VIEWS)), VIEWS.values()):
+            with tab:
+                render_view()
+    else:
+        # Lazy: only the selected view computes and builds its charts
+        active_view = st.radio("View", list(VIEWS), horizontal=True, key="active_view", label_visibility="collapsed")
+        VIEWS[active_view]()
     
     st.divider()
-    
-    st.markdown("### Facts")
-    
-    total_habits = len(st.session_state.habits)
-    total_completed = sum(len(h['completed_dates']) for h in st.session_state.habits)
-    total_missed = sum(len(h['missed_dates']) for h in st.session_state.habits)
-    
-    st.markdown(f"""
-    - **{total_habits}** habits started
-    - **{total_completed}** times completed
-    - **{total_missed}** times failed
-    """)
-    
-    if total_completed + total_missed > 0:
-        fail_rate = (total_missed / (total_completed + total_missed)) * 100
-        st.markdown(f"- **{fail_rate:.0f}%** failure rate")
-    
-    breakdown = get_habit_breakdown()
-    st.markdown(f"- Distribution: **{breakdown['Easy']} Easy** • **{breakdown['Medium']} Medium** • **{breakdown['Hard']} Hard**")
-
-st.divider()
-st.markdown("<center style='color: #666; font-size: 0.85rem;'>Honesty > Motivation • Behavior > Feelings</center>", unsafe_allow_html=True)
\ No newline at end of file
+    st.markdown("<p class='app-footer'>Honesty > Motivation • Behavior > Feelings</p>", unsafe_allow_html=True)
+
+# Profiler
+profile = profiler.finish_run()
+if profile:
+    with st.sidebar:
+        with st.expander(f"⏱️ Rerun profile • {profile['total_ms']:.0f} ms"):
+            st.dataframe(profile['timings'], hide_index=True, use_container_width=True)
+            st.caption(f"Appended to {profiler.LOG_FILE}")
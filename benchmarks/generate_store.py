@@ -0,0 +1,81 @@
+import argparse
+import json
+import random
+from datetime import date, timedelta
+
+import numpy as np
+
+# ==================== SYNTHETIC STORES ====================
+# Builds habit stores in the same JSON shape the app reads, from a handful of
+# habits up to thousands of habits with years of history, e.g.
+#   python benchmarks/generate_store.py --habits 2000 --years 5 -o big.json
+
+DIFFICULTY_WEIGHTS = {"Easy": 0.4, "Medium": 0.4, "Hard": 0.2}
+POINTS = {"Easy": (5, -2), "Medium": (10, -5), "Hard": (20, -10)}
+
+SIZES = {
+    "tiny": (5, 30 / 365),
+    "small": (50, 1),
+    "medium": (500, 3),
+    "large": (2000, 5),
+}
+
+def generate_store(habits=50, years=1.0, seed=0, today=None):
+    """Store dict with realistic per-habit completion rates, logging gaps and streaky behaviour"""
+    rng = np.random.default_rng(seed)
+    names = random.Random(seed)
+    today = today or date.today()
+    n_days = max(1, int(round(years * 365)))
+    day_strings = [(today - timedelta(days=n_days - 1 - i)).isoformat() for i in range(n_days)]
+
+    store = {"habits": [], "total_points": 0}
+    base_id = int(today.strftime('%Y%m%d')) * 100000
+    for h in range(habits):
+        difficulty = names.choices(list(DIFFICULTY_WEIGHTS), weights=list(DIFFICULTY_WEIGHTS.values()))[0]
+        htype = "Weekly" if names.random() < 0.2 else "Daily"
+        start = int(rng.integers(0, n_days))
+
+        # Each habit has its own skill level and a slowly drifting motivation, so rates vary and runs cluster
+        skill = rng.beta(5, 2) if difficulty != "Hard" else rng.beta(3, 3)
+        drift = np.cumsum(rng.normal(0, 0.05, n_days - start))
+        p_done = np.clip(skill + drift - drift.mean(), 0.05, 0.98)
+        logged = rng.random(n_days - start) < 0.9
+        if htype == "Weekly":
+            logged &= (np.arange(start, n_days) % 7) == (h % 7)
+        done = logged & (rng.random(n_days - start) < p_done)
+        missed = logged & ~done
+
+        completed_dates = [day_strings[start + i] for i in np.flatnonzero(done)]
+        missed_dates = [day_strings[start + i] for i in np.flatnonzero(missed)]
+        gain, loss = POINTS[difficulty]
+        store["total_points"] = max(0, store["total_points"] + gain * len(completed_dates) + loss * len(missed_dates))
+
+        store["habits"].append({
+            "id": base_id + h,
+            "name": f"habit-{h:05d}",
+            "type": htype,
+            "difficulty": difficulty,
+            "created_date": day_strings[start],
+            "completed_dates": completed_dates,
+            "missed_dates": missed_dates
+        })
+    return store
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic habit store")
+    parser.add_argument("--size", choices=sorted(SIZES), help="preset habits/years combination")
+    parser.add_argument("--habits", type=int, default=50)
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    # Never the app's own habits_enforcement.json, so a stray run cannot overwrite real history
+    parser.add_argument("-o", "--output", default="benchmark_store.json")
+    args = parser.parse_args()
+
+    habits, years = SIZES[args.size] if args.size else (args.habits, args.years)
+    store = generate_store(habits, years, args.seed)
+    with open(args.output, 'w') as f:
+        json.dump(store, f)
+    print(f"Wrote {habits} habits over {years:g} years to {args.output}")
+
+if __name__ == "__main__":
+    main()
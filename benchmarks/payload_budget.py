@@ -0,0 +1,81 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import tomllib
+
+# ==================== PAYLOAD BUDGET ====================
+# Bytes of element deltas the server sends per rerun, measured headless with
+# Streamlit's AppTest. Elements at least global.minCachedMessageSize long that the
+# browser already received in the previous run count as a hash reference only:
+#   python benchmarks/payload_budget.py --budget-kb 20
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generate_store import generate_store
+
+REFERENCE_BYTES = 64
+
+def cache_threshold():
+    """global.minCachedMessageSize from the app's config, or Streamlit's default"""
+    try:
+        with open(os.path.join(ROOT, ".streamlit", "config.toml"), 'rb') as f:
+            return tomllib.load(f).get("global", {}).get("minCachedMessageSize", 10000)
+    except FileNotFoundError:
+        return 10000
+
+def element_payloads(node):
+    """Serialized proto of every element under an AppTest tree node"""
+    children = getattr(node, "children", None)
+    if children is None:
+        yield node.proto.SerializeToString(deterministic=True)
+        return
+    for child in children.values():
+        yield from element_payloads(child)
+
+def measure(at, threshold, cached):
+    """(bytes, element count) of one run; updates the set of cached payloads"""
+    total = count = 0
+    for payload in element_payloads(at._tree):
+        count += 1
+        if len(payload) >= threshold and payload in cached:
+            total += REFERENCE_BYTES
+        else:
+            total += len(payload)
+            if len(payload) >= threshold:
+                cached.add(payload)
+    return total, count
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure bytes sent per rerun against a budget")
+    parser.add_argument("--budget-kb", type=float, default=20, help="maximum size of a repeat rerun")
+    parser.add_argument("--habits", type=int, default=20)
+    args = parser.parse_args()
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    from streamlit.testing.v1 import AppTest
+
+    workdir = tempfile.mkdtemp(prefix="habit-payload-")
+    with open(os.path.join(workdir, "habits_enforcement.json"), 'w') as f:
+        json.dump(generate_store(habits=args.habits, years=0.5), f)
+    os.chdir(workdir)
+
+    threshold = cache_threshold()
+    cached = set()
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60).run()
+    first, elements = measure(at, threshold, cached)
+    at.run()
+    repeat, _ = measure(at, threshold, cached)
+
+    print(f"elements          {elements:8d}")
+    print(f"first run         {first / 1024:8.1f} KB")
+    print(f"repeat rerun      {repeat / 1024:8.1f} KB  (budget {args.budget_kb:.0f} KB)")
+    if repeat > args.budget_kb * 1024:
+        print(f"FAIL: a repeat rerun sends {repeat / 1024:.1f} KB, over the {args.budget_kb:.0f} KB budget")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# ==================== BENCHMARK SUITE ====================
+# Times the habitcore analytics and storage hot paths against synthetic stores,
+# without importing Streamlit, and writes the results as JSON:
+#   python benchmarks/run_benchmarks.py --sizes small,medium -o results.json
+#   python benchmarks/run_benchmarks.py --compare results.json
+# "snapshot" is the full analytics rebuild a rerun pays after a click, and the
+# dashboard functions it is made of are timed one by one next to it. I/O paths
+# (load, the cold-start init_session_state, save_data and write-behind persist) are
+# timed once per storage backend, as "<name>.<backend>".
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import persister
+import storage
+from generate_store import SIZES, generate_store
+from habitcore import HabitStore, daily_completion_trend, detect_personality, get_today, roll_over, rollover_event, update_rollups
+
+def timed(fn, repeat):
+    """Wall time of each of `repeat` calls, in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def summarize(samples):
+    return {
+        "min_ms": round(min(samples), 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "repeat": len(samples)
+    }
+
+def bench_analytics(loaded, repeat):
+    """The analytics snapshot, each dashboard metric it is built from, and the range queries"""
+    results = {"snapshot": summarize(timed(loaded.snapshot, repeat))}
+
+    matrix = loaded.matrix
+    today = datetime.now().date()
+    t = today.toordinal()
+    analytics = {
+        "calculate_streak": lambda: (matrix.streaks.current(t), matrix.streaks.longest[-1]),
+        "calculate_weekly_performance": lambda: matrix.occurrences(t - 7, t, today=t),
+        "calculate_monthly_performance": lambda: matrix.occurrences(t - 30, t, today=t),
+        "detect_personality": lambda: detect_personality(loaded.habits, matrix),
+        "calculate_daily_completion_trend": lambda: daily_completion_trend(matrix, today),
+    }
+    for name, fn in analytics.items():
+        results[name] = summarize(timed(fn, repeat))
+
+    momentum = timed(lambda: [loaded.momentum(h) for h in loaded.habits], repeat)
+    results["get_habit_momentum.per_habit"] = summarize([s / max(1, len(loaded.habits)) for s in momentum])
+
+    results["completion_rate.30d"] = summarize(timed(lambda: loaded.completion_rate(today - timedelta(days=30), today), repeat))
+    results["series.365d"] = summarize(timed(lambda: loaded.series(today - timedelta(days=364), today).calendar(), repeat))
+
+    # Catch-up after a year away, computed without writing the event
+    results["rollover.365d"] = summarize(timed(
+        lambda: rollover_event(loaded.habits, matrix, t - 365, t - 1), repeat
+    ))
+    return results
+
+def bench_io(backend, mode, repeat):
+    """Load, cold session start and the click write paths of one storage backend"""
+    results = {f"load.{mode}": summarize(timed(lambda: HabitStore.load(backend), repeat))}
+
+    today = datetime.now().date()
+    def init_session_state():
+        # What a session opening the store pays: parse it, then close any day not yet closed
+        fresh = HabitStore.load(backend)
+        roll_over(fresh, backend, today)
+        update_rollups(fresh, backend, today)
+    # The first call closes the generated history's days; later ones find nothing to close
+    init_session_state()
+    results[f"init_session_state.{mode}"] = summarize(timed(init_session_state, repeat))
+
+    events = iter(range(10 ** 9))
+    habit_ids = [h['id'] for h in HabitStore.load(backend).habits]
+    day = get_today()
+    click = lambda: {"op": "complete", "id": habit_ids[next(events) % len(habit_ids)], "day": day, "points": 0}
+    # A click written through, as before write-behind
+    results[f"save_data.{mode}"] = summarize(timed(lambda: backend.append(click()), repeat))
+
+    # What a click handler pays with write-behind on, and the one write a burst of 20 clicks becomes
+    writer = persister.Persister(backend)
+    results[f"persist.enqueue.{mode}"] = summarize(timed(lambda: writer.submit(click()), repeat))
+    writer.close()
+    results[f"persist.batch20.{mode}"] = summarize(timed(lambda: backend.append_many([click() for _ in range(20)]), repeat))
+    return results
+
+def bench_size(workdir, size, repeat):
+    habits, years = SIZES[size]
+    store = generate_store(habits, years, seed=1)
+    data_file = os.path.join(workdir, f"{size}.json")
+    with open(data_file, 'w') as f:
+        json.dump(store, f)
+    file_bytes = os.path.getsize(data_file)
+
+    json_backend = storage.JsonStorage(data_file)
+    results = bench_analytics(HabitStore.load(json_backend), repeat)
+    sqlite_backend = storage.SqliteStorage(os.path.join(workdir, f"{size}.db"))
+    sqlite_backend.save_store(store)
+    for mode, backend in (("json", json_backend), ("sqlite", sqlite_backend)):
+        results.update(bench_io(backend, mode, repeat))
+        backend.close()
+
+    return {
+        "habits": habits,
+        "years": years,
+        "logged_days": sum(len(h['completed_dates']) + len(h['missed_dates']) for h in store['habits']),
+        "file_bytes": file_bytes,
+        "benchmarks": results
+    }
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(previous, current):
+    """Print current/previous median ratios for every benchmark present in both runs"""
+    for size, result in current["sizes"].items():
+        before = previous.get("sizes", {}).get(size)
+        if not before:
+            continue
+        print(f"\n{size}")
+        for name, stats in result["benchmarks"].items():
+            old = before["benchmarks"].get(name)
+            if old and old["median_ms"] > 0:
+                ratio = stats["median_ms"] / old["median_ms"]
+                flag = "  REGRESSION" if ratio > 1.2 else ""
+                print(f"  {name:45s} {old['median_ms']:10.3f} -> {stats['median_ms']:10.3f} ms  x{ratio:.2f}{flag}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark analytics and I/O paths headless")
+    parser.add_argument("--sizes", default="tiny,small,medium", help=f"comma separated, from {', '.join(SIZES)}")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("-o", "--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+    output = os.path.abspath(args.output)
+    previous_path = os.path.abspath(args.compare) if args.compare else None
+
+    workdir = tempfile.mkdtemp(prefix="habit-bench-")
+
+    report = {
+        "created": datetime.now().isoformat(timespec='seconds'),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sizes": {}
+    }
+    for size in args.sizes.split(','):
+        report["sizes"][size] = bench_size(workdir, size.strip(), args.repeat)
+        print(f"{size}: done")
+
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {output}")
+
+    if previous_path:
+        with open(previous_path) as f:
+            compare(json.load(f), report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# ==================== STARTUP BUDGET ====================
+# Cold-start check for a fresh server process: imports app.py headless in a clean
+# interpreter and fails when the median import time exceeds the budget or a module
+# that should load lazily was imported anyway:
+#   python benchmarks/startup_budget.py --budget-ms 1000
+# A module Streamlit imports by itself is reported but not held against the app.
+# habitcore and numpy load with the app: every view's first render reads the matrix.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generate_store import generate_store
+
+# Modules the app must not load at import: nothing on the default (Habits) view needs them
+LAZY_MODULES = ("pandas", "plotly.graph_objects")
+
+PROBE = """
+import json, logging, sys, time
+sys.path.insert(0, {root!r})
+lazy = {lazy!r}
+logging.getLogger("streamlit").setLevel(logging.ERROR)
+start = time.perf_counter()
+import streamlit
+by_streamlit = [m for m in lazy if m in sys.modules]
+import app
+app_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({{
+    "app_ms": app_ms,
+    "loaded": [m for m in lazy if m in sys.modules and m not in by_streamlit],
+    "loaded_by_streamlit": by_streamlit
+}}))
+"""
+
+def probe(workdir):
+    """Import timings from one fresh interpreter"""
+    code = PROBE.format(root=ROOT, lazy=LAZY_MODULES)
+    result = subprocess.run([sys.executable, "-c", code], cwd=workdir, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Check app.py cold-start time against a budget")
+    parser.add_argument("--budget-ms", type=float, default=1000, help="maximum median import time of app.py")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="habit-startup-")
+    with open(os.path.join(workdir, "habits_enforcement.json"), 'w') as f:
+        json.dump(generate_store(habits=3, years=0.1), f)
+
+    probes = [probe(workdir) for _ in range(args.runs)]
+    app_ms = statistics.median(p["app_ms"] for p in probes)
+    print(f"import app  {app_ms:8.1f} ms  (budget {args.budget_ms:.0f} ms)")
+
+    failures = []
+    if app_ms > args.budget_ms:
+        failures.append(f"app.py import took {app_ms:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+    loaded = sorted({m for p in probes for m in p["loaded"]})
+    if loaded:
+        failures.append(f"loaded at startup: {', '.join(loaded)}")
+    preloaded = sorted({m for p in probes for m in p["loaded_by_streamlit"]})
+    if preloaded:
+        print(f"loaded by Streamlit itself: {', '.join(preloaded)}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import os
+from functools import lru_cache
+
+import numpy as np
+import streamlit as st
+
+# ==================== CHARTS ====================
+# Chart specs are memoized on their input series in a bounded LRU shared by every
+# session, so a chart whose numbers did not change is not rebuilt. Plotly figures are
+# cached as their serialized figure dict (to_plotly_json), never as a mutable go.Figure
+# that sessions would share. HABITS_CHARTS=vega draws the bar and pie charts as plain
+# Vega-Lite specs instead of Plotly figures.
+
+CHART_BACKEND = os.environ.get("HABITS_CHARTS", "plotly")
+CHART_CACHE_SIZE = 64
+
+LAYOUT = dict(
+    paper_bgcolor='rgba(0,0,0,0)',
+    plot_bgcolor='rgba(0,0,0,0)',
+    font=dict(color='#e0e0e0')
+)
+
+# Completion % from 0 (all missed) to 100 (all done)
+HEATMAP_SCALE = ((0.0, '#ef4444'), (0.5, '#f59e0b'), (1.0, '#10b981'))
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def bar_figure(labels, values, colors, title, height):
+    # Plotly is imported only once a chart is actually drawn
+    import plotly.graph_objects as go
+
+    fig = go.Figure(data=[go.Bar(x=list(labels), y=list(values), marker=dict(color=colors if isinstance(colors, str) else list(colors)))])
+    fig.update_layout(title=title, height=height, **LAYOUT)
+    return fig.to_plotly_json()
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def pie_figure(labels, values, colors, title, height):
+    import plotly.graph_objects as go
+
+    fig = go.Figure(data=[go.Pie(labels=list(labels), values=list(values), hole=0.3, marker=dict(colors=list(colors)))])
+    fig.update_layout(title=title, height=height, **LAYOUT)
+    return fig.to_plotly_json()
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def bar_spec(labels, values, colors, title, height):
+    colors = [colors] * len(labels) if isinstance(colors, str) else colors
+    return {
+        "title": title,
+        "height": height,
+        "data": {"values": [{"label": l, "value": v, "color": c} for l, v, c in zip(labels, values, colors)]},
+        "mark": "bar",
+        "encoding": {
+            "x": {"field": "label", "type": "nominal", "sort": None, "title": None},
+            "y": {"field": "value", "type": "quantitative", "title": None},
+            "color": {"field": "color", "type": "nominal", "scale": None, "legend": None}
+        }
+    }
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def pie_spec(labels, values, colors, title, height):
+    return {
+        "title": title,
+        "height": height,
+        "data": {"values": [{"label": l, "value": v} for l, v in zip(labels, values)]},
+        "mark": {"type": "arc", "innerRadius": height * 0.1},
+        "encoding": {
+            "theta": {"field": "value", "type": "quantitative"},
+            "color": {"field": "label", "type": "nominal", "sort": None, "scale": {"domain": list(labels), "range": list(colors)}}
+        }
+    }
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def line_figure(labels, values, color, title, height):
+    import plotly.graph_objects as go
+
+    fig = go.Figure(data=[go.Scatter(x=list(labels), y=list(values), mode='lines+markers', line=dict(color=color), connectgaps=False)])
+    fig.update_layout(title=title, height=height, yaxis=dict(range=[0, 100]), **LAYOUT)
+    return fig.to_plotly_json()
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def heatmap_figure(z, columns, rows, title, height):
+    import plotly.graph_objects as go
+
+    fig = go.Figure(data=[go.Heatmap(
+        z=[list(r) for r in z], x=list(columns), y=list(rows),
+        zmin=0, zmax=100, colorscale=HEATMAP_SCALE, xgap=2, ygap=2, hoverongaps=False
+    )])
+    fig.update_layout(title=title, height=height, yaxis=dict(autorange='reversed'), **LAYOUT)
+    return fig.to_plotly_json()
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def line_spec(labels, values, color, title, height):
+    return {
+        "title": title,
+        "height": height,
+        "data": {"values": [{"label": l, "value": v} for l, v in zip(labels, values)]},
+        "mark": {"type": "line", "point": True, "color": color},
+        "encoding": {
+            "x": {"field": "label", "type": "ordinal", "sort": None, "title": None},
+            "y": {"field": "value", "type": "quantitative", "title": None, "scale": {"domain": [0, 100]}}
+        }
+    }
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def heatmap_spec(z, columns, rows, title, height):
+    cells = [
+        {"column": c, "row": r, "value": v}
+        for r, values in zip(rows, z) for c, v in zip(columns, values) if v is not None
+    ]
+    return {
+        "title": title,
+        "height": height,
+        "data": {"values": cells},
+        "mark": "rect",
+        "encoding": {
+            "x": {"field": "column", "type": "ordinal", "sort": list(columns), "title": None},
+            "y": {"field": "row", "type": "ordinal", "sort": list(rows), "title": None},
+            "color": {
+                "field": "value", "type": "quantitative", "title": "%",
+                "scale": {"domain": [s * 100 for s, _ in HEATMAP_SCALE], "range": [c for _, c in HEATMAP_SCALE]}
+            }
+        }
+    }
+
+def chart_values(values):
+    """Array as nested lists rounded to 0.1, NaN as None, so equal series hit the same cache entry"""
+    values = np.round(np.asarray(values, dtype=float), 1)
+    return np.where(np.isnan(values), None, values).tolist()
+
+def bar_chart(labels, values, colors, title, height):
+    """Draw a bar chart; colors is one color or one per bar"""
+    args = (tuple(labels), tuple(values), colors if isinstance(colors, str) else tuple(colors), title, height)
+    if CHART_BACKEND == "vega":
+        st.vega_lite_chart(bar_spec(*args), use_container_width=True)
+    else:
+        st.plotly_chart(bar_figure(*args), use_container_width=True)
+
+def pie_chart(labels, values, colors, title, height):
+    """Draw a donut chart with one color per slice"""
+    args = (tuple(labels), tuple(values), tuple(colors), title, height)
+    if CHART_BACKEND == "vega":
+        st.vega_lite_chart(pie_spec(*args), use_container_width=True)
+    else:
+        st.plotly_chart(pie_figure(*args), use_container_width=True)
+
+def line_chart(labels, values, color, title, height):
+    """Draw a line chart; None values leave a gap"""
+    args = (tuple(labels), tuple(values), color, title, height)
+    if CHART_BACKEND == "vega":
+        st.vega_lite_chart(line_spec(*args), use_container_width=True)
+    else:
+        st.plotly_chart(line_figure(*args), use_container_width=True)
+
+def heatmap_chart(z, columns, rows, title, height):
+    """Draw a 0-100 heatmap; z is one sequence of values per row, None for empty cells"""
+    args = (tuple(tuple(r) for r in z), tuple(columns), tuple(rows), title, height)
+    if CHART_BACKEND == "vega":
+        st.vega_lite_chart(heatmap_spec(*args), use_container_width=True)
+    else:
+        st.plotly_chart(heatmap_figure(*args), use_container_width=True)
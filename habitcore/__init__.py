@@ -0,0 +1,24 @@
+"""Habit data model and analytics, importable without Streamlit
+
+    from habitcore import HabitStore
+    from storage import get_storage
+    
+    store = HabitStore.load(get_storage('json', 'habits_enforcement.json'))
+    print(store.snapshot().weekly_performance)
+"""
+
+from .analytics import (
+    AnalyticsSnapshot, completion_rate, daily_completion_trend, detect_personality, filter_habits, habit_ewma, habit_momentum,
+    habit_rates, verdict_attempts
+)
+from .matrix import DONE, DUE_SCALE, MISSED, DueIndex, HabitMatrix, RecentOutcomes, StreakTracker, WindowIndex, difficulty_code, run_stats
+from .normalize import day_ordinal, normalize_habits
+from .rollover import roll_over, rollover_event
+from .rollup import ROLLUP_FIELDS, recent_rollups, rollup_days, update_rollups, weekday_totals
+from .rules import (
+    DIFFICULTIES, WEEKDAY_NAMES, build_verdict, classify_personality, completion_pct, get_month_start, get_today,
+    get_week_start, level_for_points, personality_for_spread, verdict_for_counts
+)
+from .schedule import describe_schedule, parse_schedule
+from .series import BUCKETS, CompletionSeries, pick_bucket
+from .store import HabitStore
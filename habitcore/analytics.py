@@ -0,0 +1,205 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from .matrix import DONE, DUE_SCALE, MISSED
+from .rules import DIFFICULTIES, WEEKDAY_NAMES, build_verdict, classify_personality, completion_pct, level_for_points
+
+# ==================== ANALYTICS ====================
+# Everything here reads an explicit HabitMatrix; nothing touches Streamlit. Rates are
+# met over expected occurrences from the habits' schedules (see DueIndex), so an
+# unlogged due day counts against them; today only expects what is already done or
+# logged missed.
+
+def habit_rates(matrix, today_ordinal):
+    """(met, expected) occurrences per habit from its start through today"""
+    matrix = matrix.covering(today_ordinal)
+    due = matrix.due
+    t = min(max(today_ordinal - due.first_day, 0), due.width - 1)
+    met = due.credited[:, t + 1]
+    return met, due.due[:, t] / DUE_SCALE + (met - due.credited[:, t]) + (matrix.status[:, t] == MISSED)
+
+def verdict_attempts(matrix, ordinal, today_ordinal=None):
+    """Outcome of every occurrence in the 3 days ending on a day: each completion that met one
+    is True, each occurrence that closed unmet is False. On the open day only a logged miss is False.
+    """
+    monday = ordinal - 2 - (ordinal - 3) % 7
+    # Days before the grid were never due; days after it are read as nothing logged
+    lo = max(monday, matrix.first_day)
+    if ordinal < lo:
+        return []
+    status = matrix.window(lo, ordinal)
+    required, met = matrix.due.closing(status, lo)
+    credited = matrix.due.credit(status, lo)
+    days = lo + np.arange(status.shape[1])
+    shortfall = np.where(days >= (today_ordinal or ordinal + 1), status == MISSED, required - met)
+    cols = np.flatnonzero(days >= ordinal - 2)[::-1]
+    # Newest day first for each habit, as the verdict reads them
+    trues = credited[:, cols].astype(np.int64).ravel()
+    falses = shortfall[:, cols].ravel()
+    counts = np.column_stack([trues, falses]).ravel()
+    return np.repeat(np.tile([True, False], trues.size), counts).tolist()
+
+def detect_personality(habits, matrix):
+    """(personality, emoji) from all-time totals, hard-habit results and per-habit attempt rates"""
+    windows = matrix.windows
+    done_per_habit = windows.done[:, -1]
+    attempts_per_habit = windows.logged[:, -1]
+    total_completed = int(windows.total_done[-1])
+    hard = DIFFICULTIES.index('Hard')
+    active = attempts_per_habit > 0
+    return classify_personality(
+        len(habits), total_completed, int(windows.total_logged[-1]) - total_completed,
+        int(windows.difficulty_done[hard, -1]), int(windows.difficulty_logged[hard, -1]),
+        attempts_per_habit[active], done_per_habit[active] / attempts_per_habit[active]
+    )
+
+def daily_completion_trend(matrix, today):
+    """Completion % by weekday name for the 7 days ending today; days on which no occurrence closed are left out rather than shown as 0%"""
+    today_ordinal = today.toordinal()
+    trend = {}
+    day_met, day_expected = matrix.daily_occurrences(today_ordinal - 6, today_ordinal, today=today_ordinal)
+    for i in range(7):
+        if day_expected[i] > 0:
+            day = today - timedelta(days=6 - i)
+            trend[day.strftime('%a')] = completion_pct(int(day_met[i]), int(day_expected[i]))
+    return trend
+
+def weekday_results(windows, totals=None):
+    """Completions and misses per weekday: rolled-up totals (see rollup.weekday_totals) plus the grid days after them"""
+    last, done, missed = totals or (windows.first_day - 1, np.zeros(7, dtype=np.int64), np.zeros(7, dtype=np.int64))
+    lo = min(max(last + 1 - windows.first_day, 0), windows.width)
+    done_per_day, logged_per_day = windows.per_day(lo)
+    weekdays = (windows.first_day + lo + np.arange(windows.width - lo) - 1) % 7
+    return (done + np.bincount(weekdays, weights=done_per_day, minlength=7),
+            missed + np.bincount(weekdays, weights=logged_per_day - done_per_day, minlength=7))
+
+class AnalyticsSnapshot:
+    """Every dashboard metric, read from the prefix-sum window index and a few matrix columns"""
+    
+    def __init__(self, habits, matrix, total_points, today=None, weekday_totals=None):
+        today = today or datetime.now().date()
+        self.today = today
+        today_ordinal = today.toordinal()
+        # The matrix may be shared between sessions, so a day it does not cover yet is read from a widened copy
+        matrix = matrix.covering(today_ordinal)
+        t = today_ordinal - matrix.first_day
+        windows = matrix.windows
+        due = matrix.due
+        
+        status = matrix.status
+        
+        total_completed = int(windows.total_done[-1])
+        total_missed = int(windows.total_logged[-1]) - total_completed
+        
+        self.habit_count = len(habits)
+        self.total_completed = total_completed
+        self.total_missed = total_missed
+        self.total_attempts = total_completed + total_missed
+        
+        self.overall_rate = completion_pct(*matrix.occurrences(due.first_day, today_ordinal, today=today_ordinal)) / 100
+        
+        self.today_completed = int((status[:, t] == DONE).sum())
+        self.today_total = int((status[:, t] != 0).sum())
+        streaks = matrix.streaks.current(today.toordinal())
+        self.habit_streaks = streaks[:-1]
+        self.current_streak = int(streaks[-1])
+        self.longest_streak = int(matrix.streaks.longest[-1])
+        self.fragile_habits = [habits[i]['name'] for i in np.flatnonzero((self.habit_streaks > 0) & (self.habit_streaks < 3))]
+        
+        weekly_met, weekly_expected = matrix.occurrences(today_ordinal - 7, today_ordinal, today=today_ordinal)
+        self.weekly_performance = completion_pct(weekly_met, weekly_expected)
+        self.monthly_performance = completion_pct(*matrix.occurrences(today_ordinal - 30, today_ordinal, today=today_ordinal))
+        
+        # A week that expected nothing yet (a new user) is not a failing one
+        self.intervention = weekly_expected > 0 and self.weekly_performance < 40
+        
+        self.verdict = build_verdict(verdict_attempts(matrix, today_ordinal, today_ordinal), self.current_streak)
+        
+        self.personality = detect_personality(habits, matrix)
+        
+        # A habit on a live 3+ day streak is already recovering, so it is not the one to fix first
+        self.focus_habit = None
+        self.focus_rate = 0
+        met_per_habit, expected_per_habit = habit_rates(matrix, today_ordinal)
+        self.habit_met, self.habit_expected = met_per_habit, expected_per_habit
+        candidates = (expected_per_habit > 0) & (self.habit_streaks < 3)
+        if candidates.any():
+            miss_rates = np.where(candidates, 1 - met_per_habit / np.maximum(expected_per_habit, 1e-9), -1.0)
+            worst = int(np.argmax(miss_rates))
+            if miss_rates[worst] > 0.4:
+                self.focus_habit = habits[worst]
+                self.focus_rate = completion_pct(int(met_per_habit[worst]), float(expected_per_habit[worst]))
+        
+        day_completions, day_failures = weekday_results(windows, weekday_totals)
+        self.best_day = WEEKDAY_NAMES[int(np.argmax(day_completions))] if day_completions.any() else None
+        self.worst_day = WEEKDAY_NAMES[int(np.argmax(day_failures))] if day_failures.any() else None
+        
+        self.daily_completion_trend = daily_completion_trend(matrix, today)
+        
+        self.habit_breakdown = {}
+        self.difficulty_rates = {}
+        for code, difficulty in enumerate(DIFFICULTIES):
+            self.habit_breakdown[difficulty] = int((matrix.difficulty == code).sum())
+            self.difficulty_rates[difficulty] = completion_pct(*matrix.occurrences(
+                due.first_day, today_ordinal, difficulty=difficulty, today=today_ordinal
+            ))
+        
+        self.level = level_for_points(total_points)
+        
+        if habits:
+            consistency = (self.weekly_performance * 0.6) + (self.monthly_performance * 0.3) + min(self.current_streak * 5, 20)
+            self.consistency_score = max(0, min(100, consistency))
+        else:
+            self.consistency_score = 0
+
+
+def completion_rate(matrix, start, end, habit_ids=None, difficulty=None, today=None):
+    """Completion % of expected occurrences between two dates (inclusive), optionally for some habit ids and/or one difficulty"""
+    start = date.fromisoformat(start) if isinstance(start, str) else start
+    end = date.fromisoformat(end) if isinstance(end, str) else end
+    today = today or datetime.now().date()
+    matrix = matrix.covering(today.toordinal())
+    rows = None if habit_ids is None else [matrix.rows[h] for h in habit_ids if h in matrix.rows]
+    return completion_pct(*matrix.occurrences(start.toordinal(), end.toordinal(), rows, difficulty, today.toordinal()))
+
+def habit_momentum(matrix, habit, window=5):
+    """Calculate if habit is rising, stable, or falling"""
+    recent_attempts = matrix.recent.last(matrix.row_of(habit), window)[::-1] == DONE
+    if recent_attempts.size < 3:
+        return "📊 New"
+    
+    recent_rate = recent_attempts[-3:].sum() / 3
+    older_rate = recent_attempts[:3].sum() / 3
+    
+    if recent_rate > older_rate + 0.2:
+        return "📈 Rising"
+    elif recent_rate < older_rate - 0.2:
+        return "📉 Falling"
+    
+    return "➡️ Stable"
+
+def habit_ewma(matrix, habit, alpha=0.3, window=None):
+    """Recency-weighted done rate (0-1) over the habit's latest outcomes, or None if nothing logged"""
+    return matrix.recent.ewma(matrix.row_of(habit), alpha, window)
+
+def filter_habits(habits, matrix, query="", difficulty=None, htype=None, status=None):
+    """Indices of habits matching a name search and difficulty/type/status filters"""
+    keep = np.ones(len(habits), dtype=bool)
+    
+    if difficulty:
+        keep &= matrix.difficulty == DIFFICULTIES.index(difficulty)
+    if status == "Done today" or status == "Pending":
+        today = datetime.now().date().toordinal()
+        today_status = matrix.window(today, today)[:, 0]
+        keep &= (today_status == DONE) if status == "Done today" else (today_status == 0)
+    elif status == "Failing":
+        # Same bar as the focus habit: more than 40% of expected occurrences missed
+        met, expected = habit_rates(matrix, datetime.now().date().toordinal())
+        keep &= (expected > 0) & ((expected - met) > 0.4 * expected)
+    
+    rows = np.flatnonzero(keep)
+    query = query.strip().lower()
+    if query or htype:
+        rows = [i for i in rows if query in habits[i]['name'].lower() and (not htype or habits[i].get('type') == htype)]
+    return rows
@@ -0,0 +1,654 @@
+from datetime import datetime
+
+import numpy as np
+
+from .rules import DIFFICULTIES
+from .schedule import created_ordinals, parse_schedule
+
+# ==================== STATUS MATRIX ====================
+
+DONE = 1
+MISSED = -1
+# Outcomes kept per habit for momentum-style signals
+RECENT_CAPACITY = 32
+# DueIndex counts expected occurrences in sevenths, so N-per-week quotas stay whole numbers
+DUE_SCALE = 7
+
+class HabitMatrix:
+    """Habits × days grid of int8 statuses: 1 done, -1 missed, 0 nothing logged"""
+    
+    def __init__(self, habits, days, today=None):
+        today_ordinal = (today or datetime.now().date()).toordinal()
+        
+        done_counts = [len(done) for done, _ in days]
+        missed_counts = [len(missed) for _, missed in days]
+        done_cols = np.concatenate([done for done, _ in days] + [np.empty(0, dtype=np.int32)])
+        missed_cols = np.concatenate([missed for _, missed in days] + [np.empty(0, dtype=np.int32)])
+        
+        logged = [a for a in (done_cols, missed_cols) if a.size]
+        self.first_day = min([today_ordinal] + [int(a.min()) for a in logged])
+        last_day = max([today_ordinal] + [int(a.max()) for a in logged])
+        
+        self.status = np.zeros((len(habits), last_day - self.first_day + 1), dtype=np.int8)
+        self.status[np.repeat(np.arange(len(habits)), missed_counts), missed_cols - self.first_day] = MISSED
+        self.status[np.repeat(np.arange(len(habits)), done_counts), done_cols - self.first_day] = DONE
+        
+        self.difficulty = np.array([difficulty_code(h) for h in habits], dtype=np.int8)
+        self.rows = {h.get('id'): row for row, h in enumerate(habits)}
+        self.due = DueIndex(habits, self)
+        self.streaks = StreakTracker(self)
+        self.windows = WindowIndex(self)
+        self.recent = RecentOutcomes(self)
+    
+    @property
+    def last_day(self):
+        return self.first_day + self.status.shape[1] - 1
+    
+    def covers(self, ordinal):
+        return self.first_day <= ordinal <= self.last_day
+    
+    def ensure_day(self, ordinal):
+        """Widen the grid so that it covers the given day ordinal"""
+        if ordinal < self.first_day:
+            self.status = np.pad(self.status, ((0, 0), (self.first_day - ordinal, 0)))
+            self.first_day = ordinal
+        elif ordinal > self.last_day:
+            self.status = np.pad(self.status, ((0, 0), (0, ordinal - self.last_day)))
+        else:
+            return
+        # New days can be due, so runs may now end on them
+        self.due.rebuild(self)
+        self.streaks.recompute(self)
+        self.windows.cover(ordinal)
+    
+    def covering(self, ordinal):
+        """This matrix if it covers the day, else a widened copy; read paths never change a matrix"""
+        if self.covers(ordinal):
+            return self
+        clone = self.copy()
+        clone.ensure_day(ordinal)
+        return clone
+    
+    def column(self, ordinal):
+        """Column of a day, widening the grid first; for write paths only"""
+        self.ensure_day(ordinal)
+        return ordinal - self.first_day
+    
+    def window(self, start, end):
+        """Status columns for the ordinal days [start, end], with days outside the grid all zero"""
+        status = np.zeros((self.status.shape[0], end - start + 1), dtype=np.int8)
+        lo, hi = max(start, self.first_day), min(end, self.last_day)
+        if lo <= hi:
+            status[:, lo - start:hi - start + 1] = self.status[:, lo - self.first_day:hi - self.first_day + 1]
+        return status
+    
+    def row_of(self, habit):
+        return self.rows[habit.get('id')]
+    
+    def set_status(self, habit, day, value):
+        """Record a done/missed status for a habit on a date"""
+        row = self.row_of(habit)
+        col = self.column(day.toordinal())
+        old = self.status[row, col]
+        self.status[row, col] = value
+        self.due.update(self, row, day.toordinal())
+        self.streaks.update(self, row, day.toordinal(), old == DONE, value == DONE)
+        self.windows.update(row, day.toordinal(), old, value)
+        self.recent.update(self, row, day.toordinal(), old, value)
+    
+    def copy(self):
+        clone = HabitMatrix.__new__(HabitMatrix)
+        clone.first_day = self.first_day
+        clone.status = self.status.copy()
+        clone.difficulty = self.difficulty.copy()
+        clone.rows = dict(self.rows)
+        clone.due = self.due.copy()
+        clone.streaks = self.streaks.copy()
+        clone.windows = self.windows.copy()
+        clone.recent = self.recent.copy()
+        return clone
+    
+    def occurrences(self, start, end, rows=None, difficulty=None, today=None):
+        """(met, expected) occurrences between two day ordinals, optionally for habit rows and/or a difficulty
+        
+        Days from `today` on are still open: they expect what has been met or logged missed so far.
+        """
+        if today is None:
+            return self.due.counts(start, end, rows, difficulty)
+        met, _ = self.due.counts(start, end, rows, difficulty)
+        _, closed = self.due.counts(start, min(end, today - 1), rows, difficulty)
+        open_met, _ = self.due.counts(max(start, today), end, rows, difficulty)
+        open_done, open_logged = self.windows.counts(max(start, today), end, rows, difficulty)
+        return met, closed + open_met + open_logged - open_done
+    
+    def daily_occurrences(self, start, end, rows=None, today=None):
+        """(met, expected) occurrences for each day between two day ordinals, each counted on the day it closes
+        
+        occurrences() spreads an N-per-week habit's expectations over its week, which only
+        suits ranges of a week or more; here its occurrences all fall on the Sunday the week
+        closes. Days from `today` on are still open, as in occurrences().
+        """
+        met = np.zeros(end - start + 1, dtype=np.int64)
+        expected = np.zeros(end - start + 1, dtype=np.int64)
+        # Week totals restart on Mondays, so the columns start on the Monday before `start`
+        lo = max(start - (start - 1) % 7, self.first_day)
+        if lo > end:
+            return met, expected
+        rows = slice(None) if rows is None else np.asarray(rows, dtype=np.intp)
+        status = self.window(lo, end)[rows]
+        required, closed_met = self.due.closing(status, lo, rows)
+        credited = self.due.credit(status, lo, rows)
+        is_open = lo + np.arange(status.shape[1]) >= (end + 1 if today is None else today)
+        day_met = np.where(is_open, credited, closed_met).sum(axis=0)
+        day_expected = np.where(is_open, credited + (status == MISSED), required).sum(axis=0)
+        skip = max(start - lo, 0)
+        met[max(lo - start, 0):] = day_met[skip:]
+        expected[max(lo - start, 0):] = day_expected[skip:]
+        return met, expected
+    
+    def add_habit(self, habit, today=None):
+        today_ordinal = (today or datetime.now().date()).toordinal()
+        self.status = np.vstack([self.status, np.zeros((1, self.status.shape[1]), dtype=np.int8)])
+        self.difficulty = np.append(self.difficulty, np.int8(difficulty_code(habit)))
+        self.rows[habit.get('id')] = self.status.shape[0] - 1
+        self.due.add_row(habit, self, today_ordinal)
+        self.streaks.add_row(self)
+        self.windows.add_row(difficulty_code(habit))
+        self.recent.add_row()
+    
+    def nbytes(self):
+        """Bytes held by the status matrix and the indexes kept over it"""
+        parts = (self, self.due, self.streaks, self.windows, self.recent)
+        arrays = sum(value.nbytes for part in parts for value in vars(part).values() if isinstance(value, np.ndarray))
+        # rows is a dict of small ints, about 100 bytes an entry
+        return arrays + 100 * len(self.rows)
+
+def run_stats(done, first_day, breaks=None):
+    """Latest run end (day ordinal), latest run length and longest run for each row of a boolean day grid
+    
+    A run ends on a `breaks` day (by default any day not done); days that are neither
+    done nor breaks, such as unscheduled days, leave a run going without adding to it.
+    """
+    n_rows, n_days = done.shape
+    if n_rows == 0 or n_days == 0:
+        zeros = np.zeros(n_rows, dtype=np.int64)
+        return zeros, zeros.copy(), zeros.copy()
+    
+    count = np.cumsum(done, axis=1)
+    last_gap = np.maximum.accumulate(np.where(~done if breaks is None else breaks, count, 0), axis=1)
+    run = np.where(done, count - last_gap, 0)
+    
+    any_done = done.any(axis=1)
+    last = n_days - 1 - np.argmax(done[:, ::-1], axis=1)
+    run_len = np.where(any_done, run[np.arange(n_rows), last], 0)
+    run_end = np.where(any_done, first_day + last, 0)
+    return run_end.astype(np.int64), run_len.astype(np.int64), run.max(axis=1).astype(np.int64)
+
+def first_break_after(breaks, run_end, first_day):
+    """Ordinal of each row's first break after its run end, or the largest int64 if none"""
+    after = breaks & (np.arange(breaks.shape[1]) > (run_end - first_day)[:, np.newaxis])
+    return np.where(after.any(axis=1), after.argmax(axis=1) + first_day, np.iinfo(np.int64).max)
+
+class StreakTracker:
+    """Latest and longest run of done days per habit and across all habits, updated per click
+    
+    Row -1 of the arrays is the global run: a day extends it if any habit was done, and
+    ends it if nothing was done while some habit broke its schedule (see DueIndex.breaks).
+    A click re-derives the clicked habit's breaks from the Monday of its week on. Starting
+    or extending the latest run is then O(1), as is trimming one that is not the longest;
+    a row is recomputed only when a change rewrites history behind its latest run or may
+    lower its longest.
+    """
+    
+    def __init__(self, matrix):
+        self.recompute(matrix)
+    
+    def recompute(self, matrix):
+        done = matrix.status == DONE
+        self.first_day = matrix.first_day
+        self.day_counts = done.sum(axis=0, dtype=np.int32)
+        self.breaks = matrix.due.breaks(matrix.status, matrix.first_day)
+        self.break_counts = self.breaks.sum(axis=0, dtype=np.int32)
+        grid = np.vstack([done, self.global_done(0)[None, :]])
+        breaks = np.vstack([self.breaks, self.global_breaks(0)[None, :]])
+        self.run_end, self.run_len, self.longest = run_stats(grid, matrix.first_day, breaks)
+        self.next_break = first_break_after(breaks, self.run_end, matrix.first_day)
+    
+    def global_done(self, lo, hi=None):
+        return self.day_counts[lo:hi] > 0
+    
+    def global_breaks(self, lo, hi=None):
+        """Days in columns [lo, hi) on which nothing was done while some habit broke its schedule"""
+        return (self.day_counts[lo:hi] == 0) & (self.break_counts[lo:hi] > 0)
+    
+    def recompute_row(self, matrix, row):
+        if row == -1:
+            mask, breaks = self.global_done(0), self.global_breaks(0)
+        else:
+            mask, breaks = matrix.status[row] == DONE, self.breaks[row]
+        run_end, run_len, longest = run_stats(mask[None, :], matrix.first_day, breaks[None, :])
+        self.run_end[row], self.run_len[row], self.longest[row] = run_end[0], run_len[0], longest[0]
+        self.next_break[row] = first_break_after(breaks[None, :], run_end, matrix.first_day)[0]
+    
+    def copy(self):
+        clone = StreakTracker.__new__(StreakTracker)
+        clone.__dict__ = {k: v.copy() if isinstance(v, np.ndarray) else v for k, v in self.__dict__.items()}
+        return clone
+    
+    def add_row(self, matrix):
+        """Make room for a newly added habit, keeping the global row last"""
+        if matrix.first_day != self.first_day or matrix.status.shape[1] != self.breaks.shape[1]:
+            self.recompute(matrix)
+            return
+        row = matrix.status.shape[0] - 1
+        breaks = matrix.due.breaks(matrix.status[row:], matrix.first_day, [row])[0]
+        self.breaks = np.vstack([self.breaks, breaks[None, :]])
+        self.break_counts += breaks
+        for name in ('run_end', 'run_len', 'longest', 'next_break'):
+            setattr(self, name, np.insert(getattr(self, name), row, 0))
+        self.recompute_row(matrix, row)
+        self.recompute_row(matrix, -1)
+    
+    def update(self, matrix, row, ordinal, was_done, now_done):
+        """Apply one status change on a day, touching only the affected habit and the global run"""
+        if matrix.first_day != self.first_day or matrix.status.shape[1] != self.breaks.shape[1]:
+            self.recompute(matrix)
+            return
+        col = ordinal - self.first_day
+        # Breaks only move from the changed day on: N-per-week quotas close on the week's
+        # Sunday, and logging before a habit's start moves the start back to that day
+        lo = max(col - (ordinal - 1) % 7, 0)
+        breaks = matrix.due.breaks(matrix.status[row:row + 1, lo:], self.first_day + lo, [row])[0]
+        changed = np.flatnonzero(breaks != self.breaks[row, lo:])
+        if was_done == now_done and not changed.size:
+            return
+        
+        global_before = self.global_breaks(lo)
+        any_before = self.day_counts[col] > 0
+        self.day_counts[col] += int(now_done) - int(was_done)
+        self.break_counts[lo:] += breaks.astype(np.int32) - self.breaks[row, lo:]
+        self.breaks[row, lo:] = breaks
+        global_changed = np.flatnonzero(self.global_breaks(lo) != global_before)
+        
+        habit_done = lambda a, b=None: matrix.status[row, a:b] == DONE
+        habit_breaks = lambda a, b=None: self.breaks[row, a:b]
+        if not self.advance(row, col, was_done, now_done, lo + changed[0] if changed.size else None, habit_done, habit_breaks):
+            self.recompute_row(matrix, row)
+        first_global = lo + global_changed[0] if global_changed.size else None
+        if not self.advance(-1, col, any_before, self.day_counts[col] > 0, first_global, self.global_done, self.global_breaks):
+            self.recompute_row(matrix, -1)
+    
+    def advance(self, row, col, was_done, now_done, changed, done, breaks):
+        """Move one row's latest run past a change on column col, in O(1) where the change allows
+        
+        changed is the first column whose break flag changed (None if none); done(lo, hi)
+        and breaks(lo, hi) read the row's updated columns. Returns False when the row needs
+        recompute_row instead.
+        """
+        end = self.run_end[row] - self.first_day
+        if changed is not None and changed < col:
+            return False
+        if now_done and not was_done and col > end:
+            # Starts or extends the latest run: it carries on unless something broke it since its end
+            run = self.run_len[row] + 1 if self.next_break[row] >= self.first_day + col else 1
+            self.run_len[row] = 0 if breaks(col, col + 1)[0] else run
+            self.run_end[row] = self.first_day + col
+            self.longest[row] = max(self.longest[row], self.run_len[row])
+            self.next_break[row] = self.first_break(breaks, col + 1)
+            return True
+        if was_done and not now_done and col == end and 1 < self.run_len[row] < self.longest[row]:
+            # Trims the latest run back to its previous done day; the longest run lies elsewhere
+            prev = self.last_done(done, col)
+            self.run_len[row] -= 1
+            self.run_end[row] = self.first_day + prev
+            self.next_break[row] = self.first_break(breaks, prev + 1)
+            return True
+        if was_done == now_done and (changed is None or changed > end):
+            # Runs are untouched; only the break that ends the latest one may have moved
+            if changed is not None and changed <= self.next_break[row] - self.first_day:
+                self.next_break[row] = self.first_break(breaks, max(end + 1, 0))
+            return True
+        return False
+    
+    def first_break(self, breaks, lo):
+        """Ordinal of the first break from column lo on, or the largest int64 if none"""
+        hits = np.flatnonzero(breaks(lo))
+        return self.first_day + lo + hits[0] if hits.size else np.iinfo(np.int64).max
+    
+    def last_done(self, done, col):
+        """Column of the latest done day before col, searched backwards a month at a time"""
+        hi = col
+        while True:
+            lo = max(hi - 32, 0)
+            hits = np.flatnonzero(done(lo, hi))
+            if hits.size:
+                return lo + hits[-1]
+            hi = lo
+    
+    def current(self, today_ordinal):
+        """Current streak of every habit followed by the global one: the latest run if nothing broke it before today"""
+        alive = (self.run_end <= today_ordinal) & (self.next_break >= today_ordinal)
+        return np.where(alive, self.run_len, 0)
+
+class WindowIndex:
+    """Prefix sums of done and logged days per habit, per difficulty and overall
+    
+    Column j of each prefix array holds the count over the first j days from first_day,
+    so the total over any [start, end] range is two lookups.
+    """
+    
+    def __init__(self, matrix):
+        self.first_day = matrix.first_day
+        self.difficulty = matrix.difficulty.copy()
+        
+        def prefix(mask):
+            sums = np.zeros((mask.shape[0], mask.shape[1] + 1), dtype=np.int32)
+            np.cumsum(mask, axis=1, out=sums[:, 1:])
+            return sums
+        
+        self.done = prefix(matrix.status == DONE)
+        self.logged = prefix(matrix.status != 0)
+        self.total_done = self.done.sum(axis=0)
+        self.total_logged = self.logged.sum(axis=0)
+        self.difficulty_done = np.stack([self.done[self.difficulty == code].sum(axis=0) for code in range(len(DIFFICULTIES))])
+        self.difficulty_logged = np.stack([self.logged[self.difficulty == code].sum(axis=0) for code in range(len(DIFFICULTIES))])
+    
+    @property
+    def width(self):
+        return self.done.shape[1] - 1
+    
+    def copy(self):
+        clone = WindowIndex.__new__(WindowIndex)
+        clone.__dict__ = {k: v.copy() if isinstance(v, np.ndarray) else v for k, v in self.__dict__.items()}
+        return clone
+    
+    def bounds(self, start, end):
+        """Prefix columns for an inclusive range of day ordinals, clipped to the indexed days"""
+        lo = min(max(start - self.first_day, 0), self.width)
+        hi = min(max(end - self.first_day + 1, lo), self.width)
+        return lo, hi
+    
+    def counts(self, start, end, rows=None, difficulty=None):
+        """(done, logged) between two day ordinals, optionally restricted to habit rows and/or a difficulty"""
+        lo, hi = self.bounds(start, end)
+        if rows is None and difficulty is None:
+            return int(self.total_done[hi] - self.total_done[lo]), int(self.total_logged[hi] - self.total_logged[lo])
+        if rows is None:
+            code = DIFFICULTIES.index(difficulty)
+            return (int(self.difficulty_done[code, hi] - self.difficulty_done[code, lo]),
+                    int(self.difficulty_logged[code, hi] - self.difficulty_logged[code, lo]))
+        
+        rows = np.asarray(rows, dtype=np.intp)
+        if difficulty is not None:
+            rows = rows[self.difficulty[rows] == DIFFICULTIES.index(difficulty)]
+        return (int((self.done[rows, hi] - self.done[rows, lo]).sum()),
+                int((self.logged[rows, hi] - self.logged[rows, lo]).sum()))
+    
+    def per_day(self, lo=0):
+        """Done and logged counts for each indexed day from column lo, across all habits"""
+        return np.diff(self.total_done[lo:]), np.diff(self.total_logged[lo:])
+    
+    def add_row(self, difficulty):
+        self.done = np.vstack([self.done, np.zeros((1, self.width + 1), dtype=np.int32)])
+        self.logged = np.vstack([self.logged, np.zeros((1, self.width + 1), dtype=np.int32)])
+        self.difficulty = np.append(self.difficulty, np.int8(difficulty))
+    
+    def cover(self, ordinal):
+        """Extend the prefix arrays to a day the matrix has grown to include"""
+        if ordinal < self.first_day:
+            pad = self.first_day - ordinal
+            for name in ('done', 'logged', 'total_done', 'total_logged', 'difficulty_done', 'difficulty_logged'):
+                arr = getattr(self, name)
+                setattr(self, name, np.pad(arr, [(0, 0)] * (arr.ndim - 1) + [(pad, 0)]))
+            self.first_day = ordinal
+        elif ordinal > self.first_day + self.width - 1:
+            pad = ordinal - (self.first_day + self.width - 1)
+            for name in ('done', 'logged', 'total_done', 'total_logged', 'difficulty_done', 'difficulty_logged'):
+                arr = getattr(self, name)
+                setattr(self, name, np.pad(arr, [(0, 0)] * (arr.ndim - 1) + [(0, pad)], mode='edge'))
+    
+    def update(self, row, ordinal, old, new):
+        """Shift the prefix sums after one habit-day status change"""
+        done_delta = int(new == DONE) - int(old == DONE)
+        logged_delta = int(new != 0) - int(old != 0)
+        if not done_delta and not logged_delta:
+            return
+        self.cover(ordinal)
+        after = ordinal - self.first_day + 1
+        self.done[row, after:] += done_delta
+        self.logged[row, after:] += logged_delta
+        self.total_done[after:] += done_delta
+        self.total_logged[after:] += logged_delta
+        code = self.difficulty[row]
+        if code >= 0:
+            self.difficulty_done[code, after:] += done_delta
+            self.difficulty_logged[code, after:] += logged_delta
+
+class DueIndex:
+    """Prefix sums of expected occurrences and of the completions that meet them, per habit and overall
+    
+    A weekday schedule expects one occurrence on each scheduled day from the habit's start;
+    an N-per-week schedule expects N/7 a day, and only its first N completions of each
+    Monday-to-Sunday week count. Expected occurrences are kept as int32 multiples of
+    1/DUE_SCALE. As with WindowIndex, any range is two lookups.
+    """
+    
+    def __init__(self, habits, matrix):
+        schedules = [parse_schedule(h) for h in habits]
+        self.weekdays = np.array([weekdays for weekdays, _ in schedules], dtype=bool).reshape(len(habits), 7)
+        self.per_week = np.array([per_week for _, per_week in schedules], dtype=np.int64)
+        self.created = created_ordinals(habits, matrix.status, matrix.first_day)
+        self.difficulty = matrix.difficulty.copy()
+        self.rebuild(matrix)
+    
+    def rebuild(self, matrix):
+        """Recompute every prefix sum from the matrix, after the days it covers changed"""
+        self.first_day = matrix.first_day
+        ordinals = matrix.first_day + np.arange(matrix.status.shape[1])
+        self.due = np.zeros((len(self.per_week), ordinals.size + 1), dtype=np.int32)
+        np.cumsum(self.expected(ordinals), axis=1, out=self.due[:, 1:])
+        self.credited = np.zeros((len(self.per_week), ordinals.size + 1), dtype=np.int32)
+        np.cumsum(self.credit(matrix.status, matrix.first_day), axis=1, out=self.credited[:, 1:])
+        self.total_due = self.due.sum(axis=0, dtype=np.int64)
+        self.total_credited = self.credited.sum(axis=0, dtype=np.int64)
+    
+    @property
+    def width(self):
+        return self.due.shape[1] - 1
+    
+    def copy(self):
+        clone = DueIndex.__new__(DueIndex)
+        clone.__dict__ = {k: v.copy() if isinstance(v, np.ndarray) else v for k, v in self.__dict__.items()}
+        return clone
+    
+    def add_row(self, habit, matrix, today_ordinal):
+        """Index a habit just added as the matrix's last row; one not yet started is due from `today_ordinal`"""
+        weekdays, per_week = parse_schedule(habit)
+        self.weekdays = np.vstack([self.weekdays, np.array(weekdays, dtype=bool)])
+        self.per_week = np.append(self.per_week, per_week)
+        created = created_ordinals([habit], matrix.status[-1:], matrix.first_day)
+        self.created = np.append(self.created, min(created[0], today_ordinal))
+        self.difficulty = np.append(self.difficulty, np.int8(difficulty_code(habit)))
+        if matrix.first_day != self.first_day or matrix.status.shape[1] != self.width:
+            self.rebuild(matrix)
+            return
+        # Only the new row's prefix sums are new
+        self.due = np.vstack([self.due, np.zeros((1, self.width + 1), dtype=np.int32)])
+        self.credited = np.vstack([self.credited, np.zeros((1, self.width + 1), dtype=np.int32)])
+        self.rebuild_row(matrix, len(self.per_week) - 1)
+    
+    def rebuild_row(self, matrix, row):
+        """Recompute one habit's prefix sums and their share of the totals"""
+        ordinals = self.first_day + np.arange(self.width)
+        due = np.zeros(self.width + 1, dtype=np.int32)
+        np.cumsum(self.expected(ordinals, [row])[0], out=due[1:])
+        credited = np.zeros(self.width + 1, dtype=np.int32)
+        np.cumsum(self.credit(matrix.status[row:row + 1], self.first_day, [row])[0], out=credited[1:])
+        self.total_due += due - self.due[row]
+        self.total_credited += credited - self.credited[row]
+        self.due[row] = due
+        self.credited[row] = credited
+    
+    def expected(self, ordinals, rows=slice(None)):
+        """Sevenths of an occurrence (see DUE_SCALE) each habit is expected to complete on each day"""
+        weekday = (ordinals - 1) % 7
+        per_week = self.per_week[rows, np.newaxis]
+        # N per week is N sevenths of an occurrence a day
+        expected = np.where(per_week > 0, per_week * DUE_SCALE // 7, self.weekdays[rows][:, weekday] * DUE_SCALE)
+        return expected * (ordinals >= self.created[rows, np.newaxis])
+    
+    def week_sums(self, values, weekday):
+        """Running total of each row's values since the latest Monday (or the first column)"""
+        sums = np.zeros((values.shape[0], values.shape[1] + 1), dtype=np.int64)
+        np.cumsum(values, axis=1, out=sums[:, 1:])
+        week_start = np.maximum(np.arange(values.shape[1]) - weekday, 0)
+        return sums[:, 1:] - sums[:, week_start]
+    
+    def credit(self, status, first_day, rows=slice(None)):
+        """Completions that meet an occurrence, for status columns starting on a Monday or the matrix's first day"""
+        ordinals = first_day + np.arange(status.shape[1])
+        weekday = (ordinals - 1) % 7
+        done = status == DONE
+        per_week = self.per_week[rows, np.newaxis]
+        scheduled = np.where(per_week > 0, self.week_sums(done, weekday) <= per_week, self.weekdays[rows][:, weekday])
+        return done & scheduled & (ordinals >= self.created[rows, np.newaxis])
+    
+    def closing(self, status, first_day, rows=slice(None)):
+        """(required, met) occurrences closing on each day of the given status columns
+        
+        Weekday schedules close one occurrence per scheduled day. N-per-week schedules close
+        on Sunday, requiring N or the number of days the habit existed that week if fewer.
+        """
+        ordinals = first_day + np.arange(status.shape[1])
+        weekday = (ordinals - 1) % 7
+        active = ordinals >= self.created[rows, np.newaxis]
+        per_week = self.per_week[rows, np.newaxis]
+        sunday = weekday == 6
+        week_required = np.minimum(self.week_sums(active, weekday), per_week) * sunday
+        week_met = np.minimum(self.week_sums(self.credit(status, first_day, rows), weekday), week_required)
+        required = np.where(per_week > 0, week_required, self.weekdays[rows][:, weekday] & active)
+        met = np.where(per_week > 0, week_met, required * (status == DONE))
+        return required.astype(np.int64), met.astype(np.int64)
+    
+    def breaks(self, status, first_day, rows=slice(None)):
+        """Days on which a habit fell short of a closing occurrence"""
+        required, met = self.closing(status, first_day, rows)
+        return met < required
+    
+    def update(self, matrix, row, ordinal):
+        """Re-credit the week around one changed habit-day, called after the matrix itself was updated"""
+        started = ordinal < self.created[row] and matrix.status[row, ordinal - matrix.first_day] != 0
+        if started:
+            # Logging a day before the habit's start moves the start back
+            self.created[row] = ordinal
+        if matrix.first_day != self.first_day or matrix.status.shape[1] != self.width:
+            self.rebuild(matrix)
+            return
+        if started:
+            # Only this habit's expectations change, from its new start on
+            self.rebuild_row(matrix, row)
+            return
+        monday = ordinal - self.first_day - (ordinal - 1) % 7
+        lo, hi = max(monday, 0), min(monday + 7, self.width)
+        new = self.credit(matrix.status[row:row + 1, lo:hi], self.first_day + lo, [row])[0]
+        delta = np.cumsum(new.astype(np.int32) - np.diff(self.credited[row, lo:hi + 1]))
+        if not delta.any():
+            return
+        self.credited[row, lo + 1:hi + 1] += delta
+        self.credited[row, hi + 1:] += delta[-1]
+        self.total_credited[lo + 1:hi + 1] += delta
+        self.total_credited[hi + 1:] += delta[-1]
+    
+    def select(self, rows, difficulty):
+        selected = np.arange(len(self.per_week)) if rows is None else np.asarray(rows, dtype=np.intp)
+        if difficulty is not None:
+            selected = selected[self.difficulty[selected] == DIFFICULTIES.index(difficulty)]
+        return selected
+    
+    def window(self, sums, totals, start, end, rows=None, difficulty=None):
+        lo = min(max(start - self.first_day, 0), self.width)
+        hi = min(max(end - self.first_day + 1, lo), self.width)
+        if rows is None and difficulty is None:
+            return totals[hi] - totals[lo]
+        selected = self.select(rows, difficulty)
+        return (sums[selected, hi] - sums[selected, lo]).sum()
+    
+    def counts(self, start, end, rows=None, difficulty=None):
+        """(met, expected) occurrences between two day ordinals, optionally for habit rows and/or a difficulty"""
+        return (int(self.window(self.credited, self.total_credited, start, end, rows, difficulty)),
+                self.window(self.due, self.total_due, start, end, rows, difficulty) / DUE_SCALE)
+
+class RecentOutcomes:
+    """Ring buffer of each habit's latest logged outcomes (1 done, -1 missed) in day order
+    
+    Logging the newest day, the usual click, is O(1); a change behind the newest
+    buffered day refills that habit's row from the matrix.
+    """
+    
+    def __init__(self, matrix, capacity=RECENT_CAPACITY):
+        self.capacity = capacity
+        n_rows = matrix.status.shape[0]
+        self.outcomes = np.zeros((n_rows, capacity), dtype=np.int8)
+        self.days = np.zeros((n_rows, capacity), dtype=np.int64)
+        self.head = np.zeros(n_rows, dtype=np.int64)
+        self.count = np.zeros(n_rows, dtype=np.int64)
+        self.fill(matrix, np.arange(n_rows))
+    
+    def fill(self, matrix, rows):
+        """Load the newest `capacity` logged days of the given rows, oldest first, next write at slot 0"""
+        logged = matrix.status[rows] != 0
+        rank = np.cumsum(logged[:, ::-1], axis=1, dtype=np.int32)[:, ::-1]
+        hit_rows, cols = np.nonzero(logged & (rank <= self.capacity))
+        slots = self.capacity - rank[hit_rows, cols]
+        self.outcomes[rows] = 0
+        self.days[rows] = 0
+        self.outcomes[rows[hit_rows], slots] = matrix.status[rows[hit_rows], cols]
+        self.days[rows[hit_rows], slots] = matrix.first_day + cols
+        self.head[rows] = 0
+        self.count[rows] = np.minimum(logged.sum(axis=1), self.capacity)
+    
+    def copy(self):
+        clone = RecentOutcomes.__new__(RecentOutcomes)
+        clone.__dict__ = {k: v.copy() if isinstance(v, np.ndarray) else v for k, v in self.__dict__.items()}
+        return clone
+    
+    def add_row(self):
+        self.outcomes = np.vstack([self.outcomes, np.zeros((1, self.capacity), dtype=np.int8)])
+        self.days = np.vstack([self.days, np.zeros((1, self.capacity), dtype=np.int64)])
+        self.head = np.append(self.head, 0)
+        self.count = np.append(self.count, 0)
+    
+    def update(self, matrix, row, ordinal, old, new):
+        """Apply one status change, called after the matrix itself was updated"""
+        if old == new:
+            return
+        newest = (self.head[row] - 1) % self.capacity
+        if old == 0 and (self.count[row] == 0 or ordinal > self.days[row, newest]):
+            slot = self.head[row]
+            self.outcomes[row, slot] = new
+            self.days[row, slot] = ordinal
+            self.head[row] = (slot + 1) % self.capacity
+            self.count[row] = min(self.count[row] + 1, self.capacity)
+        elif old != 0 and new != 0 and self.count[row] and ordinal == self.days[row, newest]:
+            self.outcomes[row, newest] = new
+        else:
+            self.fill(matrix, np.array([row]))
+    
+    def last(self, row, n):
+        """Up to n of the row's latest outcomes, oldest first"""
+        n = min(n, self.count[row])
+        return self.outcomes[row, (self.head[row] - n + np.arange(n)) % self.capacity]
+    
+    def ewma(self, row, alpha=0.3, n=None):
+        """Exponentially weighted done rate over the latest n buffered outcomes, or None if none logged"""
+        done = self.last(row, n or self.capacity) == DONE
+        if not done.size:
+            return None
+        weights = (1 - alpha) ** np.arange(done.size)[::-1]
+        return float((done * weights).sum() / weights.sum())
+
+def difficulty_code(habit):
+    """Index of the habit's difficulty in DIFFICULTIES, or -1 if unknown"""
+    difficulty = habit.get('difficulty')
+    return DIFFICULTIES.index(difficulty) if difficulty in DIFFICULTIES else -1
+
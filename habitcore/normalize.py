@@ -0,0 +1,62 @@
+from datetime import date
+
+import numpy as np
+
+# ==================== NORMALIZATION ====================
+
+def day_ordinal(date_str, cache):
+    """Ordinal of a strict 'YYYY-MM-DD' string, or None if malformed"""
+    # Checked first: a non-string entry may not even be hashable
+    if not isinstance(date_str, str):
+        return None
+    if date_str in cache:
+        return cache[date_str]
+    ordinal = None
+    if len(date_str) == 10 and date_str[4] == '-' and date_str[7] == '-':
+        try:
+            ordinal = date.fromisoformat(date_str).toordinal()
+        except ValueError:
+            pass
+    cache[date_str] = ordinal
+    return ordinal
+
+def normalize_habits(habits):
+    """Validate, dedupe and sort every habit's dates in place, parsing each distinct string once
+    
+    Returns one (done, missed) pair of sorted int32 day-ordinal arrays per habit, plus a report
+    of what was cleaned up. Malformed entries are dropped from the habit and kept in the report.
+    """
+    cache = {}
+    days = []
+    report = {'malformed': [], 'duplicates': 0, 'conflicts': 0}
+    
+    for habit in habits:
+        valid = {}
+        for field in ('completed_dates', 'missed_dates'):
+            seen = {}
+            for date_str in habit[field]:
+                ordinal = day_ordinal(date_str, cache)
+                if ordinal is None:
+                    report['malformed'].append({'habit': habit.get('name'), 'field': field, 'value': date_str})
+                elif date_str in seen:
+                    report['duplicates'] += 1
+                else:
+                    seen[date_str] = ordinal
+            valid[field] = seen
+        
+        # A day logged as both done and missed counts as done
+        done = valid['completed_dates']
+        missed = valid['missed_dates']
+        conflicts = [d for d in missed if d in done]
+        for d in conflicts:
+            del missed[d]
+        report['conflicts'] += len(conflicts)
+        
+        habit['completed_dates'] = sorted(done)
+        habit['missed_dates'] = sorted(missed)
+        days.append((
+            np.array(sorted(done.values()), dtype=np.int32),
+            np.array(sorted(missed.values()), dtype=np.int32)
+        ))
+    
+    return days, report
@@ -0,0 +1,81 @@
+from datetime import date, datetime
+
+import numpy as np
+
+# ==================== END-OF-DAY ROLLOVER ====================
+# Closes every day since the last run in one batch: occurrences that closed short with
+# nothing logged on their day are recorded as missed, and each habit's debt and punishment_due plus the
+# store's betrayals are brought up to date. Progress is kept in last_rollover_date,
+# and the 'rollover' event carries the range it closes, so applying it twice is a no-op.
+# A store that has never been rolled over carries on from its last_report_date, or,
+# if it has none, only gets the marker: its stored debt and betrayals already cover
+# the past, and closing it again would count those days twice.
+
+def settle_debt(debt, steps):
+    """Debt after each row's steps, never going below zero (d = max(0, d + step))"""
+    totals = np.cumsum(steps, axis=1)
+    lowest = np.minimum(totals.min(axis=1, initial=0), -debt)
+    return totals[:, -1] - lowest if steps.shape[1] else debt
+
+def rollover_event(habits, matrix, start, end):
+    """'rollover' store event closing the ordinal days [start, end]
+    
+    Occurrences close as their schedule says (see DueIndex.closing): each one short adds
+    one to the habit's debt and a day or week fully met pays one off; punishment is due
+    while any debt remains. Every day something closed short counts as a betrayal.
+    """
+    # From the Monday before start, so N-per-week quotas see their whole first week
+    monday = start - (start - 1) % 7
+    status = matrix.window(monday, end)
+    required, met = (a[:, start - monday:] for a in matrix.due.closing(status, monday))
+    status = status[:, start - monday:]
+    shortfall = required - met
+    missed = shortfall > 0
+    auto_missed = missed & (status == 0)
+    
+    debt = np.array([int(h.get('debt') or 0) for h in habits], dtype=np.int64)
+    punishment_due = np.array([bool(h.get('punishment_due')) for h in habits], dtype=bool)
+    new_debt = settle_debt(debt, np.where(missed, shortfall, np.where(required > 0, -1, 0)))
+    changed = auto_missed.any(axis=1) | (new_debt != debt) | ((new_debt > 0) != punishment_due)
+    
+    changes = []
+    for row in np.flatnonzero(changed):
+        changes.append({
+            'id': habits[row].get('id'),
+            'missed': [date.fromordinal(start + int(c)).isoformat() for c in np.flatnonzero(auto_missed[row])],
+            'debt': int(new_debt[row]),
+            'punishment_due': bool(new_debt[row] > 0)
+        })
+    return {
+        'op': 'rollover',
+        'start': date.fromordinal(start).isoformat(),
+        'day': date.fromordinal(end).isoformat(),
+        'habits': changes,
+        'betrayals': int(missed.any(axis=0).sum())
+    }
+
+def roll_over(store, storage, today=None):
+    """Close every day before today not yet rolled over, persisting the event and applying it to store
+    
+    Returns the event, or None if there was nothing to close.
+    """
+    today = today or datetime.now().date()
+    last = store.data.get('last_rollover_date') or store.data.get('last_report_date')
+    end = today.toordinal() - 1
+    if last is None:
+        yesterday = date.fromordinal(end).isoformat()
+        event = {'op': 'rollover', 'start': yesterday, 'day': yesterday, 'habits': [], 'betrayals': 0, 'seeded': True}
+        storage.append(event)
+        store.apply_event(event)
+        return event
+    if not store.habits:
+        return None
+    
+    start = date.fromisoformat(last).toordinal() + 1
+    if end < start:
+        return None
+    
+    event = rollover_event(store.habits, store.matrix, start, end)
+    storage.append(event)
+    store.apply_event(event)
+    return event
@@ -0,0 +1,177 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from .matrix import DONE
+from .rules import DIFFICULTIES, completion_pct, personality_for_spread, verdict_for_counts
+
+# ==================== DAILY ROLLUPS ====================
+# One aggregate row per closed day, persisted next to the store (see storage.py) so
+# history views and reports read a table instead of recomputing from raw dates.
+# Backfill is incremental: only days after the last stored row are computed.
+
+ROLLUP_FIELDS = ('date', 'done', 'missed', 'rate', 'streak', 'verdict', 'personality', 'emoji', 'points')
+# Days computed at once by the vectorized verdict and personality passes, bounding their
+# (habits x days) scratch arrays
+ROLLUP_CHUNK_DAYS = 64
+
+def global_runs(matrix):
+    """Global streak as it stood at the end of each matrix day: unscheduled days carry it, a break resets it"""
+    any_done = (matrix.status == DONE).any(axis=0)
+    breaks = ~any_done & (matrix.streaks.break_counts > 0)
+    count = np.cumsum(any_done)
+    return count - np.maximum.accumulate(np.where(breaks, count, 0))
+
+def closed_day_counts(matrix, start, end):
+    """Occurrence and verdict counts for each closed day ordinal in [start, end], from one pass over the grid
+    
+    Returns (met, expected) as daily_occurrences() counts them, and the (attempts,
+    succeeded, fails among the last 5) that verdict_attempts() lists. Days start on or
+    after the grid's first day. The attempt list itself is never built: its last 5
+    entries are counted from its trailing blocks, which hold the last habit's oldest
+    day first, misses before completions.
+    """
+    counts = np.zeros((5, end - start + 1), dtype=np.int64)
+    for first in range(start, end + 1, ROLLUP_CHUNK_DAYS):
+        last = min(first + ROLLUP_CHUNK_DAYS - 1, end)
+        # From the Monday before the chunk's first 3-day window, as verdict_attempts reads it
+        lo = max(first - 2 - (first - 3) % 7, matrix.first_day)
+        status = matrix.window(lo, last)
+        required, met = matrix.due.closing(status, lo)
+        # Two empty days in front, for windows reaching back before the grid
+        short = np.pad(required - met, ((0, 0), (2, 0)))
+        credited = np.pad(matrix.due.credit(status, lo).astype(np.int64), ((0, 0), (2, 0)))
+        cols = np.arange(first, last + 1) - lo + 2
+        blocks = np.stack([a[:, cols - back] for back in (2, 1, 0) for a in (short, credited)], axis=-1)
+        blocks = blocks[::-1].transpose(1, 0, 2).reshape(cols.size, -1)
+        before = np.cumsum(blocks, axis=1) - blocks
+        counts[:, first - start:last - start + 1] = (
+            met[:, cols - 2].sum(axis=0),
+            required[:, cols - 2].sum(axis=0),
+            blocks.sum(axis=1),
+            blocks[:, 1::2].sum(axis=1),
+            np.clip(5 - before[:, 0::2], 0, blocks[:, 0::2]).sum(axis=1),
+        )
+    return counts
+
+def personality_spreads(windows, lo, hi):
+    """Median attempts and population stdev of completion rates over the attempted habits, for grid columns [lo, hi)
+    
+    NaN on days no habit had been attempted yet.
+    """
+    medians, spreads = np.full(hi - lo, np.nan), np.full(hi - lo, np.nan)
+    for first in range(lo, hi, ROLLUP_CHUNK_DAYS):
+        last = min(first + ROLLUP_CHUNK_DAYS, hi)
+        attempts = windows.logged[:, first + 1:last + 1].astype(np.float64)
+        completed = windows.done[:, first + 1:last + 1]
+        attempted = (attempts > 0).any(axis=0)
+        attempts[attempts == 0] = np.nan
+        out = np.flatnonzero(attempted) + first - lo
+        medians[out] = np.nanmedian(attempts[:, attempted], axis=0)
+        spreads[out] = np.nanstd(completed[:, attempted] / attempts[:, attempted], axis=0)
+    return medians, spreads
+
+def existing_habits(matrix):
+    """Habits that existed at the end of each grid day: those due from it or earlier (see DueIndex.created)"""
+    width = matrix.status.shape[1]
+    started = np.clip(matrix.due.created - matrix.first_day, 0, width)
+    return np.cumsum(np.bincount(started, minlength=width + 1)[:width])
+
+def weekday_totals(rows, totals=None):
+    """(last day ordinal, completions per weekday, misses per weekday) over rollup rows, added to earlier totals
+    
+    None for no rows at all. AnalyticsSnapshot reads the best and worst weekday from these
+    instead of recounting every day on the grid.
+    """
+    if not rows:
+        return totals
+    last, done, missed = totals or (None, np.zeros(7, dtype=np.int64), np.zeros(7, dtype=np.int64))
+    ordinals = np.array([date.fromisoformat(row['date']).toordinal() for row in rows], dtype=np.int64)
+    weekdays = (ordinals - 1) % 7
+    done = done + np.bincount(weekdays, weights=[row['done'] for row in rows], minlength=7).astype(np.int64)
+    missed = missed + np.bincount(weekdays, weights=[row['missed'] for row in rows], minlength=7).astype(np.int64)
+    return int(ordinals.max() if last is None else max(last, ordinals.max())), done, missed
+
+def rollup_days(matrix, start, end, points=None):
+    """Rows for each day ordinal in [start, end], each as it stood at the end of that day
+    
+    Counts, rates, streaks and the verdict and personality inputs are vectorized over the
+    range; only the rules that turn them into labels run once per day. points is recorded
+    on the last day only, since historical point totals are not kept.
+    """
+    start = max(start, matrix.first_day)
+    end = min(end, matrix.last_day)
+    if end < start:
+        return []
+    
+    windows = matrix.windows
+    lo = start - matrix.first_day
+    hi = end - matrix.first_day + 1
+    done_per_day = np.diff(windows.total_done[lo:hi + 1])
+    logged_per_day = np.diff(windows.total_logged[lo:hi + 1])
+    runs = global_runs(matrix)
+    met_per_day, expected_per_day, attempts, succeeded, recent_fails = closed_day_counts(matrix, start, end)
+    medians, spreads = personality_spreads(windows, lo, hi)
+    existing = existing_habits(matrix)
+    hard = DIFFICULTIES.index('Hard')
+    
+    rows = []
+    for i, col in enumerate(range(lo, hi)):
+        day = date.fromordinal(matrix.first_day + col)
+        done, logged = int(done_per_day[i]), int(logged_per_day[i])
+        streak = int(runs[col])
+        verdict = verdict_for_counts(int(attempts[i]), int(succeeded[i]), int(recent_fails[i]), streak)
+        personality, emoji = personality_for_spread(
+            int(existing[col]), int(windows.total_done[col + 1]), int(windows.total_logged[col + 1] - windows.total_done[col + 1]),
+            int(windows.difficulty_done[hard, col + 1]), int(windows.difficulty_logged[hard, col + 1]),
+            None if np.isnan(medians[i]) else float(medians[i]), None if np.isnan(spreads[i]) else float(spreads[i])
+        )
+        
+        rows.append({
+            'date': day.strftime('%Y-%m-%d'),
+            'done': done,
+            'missed': logged - done,
+            'rate': round(completion_pct(met_per_day[i], expected_per_day[i]), 1) if expected_per_day[i] > 0 else None,
+            'streak': streak,
+            'verdict': verdict['type'],
+            'personality': personality,
+            'emoji': emoji,
+            'points': points if col == hi - 1 else None
+        })
+    return rows
+
+def update_rollups(store, storage, today=None):
+    """Persist rows for every closed day (before today) not yet rolled up; returns the new rows
+    
+    Also records last_report_date and appends to personality_history whenever the
+    personality changes, through a 'report' store event also applied to store.
+    """
+    today = today or datetime.now().date()
+    last = storage.last_rollup_day()
+    start = date.fromisoformat(last).toordinal() + 1 if last else store.matrix.first_day
+    rows = rollup_days(store.matrix, start, today.toordinal() - 1, store.total_points)
+    if not rows:
+        return []
+    
+    storage.append_rollups(rows)
+    store.weekday_totals = weekday_totals(rows, store.weekday_totals)
+    
+    history = store.data.get('personality_history') or []
+    current = history[-1]['personality'] if history else None
+    changes = []
+    for row in rows:
+        if row['personality'] != current:
+            current = row['personality']
+            changes.append({'date': row['date'], 'personality': current, 'emoji': row['emoji']})
+    event = {'op': 'report', 'day': rows[-1]['date'], 'personality_history': changes}
+    storage.append(event)
+    store.apply_event(event)
+    return rows
+
+def recent_rollups(storage, days, today=None):
+    """Stored rows for the last `days` closed days"""
+    today = today or datetime.now().date()
+    return storage.load_rollups(
+        (today - timedelta(days=days)).strftime('%Y-%m-%d'),
+        (today - timedelta(days=1)).strftime('%Y-%m-%d')
+    )
@@ -0,0 +1,123 @@
+import statistics
+from datetime import datetime, timedelta
+
+# ==================== SCORING RULES ====================
+# Levels, verdicts and personalities: pure functions of already-counted numbers.
+
+DIFFICULTIES = ["Easy", "Medium", "Hard"]
+WEEKDAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+def get_today():
+    return datetime.now().date().strftime('%Y-%m-%d')
+
+def get_week_start():
+    today = datetime.now().date()
+    return (today - timedelta(days=today.weekday())).strftime('%Y-%m-%d')
+
+def get_month_start():
+    today = datetime.now().date()
+    return today.replace(day=1).strftime('%Y-%m-%d')
+
+def completion_pct(met, expected):
+    """Completion % of expected occurrences, capped at 100; 0 when nothing was expected"""
+    return min(100.0, met / expected * 100) if expected > 0 else 0
+
+def level_for_points(points):
+    """Map a point total to its level"""
+    if points >= 1000:
+        return {"name": "Legendary", "icon": "👑", "color": "#fbbf24"}
+    elif points >= 600:
+        return {"name": "Elite", "icon": "💎", "color": "#a855f7"}
+    elif points >= 300:
+        return {"name": "Discipline", "icon": "🎯", "color": "#6366f1"}
+    elif points >= 100:
+        return {"name": "Consistent", "icon": "⚡", "color": "#10b981"}
+    else:
+        return {"name": "Beginner", "icon": "🌱", "color": "#999"}
+
+def build_verdict(attempts, current_streak):
+    """Generate harsh verdict from the last 3 days of attempts"""
+    fails_in_recent = sum(1 for x in attempts[-5:] if not x)
+    return verdict_for_counts(len(attempts), sum(attempts), fails_in_recent, current_streak)
+
+def verdict_for_counts(attempts, succeeded, fails_in_recent, current_streak):
+    """build_verdict from counts: attempts, how many succeeded, and failures among the last 5"""
+    if not attempts:
+        return {
+            "type": "CRITICAL",
+            "message": "🚨 No activity in 3 days. You've already quit.",
+            "emoji": "🚨"
+        }
+    
+    rate = succeeded / attempts
+    
+    if fails_in_recent >= 3:
+        return {
+            "type": "BRUTAL",
+            "message": "🔥 You've failed 3+ times. This is a pattern, not a bad day.",
+            "emoji": "🔥"
+        }
+    
+    if rate < 0.3:
+        return {
+            "type": "CRITICAL",
+            "message": "🚨 70% failure rate. Stop adding habits. Fix existing ones.",
+            "emoji": "🚨"
+        }
+    
+    if rate < 0.6:
+        return {
+            "type": "WARNING",
+            "message": f"⚠️ Weak (60% failing). Your {current_streak}-day streak is at risk.",
+            "emoji": "⚠️"
+        }
+    
+    if current_streak > 0 and rate >= 0.8:
+        return {
+            "type": "GOOD",
+            "message": f"✓ You did what you said. {current_streak}-day streak alive. Don't slip.",
+            "emoji": "✓"
+        }
+    
+    if rate >= 0.8:
+        return {
+            "type": "GOOD",
+            "message": "✓ Strong performance. Build this into a streak.",
+            "emoji": "✓"
+        }
+    
+    return {
+        "type": "WARNING",
+        "message": "⚠️ One more slip breaks your streak.",
+        "emoji": "⚠️"
+    }
+
+def classify_personality(total, completed, missed, hard_completed, hard_total, attempt_lengths, completion_rates):
+    """Detect user's habit personality from aggregate counts"""
+    return personality_for_spread(
+        total, completed, missed, hard_completed, hard_total,
+        statistics.median(attempt_lengths) if len(attempt_lengths) else None,
+        statistics.pstdev(completion_rates) if len(completion_rates) else None
+    )
+
+def personality_for_spread(total, completed, missed, hard_completed, hard_total, median_attempts, rate_spread):
+    """classify_personality from the median attempts and population stdev of rates, None if no habit was attempted"""
+    if not total:
+        return "Uninitialized", "📋"
+    
+    if total > 5 and completed < total * 0.2:
+        return "Starter", "🚀"
+    
+    if hard_total > 0 and hard_completed / hard_total < 0.3:
+        return "Avoider", "🙈"
+    
+    if median_attempts is not None and median_attempts < 3:
+        return "Quitter", "🛑"
+    
+    if rate_spread is not None and rate_spread > 0.35:
+        return "Sprinter", "⚡"
+    
+    if completed > missed and completed > total * 0.6:
+        return "Finisher", "🏆"
+    
+    return "Developing", "🔄"
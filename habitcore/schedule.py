@@ -0,0 +1,56 @@
+from datetime import date
+
+import numpy as np
+
+from .rules import WEEKDAY_NAMES
+
+# ==================== SCHEDULES ====================
+# When a habit is due. A habit may carry a 'schedule' dict:
+#   {'weekdays': ['Mon', 'Wed', 'Fri']}   due on those weekdays (names or 0-6, Monday = 0)
+#   {'per_week': 3}                       due 3 times in each Monday-to-Sunday week
+# Without one, a 'Weekly' habit is due once per week and anything else every day.
+
+EVERY_DAY = (True,) * 7
+
+def weekday_code(day):
+    """0-6 for a weekday given as 0-6, 'Mon' or 'Monday', else None"""
+    if isinstance(day, int):
+        return day if 0 <= day < 7 else None
+    prefix = str(day).strip().lower()[:3]
+    return next((i for i, name in enumerate(WEEKDAY_NAMES) if name.lower()[:3] == prefix), None)
+
+def parse_schedule(habit):
+    """(weekday mask, per_week) for a habit; per_week is 0 for weekday schedules"""
+    schedule = habit.get('schedule') or {}
+    per_week = schedule.get('per_week')
+    if isinstance(per_week, int) and 1 <= per_week <= 7:
+        return EVERY_DAY, per_week
+    codes = {weekday_code(d) for d in schedule.get('weekdays') or ()} - {None}
+    if codes:
+        return tuple(i in codes for i in range(7)), 0
+    if habit.get('type') == 'Weekly':
+        return EVERY_DAY, 1
+    return EVERY_DAY, 0
+
+def describe_schedule(habit):
+    """Short label such as 'Daily', 'Mon/Wed/Fri' or '3× per week'"""
+    weekdays, per_week = parse_schedule(habit)
+    if per_week:
+        return "Weekly" if per_week == 1 else f"{per_week}× per week"
+    if all(weekdays):
+        return "Daily"
+    return "/".join(WEEKDAY_NAMES[i][:3] for i in range(7) if weekdays[i])
+
+def created_ordinals(habits, status, first_day):
+    """Day each habit starts being due: created_date, or its first logged day if earlier or missing"""
+    logged = status != 0
+    never = np.iinfo(np.int64).max
+    first_logged = np.where(logged.any(axis=1), logged.argmax(axis=1) + first_day, never)
+    created = []
+    for row, habit in enumerate(habits):
+        try:
+            day = date.fromisoformat(habit.get('created_date') or '').toordinal()
+        except (TypeError, ValueError):
+            day = never
+        created.append(min(day, int(first_logged[row])))
+    return np.array(created, dtype=np.int64)
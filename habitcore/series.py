@@ -0,0 +1,93 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from .matrix import DUE_SCALE
+from .rules import WEEKDAY_NAMES
+
+# ==================== COMPLETION SERIES ====================
+# Completion % of expected occurrences over any date range, bucketed by day, week or
+# month for the trend line and always by day for the calendar. Week and month buckets
+# are two prefix-sum lookups each (see DueIndex), so a year costs the same handful of
+# numpy ops as a week. A day holds the occurrences closing on it instead
+# (HabitMatrix.daily_occurrences): a weekly habit's share of a single day means nothing.
+
+BUCKETS = ('day', 'week', 'month')
+# Longest trend line a chart gets before switching to a coarser bucket
+MAX_POINTS = 120
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+def as_ordinal(day):
+    return (date.fromisoformat(day) if isinstance(day, str) else day).toordinal()
+
+def pick_bucket(days, max_points=MAX_POINTS):
+    """Finest bucket that keeps a range of `days` days within max_points buckets"""
+    if days <= max_points:
+        return 'day'
+    if days / 7 <= max_points:
+        return 'week'
+    return 'month'
+
+def bucket_starts(start, end, bucket):
+    """Ordinals where each bucket of an inclusive ordinal range begins; weeks start on Monday"""
+    if bucket == 'day':
+        return np.arange(start, end + 1)
+    if bucket == 'week':
+        next_monday = start - date.fromordinal(start).weekday() + 7
+        return np.concatenate([[start], np.arange(next_monday, end + 1, 7)])
+    months = np.arange(
+        np.datetime64(date.fromordinal(start), 'M') + 1,
+        np.datetime64(date.fromordinal(end), 'M') + 1
+    )
+    return np.concatenate([[start], months.astype('datetime64[D]').astype(np.int64) + EPOCH_ORDINAL])
+
+def percentages(done, expected):
+    return np.where(expected > 0, np.minimum(done * 100 / np.maximum(expected, 1e-9), 100), np.nan)
+
+class CompletionSeries:
+    """Met/expected occurrences and completion % per bucket, plus daily rates for the calendar; rates are NaN where nothing was expected"""
+    
+    def __init__(self, matrix, start, end, habit_ids=None, bucket=None, max_points=MAX_POINTS, today=None):
+        start, end = sorted((as_ordinal(start), as_ordinal(end)))
+        self.bucket = bucket or pick_bucket(end - start + 1, max_points)
+        starts = bucket_starts(start, end, self.bucket)
+        
+        today = (today or datetime.now().date()).toordinal()
+        matrix = matrix.covering(today)
+        due, windows = matrix.due, matrix.windows
+        rows = None
+        if habit_ids is None:
+            met_prefix, due_prefix = due.total_credited, due.total_due / DUE_SCALE
+            missed_prefix = windows.total_logged - windows.total_done
+        else:
+            rows = [matrix.rows[h] for h in habit_ids if h in matrix.rows]
+            met_prefix, due_prefix = due.credited[rows].sum(axis=0), due.due[rows].sum(axis=0) / DUE_SCALE
+            missed_prefix = (windows.logged[rows] - windows.done[rows]).sum(axis=0)
+        
+        # From today on, days are still open and expect only what was already met or logged missed
+        t = min(max(today - due.first_day, 0), due.width)
+        expected_prefix = due_prefix.copy()
+        expected_prefix[t:] = due_prefix[t] + met_prefix[t:] - met_prefix[t] + missed_prefix[t:] - missed_prefix[t]
+        
+        # The calendar keeps one cell per day whatever the bucket; a year is only 371 cells
+        day_met, day_expected = matrix.daily_occurrences(start, end, rows, today)
+        self.first_day = date.fromordinal(start)
+        self.day_rates = percentages(day_met, day_expected)
+        
+        self.starts = [date.fromordinal(int(d)) for d in starts]
+        if self.bucket == 'day':
+            self.done, self.expected = day_met, day_expected
+        else:
+            cols = np.clip(np.append(starts, end + 1) - due.first_day, 0, due.width)
+            self.done = np.diff(met_prefix[cols])
+            self.expected = np.diff(expected_prefix[cols])
+        self.rates = percentages(self.done, self.expected)
+    
+    def calendar(self):
+        """(rates, column starts, row labels) of the daily rates laid out as a weekday × week heatmap padded with NaN"""
+        offset = self.first_day.weekday()
+        weeks = -(-(offset + len(self.day_rates)) // 7)
+        grid = np.full(weeks * 7, np.nan)
+        grid[offset:offset + len(self.day_rates)] = self.day_rates
+        first_monday = self.first_day - timedelta(days=offset)
+        return grid.reshape(weeks, 7).T, [first_monday + timedelta(weeks=w) for w in range(weeks)], [d[:3] for d in WEEKDAY_NAMES]
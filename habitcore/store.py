@@ -0,0 +1,123 @@
+from bisect import insort
+from datetime import date
+
+from .analytics import AnalyticsSnapshot, completion_rate, habit_ewma, habit_momentum
+from .matrix import DONE, MISSED, HabitMatrix
+from .normalize import normalize_habits
+from .rollup import weekday_totals
+from .series import CompletionSeries
+
+# ==================== HABIT STORE ====================
+
+# Rough CPython sizes for memory_bytes(): a date string with its list slot, and a habit
+# dict with its scalar fields
+DATE_BYTES = 70
+HABIT_BYTES = 1024
+
+def habit_bytes(habit):
+    """Estimated resident size of one habit dict with its date lists"""
+    return HABIT_BYTES + DATE_BYTES * (len(habit['completed_dates']) + len(habit['missed_dates']))
+
+class HabitStore:
+    """A parsed store: habit dicts, point total, status matrix and the normalization report
+    
+    `today` (default: the current date) is the day the matrix is built to cover, and the
+    day a habit added later without a start of its own starts being due. `rollups` are the
+    stored daily rollup rows, whose totals the analytics read for closed days.
+    """
+    
+    def __init__(self, data, today=None, rollups=()):
+        self.data = data
+        self.habits = data['habits']
+        self.total_points = data.get('total_points', 0)
+        self.today = today
+        self.weekday_totals = weekday_totals(rollups)
+        days, self.report = normalize_habits(data['habits'])
+        self.matrix = HabitMatrix(data['habits'], days, today)
+    
+    @classmethod
+    def load(cls, storage):
+        """Parse whatever a storage backend (see storage.py) loads"""
+        return cls(storage.load(), rollups=storage.load_rollups())
+    
+    def memory_bytes(self):
+        """Estimated resident size: the matrix and its indexes plus the habit dicts and their dates"""
+        return self.matrix.nbytes() + sum(habit_bytes(h) for h in self.habits)
+    
+    def apply_event(self, event, points=True):
+        """Apply a journal event (see journal.apply_event) to the habits and matrix in place
+        
+        Returns False if the store already held it. Points are added unless points=False,
+        for an event whose points were counted when it was first applied.
+        """
+        if points:
+            self.total_points += event.get('points', 0)
+        if event['op'] == 'rollover':
+            return self.apply_rollover(event)
+        if event['op'] == 'report':
+            return self.apply_report(event)
+        if event['op'] == 'add':
+            habit = event['habit']
+            if habit.get('id') in self.matrix.rows:
+                return False
+            # The event may still be waiting to be written, so the store gets lists of its own
+            habit = dict(habit, completed_dates=list(habit['completed_dates']), missed_dates=list(habit['missed_dates']))
+            self.habits.append(habit)
+            self.matrix.add_habit(habit, self.today)
+            return True
+        
+        row = self.matrix.rows.get(event['id'])
+        if row is None:
+            return False
+        habit, day = self.habits[row], event['day']
+        value = DONE if event['op'] == 'complete' else MISSED
+        field, other = ('completed_dates', 'missed_dates') if value == DONE else ('missed_dates', 'completed_dates')
+        if day in habit[field]:
+            return False
+        insort(habit[field], day)
+        if day in habit[other]:
+            habit[other].remove(day)
+        self.matrix.set_status(habit, date.fromisoformat(day), value)
+        return True
+    
+    def apply_rollover(self, event):
+        # Ranges already closed are skipped, so a rollover raced by another process applies once
+        if event['start'] <= (self.data.get('last_rollover_date') or ''):
+            return False
+        for change in event['habits']:
+            row = self.matrix.rows.get(change['id'])
+            if row is None:
+                continue
+            habit = self.habits[row]
+            for day in change['missed']:
+                # Auto-misses never overwrite a day logged in the meantime
+                if day not in habit['completed_dates'] and day not in habit['missed_dates']:
+                    insort(habit['missed_dates'], day)
+                    self.matrix.set_status(habit, date.fromisoformat(day), MISSED)
+            habit['debt'] = change['debt']
+            habit['punishment_due'] = change['punishment_due']
+        self.data['betrayals'] = self.data.get('betrayals', 0) + event['betrayals']
+        self.data['last_rollover_date'] = event['day']
+        return True
+    
+    def apply_report(self, event):
+        if event['day'] <= (self.data.get('last_report_date') or ''):
+            return False
+        self.data['last_report_date'] = event['day']
+        self.data.setdefault('personality_history', []).extend(event['personality_history'])
+        return True
+    
+    def snapshot(self, today=None):
+        return AnalyticsSnapshot(self.habits, self.matrix, self.total_points, today, self.weekday_totals)
+    
+    def completion_rate(self, start, end, habit_ids=None, difficulty=None):
+        return completion_rate(self.matrix, start, end, habit_ids, difficulty)
+    
+    def series(self, start, end, habit_ids=None, bucket=None):
+        return CompletionSeries(self.matrix, start, end, habit_ids, bucket)
+    
+    def momentum(self, habit, window=5):
+        return habit_momentum(self.matrix, habit, window)
+    
+    def ewma(self, habit, alpha=0.3, window=None):
+        return habit_ewma(self.matrix, habit, alpha, window)
@@ -0,0 +1,328 @@
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, one server process is assumed
+    fcntl = None
+
+# ==================== EVENT JOURNAL ====================
+# Every Done/Miss/Add click appends one event line to a JSONL journal next to the
+# data file instead of rewriting the whole store; persister.Persister batches a burst
+# of clicks into one append. Once the journal grows past COMPACT_THRESHOLD_BYTES a
+# background thread folds it into the JSON snapshot.
+#
+# Files beside a data file habits.json:
+#   habits.json               snapshot, stamped with the 'version' of the last segment folded in
+#   habits.<n>.journal.jsonl  journal sealed as segment n, waiting to be folded into snapshot n
+#   habits.journal.jsonl      live journal every writer appends to
+#   habits.journal.lock       flock over which of these files exist
+# Writers in any number of sessions and processes append to the live journal holding
+# only a shared flock on it, so they never wait on each other. Sealing renames it to
+# the next segment and then waits for appends already under way. Loads hold the lock
+# file shared; sealing and snapshot commits hold it exclusively for their renames. A
+# snapshot is written to a temp file, fsynced and renamed into place, so a crash leaves
+# the old one or the new one, and the commit is a compare-and-swap on the version
+# stamp: when two processes compact at once the newer snapshot wins.
+
+COMPACT_THRESHOLD_BYTES = 256 * 1024
+# Temp snapshots this old were left by a crashed compaction
+STALE_TEMP_SECONDS = 3600
+
+_lock = threading.Lock()
+_compacting = set()
+
+def journal_path(data_file):
+    return os.path.splitext(data_file)[0] + '.journal.jsonl'
+
+def segment_path(data_file, n):
+    return f"{os.path.splitext(data_file)[0]}.{n}.journal.jsonl"
+
+def lock_path(data_file):
+    return os.path.splitext(data_file)[0] + '.journal.lock'
+
+def compacting_path(data_file):
+    """Journal sealed by stores written before versioned segments; folded by the next compaction"""
+    return journal_path(data_file) + '.compacting'
+
+def empty_store():
+    return {'habits': [], 'total_points': 0}
+
+def flock(f, exclusive=False):
+    """Block until an open file is locked, shared unless exclusive; closing it unlocks"""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+@contextmanager
+def locked(data_file, exclusive=False):
+    """Hold the store's file-set lock, shared unless exclusive"""
+    with open(lock_path(data_file), 'a') as f:
+        flock(f, exclusive)
+        yield
+
+def sealed_segments(data_file):
+    """(n, path) of every sealed segment on disk, oldest first"""
+    directory = os.path.dirname(data_file) or '.'
+    pattern = re.compile(re.escape(os.path.basename(os.path.splitext(data_file)[0])) + r'\.(\d+)\.journal\.jsonl')
+    found = []
+    for name in os.listdir(directory):
+        match = pattern.fullmatch(name)
+        if match:
+            found.append((int(match.group(1)), os.path.join(directory, name)))
+    return sorted(found)
+
+def apply_event(data, event, habits_by_id=None):
+    """Apply one journal event to a loaded store dict"""
+    if habits_by_id is None:
+        habits_by_id = {h.get('id'): h for h in data['habits']}
+
+    op = event['op']
+    if op == 'add':
+        habit = dict(event['habit'])
+        data['habits'].append(habit)
+        habits_by_id[habit.get('id')] = habit
+    elif op in ('complete', 'miss'):
+        habit = habits_by_id.get(event['id'])
+        if habit is not None:
+            day = event['day']
+            target, other = ('completed_dates', 'missed_dates') if op == 'complete' else ('missed_dates', 'completed_dates')
+            if day not in habit[target]:
+                habit[target].append(day)
+            if day in habit[other]:
+                habit[other].remove(day)
+    elif op == 'rollover':
+        # Ranges already closed are skipped, so a rollover raced by another process applies once
+        if event['start'] > (data.get('last_rollover_date') or ''):
+            for change in event['habits']:
+                habit = habits_by_id.get(change['id'])
+                if habit is None:
+                    continue
+                logged = set(habit['completed_dates']) | set(habit['missed_dates'])
+                habit['missed_dates'].extend(d for d in change['missed'] if d not in logged)
+                habit['debt'] = change['debt']
+                habit['punishment_due'] = change['punishment_due']
+            data['betrayals'] = data.get('betrayals', 0) + event['betrayals']
+            data['last_rollover_date'] = event['day']
+    elif op == 'report':
+        # Like rollovers, a report for days already reported is another process's duplicate
+        if event['day'] > (data.get('last_report_date') or ''):
+            data['last_report_date'] = event['day']
+            data.setdefault('personality_history', []).extend(event['personality_history'])
+
+    data['total_points'] = data.get('total_points', 0) + event.get('points', 0)
+
+def read_events(path):
+    """Yield events from a journal file, stopping at a torn trailing line"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'r') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                return
+
+def read_tail(path, offset=0):
+    """(events, end offset) of the complete lines after a byte offset of a journal file"""
+    if not os.path.exists(path):
+        return [], offset
+    events = []
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            if line.strip():
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+            offset += len(line)
+    return events, offset
+
+def replay(data, paths):
+    """Apply every event from the given journals that the snapshot does not already hold"""
+    applied = data.get('journal_seq', 0)
+    habits_by_id = {h.get('id'): h for h in data['habits']}
+    for path in paths:
+        for event in read_events(path):
+            # Only events from before versioned segments carry a seq; newer ones are ordered by position
+            if event.get('seq', applied + 1) > applied:
+                apply_event(data, event, habits_by_id)
+                applied = event.get('seq', applied)
+    data['journal_seq'] = applied
+    return data
+
+def read_snapshot(data_file):
+    if os.path.exists(data_file):
+        with open(data_file, 'r') as f:
+            data = json.load(f)
+        data.setdefault('habits', [])
+        data.setdefault('total_points', 0)
+        return data
+    return empty_store()
+
+def snapshot_version(data_file):
+    """Version stamp of the snapshot on disk, read from its first line (0 if none)"""
+    try:
+        with open(data_file, 'r') as f:
+            head = f.read(64)
+    except FileNotFoundError:
+        return 0
+    match = re.match(r'\{\s*"version":\s*(\d+)', head)
+    return int(match.group(1)) if match else 0
+
+def generation(data_file):
+    """Newest snapshot or segment version; it changes whenever the live journal is sealed or replaced"""
+    return max([snapshot_version(data_file)] + [n for n, _ in sealed_segments(data_file)])
+
+def load_store(data_file):
+    """Load the snapshot and replay the sealed segments and live journal on top of it
+
+    The result's 'journal_cursor' marks where reading stopped; changes_since() picks up
+    whatever other writers append after it.
+    """
+    with locked(data_file):
+        data = read_snapshot(data_file)
+        version = data.get('version', 0)
+        segments = [path for n, path in sealed_segments(data_file) if n > version]
+        data = replay(data, [compacting_path(data_file)] + segments)
+        cursor = [generation(data_file), 0]
+        events, cursor[1] = read_tail(journal_path(data_file))
+    habits_by_id = {h.get('id'): h for h in data['habits']}
+    for event in events:
+        if event.get('seq', data['journal_seq'] + 1) > data['journal_seq']:
+            apply_event(data, event, habits_by_id)
+    data['journal_cursor'] = cursor
+    return data
+
+def changes_since(data_file, cursor):
+    """(events appended to the live journal after cursor, new cursor), or None if it was sealed since"""
+    # Lock-free: a seal between the two generation reads shows up in the second one
+    if generation(data_file) != cursor[0]:
+        return None
+    events, offset = read_tail(journal_path(data_file), cursor[1])
+    if generation(data_file) != cursor[0]:
+        return None
+    return events, [cursor[0], offset]
+
+def append_event(data_file, event):
+    """Durably append one event, starting a background compaction when the journal is large"""
+    return append_events(data_file, [event])[0]
+
+def append_events(data_file, events):
+    """Durably append a batch of events with one write and fsync"""
+    path = journal_path(data_file)
+    payload = ''.join(json.dumps(event, separators=(',', ':')) + '\n' for event in events)
+    while True:
+        with open(path, 'a') as f:
+            flock(f)
+            # Sealed between open and lock: the events belong in the new live journal
+            try:
+                if os.fstat(f.fileno()).st_ino != os.stat(path).st_ino:
+                    continue
+            except FileNotFoundError:
+                continue
+            # Whole lines in one write: O_APPEND keeps concurrent batches from interleaving
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        break
+
+    if size >= COMPACT_THRESHOLD_BYTES:
+        with _lock:
+            if data_file not in _compacting:
+                _compacting.add(data_file)
+                threading.Thread(target=compact, args=(data_file,), daemon=True).start()
+
+    return events
+
+def fsync_directory(path):
+    """Make a rename into path's directory durable"""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def write_temp_snapshot(data_file, data, version):
+    """Write data stamped with version to a new temp file beside data_file; returns its path"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(data_file)), prefix=os.path.basename(data_file) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            # The stamp goes first so snapshot_version() can read it without parsing the file
+            body = {k: v for k, v in data.items() if k not in ('version', 'journal_cursor')}
+            json.dump({'version': version, **body}, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tmp_path
+
+def commit_snapshot(data_file, tmp_path, version):
+    """Rename a temp snapshot into place unless the one on disk is as new (hold the exclusive lock)"""
+    if snapshot_version(data_file) >= version:
+        os.remove(tmp_path)
+        return False
+    os.replace(tmp_path, data_file)
+    fsync_directory(data_file)
+    for n, path in sealed_segments(data_file):
+        if n <= version:
+            os.remove(path)
+    if os.path.exists(compacting_path(data_file)):
+        os.remove(compacting_path(data_file))
+    directory = os.path.dirname(os.path.abspath(data_file))
+    prefix = os.path.basename(data_file) + '.'
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.startswith(prefix) and name.endswith('.tmp') and os.path.getmtime(path) < time.time() - STALE_TEMP_SECONDS:
+            os.remove(path)
+    return True
+
+def compact(data_file):
+    """Seal the live journal as the next segment and fold every sealed segment into a new snapshot"""
+    try:
+        with locked(data_file, exclusive=True):
+            newest = generation(data_file)
+            path = journal_path(data_file)
+            if os.path.exists(path) and os.path.getsize(path):
+                newest += 1
+                sealed = segment_path(data_file, newest)
+                os.replace(path, sealed)
+                # Appends that locked the file before the rename finish before it is read
+                with open(sealed, 'a') as f:
+                    flock(f, exclusive=True)
+
+        # Appends go to a fresh journal while the sealed segments are folded in
+        with locked(data_file):
+            data = read_snapshot(data_file)
+            segments = [path for n, path in sealed_segments(data_file) if data.get('version', 0) < n <= newest]
+            data = replay(data, [compacting_path(data_file)] + segments)
+        if not segments:
+            return
+        tmp_path = write_temp_snapshot(data_file, data, newest)
+        with locked(data_file, exclusive=True):
+            commit_snapshot(data_file, tmp_path, newest)
+    finally:
+        with _lock:
+            _compacting.discard(data_file)
+
+def replace_store(data_file, data):
+    """Overwrite the snapshot with the given data and discard every journal"""
+    with locked(data_file, exclusive=True):
+        version = generation(data_file) + 1
+        data = {k: v for k, v in data.items() if k != 'journal_seq'}
+        commit_snapshot(data_file, write_temp_snapshot(data_file, data, version), version)
+        if os.path.exists(journal_path(data_file)):
+            os.remove(journal_path(data_file))
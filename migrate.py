@@ -0,0 +1,33 @@
+import argparse
+
+from storage import BACKENDS
+
+# ==================== STORE MIGRATION ====================
+# One-shot copy of a whole store between backends, e.g.
+#   python migrate.py habits_enforcement.json habits_enforcement.db
+# The JSON side includes any journal events not yet compacted.
+
+def backend_for(path):
+    return 'sqlite' if path.endswith(('.db', '.sqlite', '.sqlite3')) else 'json'
+
+def migrate(source_path, target_path, source_backend=None, target_backend=None):
+    """Copy every habit, event and top-level field from one store into another"""
+    source = BACKENDS[source_backend or backend_for(source_path)](source_path)
+    target = BACKENDS[target_backend or backend_for(target_path)](target_path)
+    data = source.load()
+    target.save_store(data)
+    return len(data['habits'])
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a habit store between storage backends")
+    parser.add_argument("source", help="existing store (e.g. habits_enforcement.json)")
+    parser.add_argument("target", help="store to create or overwrite (e.g. habits_enforcement.db)")
+    parser.add_argument("--from", dest="source_backend", choices=sorted(BACKENDS), help="source backend (default: from extension)")
+    parser.add_argument("--to", dest="target_backend", choices=sorted(BACKENDS), help="target backend (default: from extension)")
+    args = parser.parse_args()
+
+    count = migrate(args.source, args.target, args.source_backend, args.target_backend)
+    print(f"Migrated {count} habits from {args.source} to {args.target}")
+
+if __name__ == "__main__":
+    main()
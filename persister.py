@@ -0,0 +1,175 @@
+import atexit
+import threading
+import time
+
+import profiler
+
+# ==================== WRITE-BEHIND PERSISTENCE ====================
+# Button handlers hand their event to the store's Persister and return at once. A
+# background thread waits COALESCE_SECONDS after the first queued event so a burst of
+# clicks gathers, then writes the whole batch with Storage.append_many (one journal
+# write and fsync, or one SQLite transaction). A failed batch stays at the head of the
+# queue and is retried every RETRY_SECONDS; its error is kept for the UI to show.
+# flush() forces the queue out now, and every persister is flushed at interpreter exit.
+# release() stops a store's persister only once its queue is written. Each batch's
+# write is timed and logged by the profiler as "disk.write_behind".
+
+COALESCE_SECONDS = 0.05
+RETRY_SECONDS = 1.0
+SHUTDOWN_TIMEOUT_SECONDS = 10.0
+
+class Persister:
+    """Queue of store events written behind by one background thread"""
+
+    def __init__(self, storage, delay=COALESCE_SECONDS, retry_delay=RETRY_SECONDS):
+        self.storage = storage
+        self.delay = delay
+        self.retry_delay = retry_delay
+        self.cond = threading.Condition()
+        self.pending = []
+        self.writing = 0
+        self.flushing = 0
+        self.attempts = 0
+        self.error = None
+        self.closed = False
+        self.start()
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name=f"persister:{self.storage.path}", daemon=True)
+        self.thread.start()
+
+    def submit(self, event):
+        """Queue one event for the next batch"""
+        with self.cond:
+            if not self.closed:
+                self.pending.append(event)
+                self.cond.notify_all()
+                return
+        # Released while a click was on its way here: write it through instead
+        self.storage.append(event)
+
+    def backlog(self):
+        """Events accepted but not yet durable"""
+        with self.cond:
+            return len(self.pending) + self.writing
+
+    def run(self):
+        with self.cond:
+            while True:
+                while not self.pending and not self.closed:
+                    self.cond.wait()
+                if not self.pending:
+                    self.running = False
+                    return
+                # Let a burst of clicks gather unless a flush or shutdown is waiting; after a
+                # failure, back off even for a flush
+                deadline = time.monotonic() + (self.retry_delay if self.error else self.delay)
+                while (self.error or not self.flushing) and not self.closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.cond.wait(remaining)
+
+                batch, self.pending = self.pending, []
+                self.writing = len(batch)
+                self.cond.release()
+                try:
+                    error = self.write(batch)
+                finally:
+                    self.cond.acquire()
+                self.writing = 0
+                self.attempts += 1
+                self.error = error
+                if error is not None:
+                    self.pending[:0] = batch
+                self.cond.notify_all()
+                if error is not None and self.closed:
+                    self.running = False
+                    return
+
+    def write(self, batch):
+        """Append one batch and log how long it took; the error it failed with, or None"""
+        start = time.perf_counter()
+        try:
+            self.storage.append_many(batch)
+            error = None
+        except Exception as e:
+            error = e
+        profiler.report("disk.write_behind", (time.perf_counter() - start) * 1000, events=len(batch), failed=error is not None)
+        return error
+
+    def flush(self, timeout=None):
+        """Write everything queued so far now; True once it is all durable"""
+        with self.cond:
+            if not self.pending and not self.writing:
+                return self.error is None
+            # A batch already being written may predate the events this flush is for
+            started = self.attempts + (1 if self.writing else 0)
+            self.flushing += 1
+            self.cond.notify_all()
+            try:
+                self.cond.wait_for(
+                    lambda: (not self.pending and not self.writing)
+                    or (self.error is not None and self.attempts > started and not self.writing)
+                    or not self.thread.is_alive(),
+                    timeout
+                )
+            finally:
+                self.flushing -= 1
+            return not self.pending and not self.writing and self.error is None
+
+    def close(self, timeout=SHUTDOWN_TIMEOUT_SECONDS):
+        """Write what is queued, then stop the thread; True if nothing was left unsaved"""
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.thread.join(timeout)
+        with self.cond:
+            return not self.pending and not self.writing
+
+    def restart(self):
+        """Queue and write events again after a close() that left some unsaved, retrying those first"""
+        with self.cond:
+            self.closed = False
+            # A thread that outlived close()'s timeout carries on; one that gave up is replaced
+            if not self.running:
+                self.start()
+            self.cond.notify_all()
+
+_persisters = {}
+_persisters_lock = threading.Lock()
+
+def get_persister(storage):
+    """Process-wide persister for a storage object"""
+    with _persisters_lock:
+        if storage not in _persisters:
+            _persisters[storage] = Persister(storage)
+        return _persisters[storage]
+
+def release(storage):
+    """Flush and stop the persister for a storage object, if it has one; False if events were left unsaved
+
+    A persister that could not write everything stays registered and goes on retrying
+    its queue, so a transient I/O error never drops the clicks in it.
+    """
+    with _persisters_lock:
+        persister = _persisters.get(storage)
+    if persister is None:
+        return True
+    if not persister.close():
+        persister.restart()
+        return False
+    with _persisters_lock:
+        if _persisters.get(storage) is persister:
+            del _persisters[storage]
+    return True
+
+@atexit.register
+def close_all():
+    """Flush and stop every persister; registered to run at interpreter exit"""
+    with _persisters_lock:
+        persisters = list(_persisters.values())
+        _persisters.clear()
+    for persister in persisters:
+        persister.close()
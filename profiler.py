@@ -0,0 +1,109 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from functools import wraps
+
+# ==================== RERUN PROFILER ====================
+# Opt-in timing of analytics functions, render sections and disk operations.
+# Enable with HABITS_PROFILE=1; each rerun's timings are shown in the sidebar and
+# appended as one line to a rolling JSONL log. When disabled, timed() returns the
+# function untouched and section() a shared no-op context manager. Timings from
+# widget callbacks and fragment reruns are reported with the next full rerun. Work
+# done on background threads, outside any rerun, is logged on its own line by report().
+
+ENABLED = os.environ.get("HABITS_PROFILE", "") not in ("", "0")
+LOG_FILE = os.environ.get("HABITS_PROFILE_LOG", "habits_profile.jsonl")
+LOG_MAX_BYTES = 5 * 1024 * 1024
+
+_run = threading.local()
+_log_lock = threading.Lock()
+_NULL = nullcontext()
+
+def record(name, ms):
+    # Widget callbacks run before the script body, so collection starts on first use
+    _run.__dict__.setdefault('records', []).append((name, ms))
+
+@contextmanager
+def _measure(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, (time.perf_counter() - start) * 1000)
+
+def section(name):
+    """Context manager timing the enclosed block under `name`"""
+    return _measure(name) if ENABLED else _NULL
+
+def timed(category):
+    """Decorator timing every call of a function as '<category>.<function name>'"""
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+        name = f"{category}.{fn.__name__}"
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, (time.perf_counter() - start) * 1000)
+        return wrapper
+    return decorate
+
+def start_run():
+    """Begin collecting timings for the current script run"""
+    if ENABLED:
+        _run.__dict__.setdefault('records', [])
+        _run.started = time.perf_counter()
+
+def summarize(records):
+    """Per-name call count, total and max milliseconds, slowest first"""
+    by_name = {}
+    for name, ms in records:
+        calls, total, slowest = by_name.get(name, (0, 0.0, 0.0))
+        by_name[name] = (calls + 1, total + ms, max(slowest, ms))
+    rows = [
+        {"name": name, "calls": calls, "total_ms": round(total, 3), "max_ms": round(slowest, 3)}
+        for name, (calls, total, slowest) in by_name.items()
+    ]
+    return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+def finish_run():
+    """Timings of the current run, appended to the profile log; None when disabled"""
+    if not ENABLED or 'started' not in _run.__dict__:
+        return None
+    records = _run.__dict__.pop('records', [])
+    profile = {
+        "ts": datetime.now().isoformat(timespec='milliseconds'),
+        "total_ms": round((time.perf_counter() - _run.__dict__.pop('started')) * 1000, 3),
+        "timings": summarize(records)
+    }
+    write_log(profile)
+    return profile
+
+def report(name, ms, **fields):
+    """Append one timing taken outside any rerun to the profile log, with extra fields"""
+    if ENABLED:
+        write_log({
+            "ts": datetime.now().isoformat(timespec='milliseconds'),
+            "total_ms": round(ms, 3),
+            "timings": summarize([(name, ms)]),
+            **fields
+        })
+
+def write_log(profile):
+    """Append one profile line, rotating the log to <log>.1 once it passes LOG_MAX_BYTES"""
+    line = json.dumps(profile, separators=(',', ':')) + '\n'
+    with _log_lock:
+        try:
+            if os.path.getsize(LOG_FILE) >= LOG_MAX_BYTES:
+                os.replace(LOG_FILE, LOG_FILE + '.1')
+        except FileNotFoundError:
+            pass
+        with open(LOG_FILE, 'a') as f:
+            f.write(line)
@@ -0,0 +1,40 @@
+import argparse
+from datetime import date
+
+from habitcore import HabitStore, roll_over, update_rollups
+from migrate import backend_for
+from storage import BACKENDS
+
+# ==================== END-OF-DAY ROLLOVER ====================
+# Closes every day since the last run without starting the app, e.g. from cron:
+#   python rollover.py habits_enforcement.json
+# The app runs the same pass on its first load of each day; both are idempotent.
+
+def close_days(path, backend=None, today=None):
+    """Roll over and roll up every closed day; returns (rollover event or None, new rollup rows)"""
+    store = BACKENDS[backend or backend_for(path)](path)
+    loaded = HabitStore.load(store)
+    # roll_over applies its event to the loaded store, so the rollups see the misses it recorded
+    event = roll_over(loaded, store, today)
+    rows = update_rollups(loaded, store, today)
+    return event, rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Record misses and update debt for every day since the last rollover")
+    parser.add_argument("store", help="store to roll over (e.g. habits_enforcement.json)")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), help="storage backend (default: from extension)")
+    parser.add_argument("--today", type=date.fromisoformat, help="close days before this date (default: today)")
+    args = parser.parse_args()
+
+    event, rows = close_days(args.store, args.backend, args.today)
+    if event is None:
+        print("Nothing to roll over")
+        return
+    if event.get('seeded'):
+        print(f"First rollover: days up to {event['day']} are left as stored, {len(rows)} days rolled up")
+        return
+    missed = sum(len(change['missed']) for change in event['habits'])
+    print(f"Closed {event['start']} to {event['day']}: {missed} misses recorded, {event['betrayals']} betrayals, {len(rows)} days rolled up")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,428 @@
+import json
+import os
+import sqlite3
+import threading
+from bisect import bisect_left, bisect_right, insort
+
+import journal
+
+# ==================== STORAGE BACKENDS ====================
+# The app talks to a Storage object: load() returns the whole store as a dict
+# ({'habits': [...], 'total_points': n, ...}) and append(event) persists one
+# journal-style event (see journal.apply_event). JSON is the default backend.
+# Daily rollups (see habitcore.rollup) live beside the store, one row per closed day.
+
+HABIT_COLUMNS = ('id', 'name', 'type', 'difficulty', 'created_date')
+ROLLUP_COLUMNS = ('date', 'done', 'missed', 'rate', 'streak', 'verdict', 'personality', 'emoji', 'points')
+# last_rollup_day() reads this much from the end of a JSON rollups file; rows are ~150 bytes
+ROLLUP_TAIL_BYTES = 4096
+
+# SQLite schema changes, applied in order once per database; PRAGMA user_version
+# records how many have run, so opening an up-to-date database runs no DDL
+SQLITE_MIGRATIONS = (
+    """
+    CREATE TABLE IF NOT EXISTS habits (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        type TEXT,
+        difficulty TEXT,
+        created_date TEXT,
+        extra TEXT NOT NULL DEFAULT '{}'
+    );
+    CREATE TABLE IF NOT EXISTS habit_events (
+        habit_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        status INTEGER NOT NULL,
+        PRIMARY KEY (habit_id, day)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS daily_rollups (
+        date TEXT PRIMARY KEY,
+        done INTEGER NOT NULL,
+        missed INTEGER NOT NULL,
+        rate REAL,
+        streak INTEGER NOT NULL,
+        verdict TEXT,
+        personality TEXT,
+        emoji TEXT,
+        points INTEGER
+    ) WITHOUT ROWID;
+    """,
+    # Every appended event in order, so a loaded store can catch up with other writers (changes_since)
+    """
+    CREATE TABLE IF NOT EXISTS event_log (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        event TEXT NOT NULL
+    );
+    """,
+)
+# The event log keeps at least this many of the latest events; stores loaded before the
+# ones trimmed away are parsed again instead of merged
+EVENT_LOG_ROWS = 10000
+
+class Storage:
+    """Interface every store backend implements"""
+
+    def load(self):
+        raise NotImplementedError
+
+    def append(self, event):
+        raise NotImplementedError
+
+    def append_many(self, events):
+        """Persist a batch of events in order, as one write where the backend allows"""
+        for event in events:
+            self.append(event)
+
+    def save_store(self, data):
+        """Replace the entire store with the given data"""
+        raise NotImplementedError
+
+    def changes_since(self, cursor):
+        """(events persisted after a loaded store's 'journal_cursor', new cursor), or None if it must be reloaded"""
+        # Without an event log there is nothing to list; other writers' rows show on the next load
+        return [], cursor
+
+    def files(self):
+        """Paths whose contents make up the store"""
+        raise NotImplementedError
+
+    def close(self):
+        """Release open handles; the object stays usable and reopens them on demand"""
+
+    def version_key(self):
+        """(mtime, size) of every store file, changing whenever the store is written"""
+        key = []
+        for path in self.files():
+            try:
+                stat = os.stat(path)
+                key.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                key.append(None)
+        return tuple(key)
+
+    def load_rollups(self, start=None, end=None):
+        """Daily rollup rows between two 'YYYY-MM-DD' days inclusive, oldest first"""
+        raise NotImplementedError
+
+    def append_rollups(self, rows):
+        """Persist rollup rows, replacing any stored row for the same date"""
+        raise NotImplementedError
+
+    def last_rollup_day(self):
+        """Date of the newest rollup row, or None before the first rollup"""
+        raise NotImplementedError
+
+class JsonStorage(Storage):
+    """JSON snapshot plus append-only event journal"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        # Rollup rows by date, their dates in order, and how far into the rollups file
+        # (as of rollup_stat) they were read; see read_rollups()
+        self.rollups = {}
+        self.rollup_days = []
+        self.rollup_offset = 0
+        self.rollup_stat = None
+
+    def files(self):
+        return (self.path, journal.compacting_path(self.path), journal.journal_path(self.path))
+
+    def load(self):
+        return journal.load_store(self.path)
+
+    def append(self, event):
+        journal.append_event(self.path, event)
+
+    def append_many(self, events):
+        journal.append_events(self.path, events)
+
+    def save_store(self, data):
+        journal.replace_store(self.path, data)
+
+    def changes_since(self, cursor):
+        return journal.changes_since(self.path, cursor) if cursor else None
+
+    def rollups_path(self):
+        return os.path.splitext(self.path)[0] + '.rollups.jsonl'
+
+    def read_rollups(self):
+        """Bring the in-memory rollup rows up to date, parsing only what was appended since the last read"""
+        try:
+            st = os.stat(self.rollups_path())
+            stat = (st.st_ino, st.st_size, st.st_mtime_ns)
+        except FileNotFoundError:
+            stat = None
+        with self.lock:
+            if stat == self.rollup_stat:
+                return
+            old = self.rollup_stat
+            if stat is None or old is None or stat[0] != old[0] or stat[1] <= old[1]:
+                # First read, or the file was replaced or rewritten rather than appended to
+                self.rollups, self.rollup_days, self.rollup_offset = {}, [], 0
+            rows, self.rollup_offset = journal.read_tail(self.rollups_path(), self.rollup_offset)
+            for row in rows:
+                if row['date'] not in self.rollups:
+                    insort(self.rollup_days, row['date'])
+                # Later lines win, so a re-rolled day replaces the earlier row
+                self.rollups[row['date']] = row
+            self.rollup_stat = stat
+
+    def load_rollups(self, start=None, end=None):
+        self.read_rollups()
+        with self.lock:
+            lo = 0 if start is None else bisect_left(self.rollup_days, start)
+            hi = len(self.rollup_days) if end is None else bisect_right(self.rollup_days, end)
+            return [dict(self.rollups[day]) for day in self.rollup_days[lo:hi]]
+
+    def append_rollups(self, rows):
+        with self.lock, open(self.rollups_path(), 'a') as f:
+            for row in rows:
+                f.write(json.dumps({c: row.get(c) for c in ROLLUP_COLUMNS}, separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def last_rollup_day(self):
+        # Days are appended in order, so the last complete line holds the latest one
+        try:
+            with open(self.rollups_path(), 'rb') as f:
+                size = f.seek(0, os.SEEK_END)
+                f.seek(max(size - ROLLUP_TAIL_BYTES, 0))
+                lines = f.read().split(b'\n')
+        except FileNotFoundError:
+            return None
+        # After the last newline is a torn append; before the first, a line cut by the seek
+        for line in reversed(lines[1 if size > ROLLUP_TAIL_BYTES else 0:-1]):
+            try:
+                return json.loads(line)['date']
+            except (json.JSONDecodeError, KeyError):
+                continue
+        rows = self.load_rollups()
+        return rows[-1]['date'] if rows else None
+
+class SqliteStorage(Storage):
+    """SQLite store with one row per habit and one row per logged habit-day, plus a log of appended events"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = self.connect()
+
+    @property
+    def conn(self):
+        """The open connection, reopened on first use after close()"""
+        if self.connection is None:
+            self.connection = self.connect()
+        return self.connection
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for n, script in enumerate(SQLITE_MIGRATIONS[version:], version + 1):
+            # One transaction per migration, so a crash leaves it applied or not at all
+            conn.executescript(f"BEGIN; {script}\nPRAGMA user_version = {n}; COMMIT;")
+        return conn
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+    def files(self):
+        return (self.path, self.path + '-wal')
+
+    def load(self):
+        # One read transaction, so the cursor marks exactly the events this load includes
+        with self.lock, self.conn:
+            self.conn.execute("BEGIN")
+            cursor = self.last_event_seq()
+            habits = []
+            by_id = {}
+            for row in self.conn.execute("SELECT id, name, type, difficulty, created_date, extra FROM habits ORDER BY rowid"):
+                habit = dict(zip(HABIT_COLUMNS, row[:5]))
+                habit['completed_dates'] = []
+                habit['missed_dates'] = []
+                habit.update(json.loads(row[5]))
+                habits.append(habit)
+                by_id[habit['id']] = habit
+            for habit_id, day, status in self.conn.execute("SELECT habit_id, day, status FROM habit_events ORDER BY habit_id, day"):
+                habit = by_id.get(habit_id)
+                if habit is not None:
+                    habit['completed_dates' if status == 1 else 'missed_dates'].append(day)
+            data = {key: json.loads(value) for key, value in self.conn.execute("SELECT key, value FROM meta WHERE key != 'event_log_start'")}
+        data['habits'] = habits
+        data.setdefault('total_points', 0)
+        data['journal_cursor'] = cursor
+        return data
+
+    def last_event_seq(self):
+        row = self.conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'event_log'").fetchone()
+        return row[0] if row else 0
+
+    def event_log_start(self):
+        """Newest seq no longer in the event log; cursors before it cannot be caught up"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'event_log_start'").fetchone()
+        return json.loads(row[0]) if row else 0
+
+    def set_event_log_start(self, seq):
+        self.conn.execute("DELETE FROM event_log WHERE seq <= ?", (seq,))
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('event_log_start', ?)", (json.dumps(seq),))
+
+    def changes_since(self, cursor):
+        if cursor is None:
+            return None
+        with self.lock, self.conn:
+            self.conn.execute("BEGIN")
+            if cursor < self.event_log_start():
+                return None
+            rows = self.conn.execute("SELECT seq, event FROM event_log WHERE seq > ? ORDER BY seq", (cursor,)).fetchall()
+        return [json.loads(event) for _, event in rows], rows[-1][0] if rows else cursor
+
+    def append(self, event):
+        self.append_many([event])
+
+    def append_many(self, events):
+        # One transaction, so a batch commits (and syncs) once
+        with self.lock, self.conn:
+            for event in events:
+                self.apply_event(event)
+                self.conn.execute("INSERT INTO event_log (event) VALUES (?)", (json.dumps(event, separators=(',', ':')),))
+            last = self.last_event_seq()
+            if last - self.event_log_start() > 2 * EVENT_LOG_ROWS:
+                self.set_event_log_start(last - EVENT_LOG_ROWS)
+
+    def apply_event(self, event):
+        op = event['op']
+        if op == 'add':
+            self.insert_habit(event['habit'])
+        elif op in ('complete', 'miss'):
+            self.conn.execute(
+                "INSERT OR REPLACE INTO habit_events (habit_id, day, status) VALUES (?, ?, ?)",
+                (event['id'], event['day'], 1 if op == 'complete' else -1)
+            )
+        elif op == 'rollover':
+            self.apply_rollover(event)
+        elif op == 'report':
+            self.apply_report(event)
+        if event.get('points'):
+            self.conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('total_points', ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + excluded.value",
+                (event['points'],)
+            )
+
+    def apply_rollover(self, event):
+        last = self.conn.execute("SELECT value FROM meta WHERE key = 'last_rollover_date'").fetchone()
+        if event['start'] <= ((json.loads(last[0]) if last else None) or ''):
+            return
+        for change in event['habits']:
+            row = self.conn.execute("SELECT extra FROM habits WHERE id = ?", (change['id'],)).fetchone()
+            if row is None:
+                continue
+            extra = dict(json.loads(row[0]), debt=change['debt'], punishment_due=change['punishment_due'])
+            self.conn.execute("UPDATE habits SET extra = ? WHERE id = ?", (json.dumps(extra), change['id']))
+            # Auto-misses never overwrite a day logged in the meantime
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO habit_events (habit_id, day, status) VALUES (?, ?, -1)",
+                [(change['id'], d) for d in change['missed']]
+            )
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('betrayals', ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + excluded.value",
+            (event['betrayals'],)
+        )
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('last_rollover_date', ?)", (json.dumps(event['day']),))
+
+    def apply_report(self, event):
+        last = self.conn.execute("SELECT value FROM meta WHERE key = 'last_report_date'").fetchone()
+        if event['day'] <= ((json.loads(last[0]) if last else None) or ''):
+            return
+        history = self.conn.execute("SELECT value FROM meta WHERE key = 'personality_history'").fetchone()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [
+                ('last_report_date', json.dumps(event['day'])),
+                ('personality_history', json.dumps((json.loads(history[0]) if history else []) + event['personality_history']))
+            ]
+        )
+
+    def insert_habit(self, habit):
+        extra = {k: v for k, v in habit.items() if k not in HABIT_COLUMNS and k not in ('completed_dates', 'missed_dates')}
+        self.conn.execute(
+            "INSERT OR REPLACE INTO habits (id, name, type, difficulty, created_date, extra) VALUES (?, ?, ?, ?, ?, ?)",
+            tuple(habit.get(c) for c in HABIT_COLUMNS) + (json.dumps(extra),)
+        )
+        # Missed first so that a day listed as both done and missed ends up done
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO habit_events (habit_id, day, status) VALUES (?, ?, -1)",
+            [(habit['id'], d) for d in habit.get('missed_dates', [])]
+        )
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO habit_events (habit_id, day, status) VALUES (?, ?, 1)",
+            [(habit['id'], d) for d in habit.get('completed_dates', [])]
+        )
+
+    def save_store(self, data):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM habit_events")
+            self.conn.execute("DELETE FROM habits")
+            self.conn.execute("DELETE FROM meta")
+            for habit in data['habits']:
+                self.insert_habit(habit)
+            self.conn.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, ?)",
+                [(k, json.dumps(v)) for k, v in data.items() if k not in ('habits', 'journal_seq', 'version', 'journal_cursor')]
+            )
+            # Every store loaded before the replacement has to be parsed again: a placeholder
+            # event moves the sequence past their cursors, and is trimmed with the rest
+            self.conn.execute("INSERT INTO event_log (event) VALUES ('{\"op\":\"replace\"}')")
+            self.set_event_log_start(self.last_event_seq())
+
+    def load_rollups(self, start=None, end=None):
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT {', '.join(ROLLUP_COLUMNS)} FROM daily_rollups WHERE date BETWEEN ? AND ? ORDER BY date",
+                (start or '', end or '9999-12-31')
+            ).fetchall()
+        return [dict(zip(ROLLUP_COLUMNS, row)) for row in rows]
+
+    def append_rollups(self, rows):
+        with self.lock, self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO daily_rollups ({', '.join(ROLLUP_COLUMNS)}) VALUES ({', '.join('?' * len(ROLLUP_COLUMNS))})",
+                [tuple(row.get(c) for c in ROLLUP_COLUMNS) for row in rows]
+            )
+
+    def last_rollup_day(self):
+        with self.lock:
+            return self.conn.execute("SELECT MAX(date) FROM daily_rollups").fetchone()[0]
+
+BACKENDS = {'json': JsonStorage, 'sqlite': SqliteStorage}
+
+_open_stores = {}
+_open_lock = threading.Lock()
+
+def get_storage(backend, path):
+    """Process-wide storage object for a backend and path"""
+    with _open_lock:
+        key = (backend, path)
+        if key not in _open_stores:
+            _open_stores[key] = BACKENDS[backend](path)
+        return _open_stores[key]
+
+def open_storage(backend, path):
+    """Process-wide storage object for a backend and path if one is open, else None"""
+    with _open_lock:
+        return _open_stores.get((backend, path))
+
+def release_storage(backend, path):
+    """Forget the process-wide storage object for a backend and path; returns it, or None if none was open"""
+    with _open_lock:
+        return _open_stores.pop((backend, path), None)
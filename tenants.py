@@ -0,0 +1,234 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import persister
+import storage
+
+# ==================== USER STORES ====================
+# One deployment serves many users, each with a store of their own under USERS_DIR.
+# Stores are sharded by a hash of the user id, so no directory holds more than a few
+# hundred entries however many accounts exist:
+#   users/3f/a2/3fa2…/habits_enforcement.json   (plus its journal, rollups and lock)
+# Loaded stores live in a StoreCache, an LRU bounded by their estimated memory
+# (HABITS_STORE_CACHE_MB). A store nobody has touched for HABITS_STORE_IDLE_SECONDS is
+# unloaded too: its queued writes are flushed and its storage handles closed. A store
+# whose writes are failing stays loaded, and the next sweep tries to unload it again.
+# Sessions reach a cached store through a Lease, and a store dropped from the cache
+# revokes its leases, so no session keeps it alive. When a store's files change on the
+# same day, the cache first asks its refresher to catch the loaded store up (the app
+# folds in new journal events) and parses the files again only if that fails.
+
+USERS_DIR = os.environ.get("HABITS_USERS_DIR", "users")
+CACHE_MAX_BYTES = int(float(os.environ.get("HABITS_STORE_CACHE_MB", "256")) * 1024 * 1024)
+IDLE_SECONDS = float(os.environ.get("HABITS_STORE_IDLE_SECONDS", "900"))
+SWEEP_SECONDS = 60
+
+log = logging.getLogger(__name__)
+
+def user_dir(user_id, root=USERS_DIR):
+    """Shard directory holding one user's store files"""
+    digest = hashlib.sha256(user_id.strip().lower().encode()).hexdigest()
+    return os.path.join(root, digest[:2], digest[2:4], digest)
+
+def user_store_path(user_id, filename, root=USERS_DIR):
+    """Path of a user's store file, creating its directory on first use"""
+    directory = user_dir(user_id, root)
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, filename)
+
+def unload(backend, path):
+    """Flush a store's queued writes and close its storage handles; False, leaving them open, if the writes failed"""
+    store = storage.open_storage(backend, path)
+    if store is None:
+        return True
+    if not persister.release(store):
+        log.warning("Kept %s loaded: %d queued events could not be written yet", path, persister.get_persister(store).backlog())
+        return False
+    storage.release_storage(backend, path)
+    store.close()
+    return True
+
+class Lease:
+    """One session's hold on a cached store
+
+    Once revoked, a lease can no longer be acquired. It lets go of the store at once if
+    no script run holds it, else on release().
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.lock = threading.Lock()
+        self.in_use = False
+        self.revoked = False
+
+    def acquire(self):
+        """Hold the lease's store until release(); False once it was revoked, so the session moves to a new one"""
+        with self.lock:
+            if self.revoked:
+                return False
+            self.in_use = True
+            return True
+
+    def release(self):
+        with self.lock:
+            self.in_use = False
+            if self.revoked:
+                self.store = None
+
+    def revoke(self):
+        with self.lock:
+            self.revoked = True
+            if not self.in_use:
+                self.store = None
+
+class CacheEntry:
+    """One loaded store with the version it was read at and the leases sessions hold on it"""
+
+    def __init__(self, version, store):
+        self.version = version
+        self.store = store
+        self.nbytes = store.memory_bytes()
+        self.leases = weakref.WeakSet()
+        self.last_used = time.monotonic()
+
+    def drop(self):
+        """Revoke every lease on the store, for an entry leaving the cache"""
+        for lease in list(self.leases):
+            lease.revoke()
+
+class StoreCache:
+    """Loaded stores by (backend, path), evicting least recently used ones past max_bytes and idle ones"""
+
+    def __init__(self, loader, refresher=None, max_bytes=CACHE_MAX_BYTES, idle_seconds=IDLE_SECONDS, sweep_seconds=SWEEP_SECONDS):
+        self.loader = loader
+        self.refresher = refresher
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.loading = {}
+        if sweep_seconds:
+            threading.Thread(target=self.sweep_forever, args=(sweep_seconds,), name="store-cache-sweep", daemon=True).start()
+
+    def get(self, backend, path, version):
+        """The store at this version, loaded with loader(backend, path) on a miss
+
+        A loaded store at another version is kept instead if refresher(backend, path,
+        store, its version, version) brings it up to this one and returns True.
+        """
+        key = (backend, path)
+        with self.lock:
+            store = self.hit(key, version)
+            if store is not None:
+                return store
+            # One load per store at a time; other stores load alongside it
+            loading = self.loading.setdefault(key, threading.Lock())
+        with loading:
+            try:
+                with self.lock:
+                    store = self.hit(key, version)
+                    if store is not None:
+                        return store
+                    stale = self.entries.get(key)
+                if stale is not None and self.refresher and self.refresher(backend, path, stale.store, stale.version, version):
+                    with self.lock:
+                        if self.entries.get(key) is stale:
+                            stale.version = version
+                            stale.nbytes = stale.store.memory_bytes()
+                            return self.hit(key, version)
+                entry = CacheEntry(version, self.loader(backend, path))
+                with self.lock:
+                    # Sessions on the version this one supersedes move over when they reload
+                    old = self.entries.pop(key, None)
+                    if old is not None:
+                        old.drop()
+                    self.entries[key] = entry
+                    evicted = self.evict(keep=key)
+            finally:
+                # However the load ended, so one lock is never left behind per store ever seen
+                with self.lock:
+                    if self.loading.get(key) is loading:
+                        del self.loading[key]
+        self.unload(evicted)
+        return entry.store
+
+    def lease(self, backend, path, version):
+        """A new Lease on the store at this version, loading it like get()"""
+        key = (backend, path)
+        while True:
+            store = self.get(backend, path, version)
+            with self.lock:
+                # Superseded between the load and here: load again
+                entry = self.entries.get(key)
+                if entry is not None and entry.store is store:
+                    lease = Lease(store)
+                    entry.leases.add(lease)
+                    return lease
+
+    def hit(self, key, version):
+        entry = self.entries.get(key)
+        if entry is None or entry.version != version:
+            return None
+        self.entries.move_to_end(key)
+        entry.last_used = time.monotonic()
+        return entry.store
+
+    def touch(self, backend, path):
+        """Mark a store as in use, so a session that only reruns keeps it from going idle"""
+        key = (backend, path)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.entries[key].last_used = time.monotonic()
+
+    def evict(self, keep=None):
+        """Drop idle entries, then the least recently used until under max_bytes; returns their (key, entry) pairs"""
+        now = time.monotonic()
+        dropped = {key for key, entry in self.entries.items() if key != keep and now - entry.last_used > self.idle_seconds}
+        total = sum(entry.nbytes for key, entry in self.entries.items() if key not in dropped)
+        # Oldest first; the entry just loaded stays even if it alone is over budget
+        for key, entry in self.entries.items():
+            if total <= self.max_bytes:
+                break
+            if key != keep and key not in dropped:
+                dropped.add(key)
+                total -= entry.nbytes
+        evicted = [(key, self.entries.pop(key)) for key in dropped]
+        for _, entry in evicted:
+            entry.drop()
+        return evicted
+
+    def unload(self, evicted):
+        """Unload evicted stores; returns how many were, putting back those whose queued writes failed"""
+        unloaded = 0
+        for key, entry in evicted:
+            if unload(*key):
+                unloaded += 1
+                continue
+            with self.lock:
+                # Oldest, so it is the first to go once its writes succeed
+                if key not in self.entries:
+                    self.entries[key] = entry
+                    self.entries.move_to_end(key, last=False)
+        return unloaded
+
+    def sweep(self):
+        """Unload every idle store now; returns how many were unloaded"""
+        with self.lock:
+            evicted = self.evict()
+        return self.unload(evicted)
+
+    def sweep_forever(self, interval):
+        while True:
+            time.sleep(interval)
+            self.sweep()
+
+    def stats(self):
+        """(stores loaded, estimated bytes)"""
+        with self.lock:
+            return len(self.entries), sum(entry.nbytes for entry in self.entries.values())
@@ -0,0 +1,69 @@
+import random
+from datetime import date, timedelta
+
+import numpy as np
+
+from habitcore import DONE, MISSED, HabitMatrix, normalize_habits
+
+# ==================== RANDOM HABIT HISTORIES ====================
+# Every index on HabitMatrix is updated in place by set_status and add_habit. The index
+# tests click randomly through a store and compare the updated matrix with one rebuilt
+# from scratch after each click.
+
+TODAY = date(2026, 3, 18)
+SCHEDULES = [None, {'per_week': 3}, {'per_week': 1}, {'weekdays': ['Mon', 'Thu']}, {'weekdays': ['Sat', 'Sun']}]
+
+def random_habit(rng, habit_id, days_back=40):
+    habit = {
+        'id': habit_id,
+        'name': f'habit {habit_id}',
+        'difficulty': rng.choice(['Easy', 'Medium', 'Hard']),
+        'schedule': rng.choice(SCHEDULES),
+        'completed_dates': [],
+        'missed_dates': [],
+    }
+    if rng.random() < 0.7:
+        habit['created_date'] = (TODAY - timedelta(days=rng.randint(0, days_back))).isoformat()
+    for back in range(days_back):
+        roll = rng.random()
+        if roll < 0.4:
+            habit['completed_dates'].append((TODAY - timedelta(days=back)).isoformat())
+        elif roll < 0.55:
+            habit['missed_dates'].append((TODAY - timedelta(days=back)).isoformat())
+    return habit
+
+def rebuilt(matrix, habits):
+    """A matrix built from scratch over the same days, statuses and habit start days"""
+    fresh = []
+    for row, habit in enumerate(habits):
+        ordinals = matrix.first_day + np.arange(matrix.status.shape[1])
+        fresh.append(dict(
+            habit,
+            created_date=date.fromordinal(int(matrix.due.created[row])).isoformat(),
+            completed_dates=[date.fromordinal(int(d)).isoformat() for d in ordinals[matrix.status[row] == DONE]],
+            missed_dates=[date.fromordinal(int(d)).isoformat() for d in ordinals[matrix.status[row] == MISSED]],
+        ))
+    days, _ = normalize_habits(fresh)
+    clone = HabitMatrix(fresh, days, today=date.fromordinal(matrix.last_day))
+    if clone.first_day > matrix.first_day:
+        clone.ensure_day(matrix.first_day)
+    return clone
+
+def random_clicks(seed, steps=60):
+    """Yield (matrix, habits) after each of `steps` random clicks, some adding a habit first"""
+    rng = random.Random(seed)
+    habits = [random_habit(rng, i) for i in range(rng.randint(1, 5))]
+    days, _ = normalize_habits(habits)
+    matrix = HabitMatrix(habits, days, today=TODAY)
+    
+    for step in range(steps):
+        if rng.random() < 0.08:
+            habit = {'id': 100 + step, 'name': f'new {step}', 'difficulty': 'Medium', 'schedule': rng.choice(SCHEDULES),
+                     'completed_dates': [], 'missed_dates': []}
+            habits.append(habit)
+            matrix.add_habit(habit, TODAY)
+        # Mostly recent days, where the fast paths apply; sometimes far back, before the
+        # first day on the grid, or after today
+        back = rng.choice([0, 0, 0, 1, 1, 2, 3, 6, 9, 20, 45, 60, -2])
+        matrix.set_status(rng.choice(habits), TODAY - timedelta(days=back), rng.choice([DONE, DONE, MISSED, 0]))
+        yield matrix, habits
@@ -0,0 +1,43 @@
+from datetime import date, timedelta
+
+from habitcore import AnalyticsSnapshot, HabitMatrix, normalize_habits
+
+# ==================== DASHBOARD SNAPSHOT ====================
+
+TODAY = date(2026, 3, 18)
+
+def snapshot(habits):
+    days, _ = normalize_habits(habits)
+    return AnalyticsSnapshot(habits, HabitMatrix(habits, days, today=TODAY), 0, today=TODAY)
+
+def habit(created, completed=(), missed=()):
+    return {
+        'id': 1,
+        'name': 'read',
+        'difficulty': 'Easy',
+        'created_date': created.isoformat(),
+        'completed_dates': [d.isoformat() for d in completed],
+        'missed_dates': [d.isoformat() for d in missed],
+    }
+
+def test_new_user_is_not_put_in_intervention():
+    assert not snapshot([]).intervention
+    # Added today and nothing logged: nothing was expected yet
+    assert not snapshot([habit(TODAY)]).intervention
+
+def test_unlogged_week_puts_user_in_intervention():
+    # Nothing logged for the last week counts against it, as every due day expected a completion
+    assert snapshot([habit(TODAY - timedelta(days=10), completed=[TODAY - timedelta(days=10)])]).intervention
+
+def test_kept_week_leaves_intervention():
+    week = [TODAY - timedelta(days=back) for back in range(1, 8)]
+    assert not snapshot([habit(TODAY - timedelta(days=10), completed=week)]).intervention
+
+def test_focus_rate_counts_unlogged_due_days():
+    # One completion, then nine due days left unlogged and today still open: the
+    # logged-only rate would be 100%
+    start = TODAY - timedelta(days=10)
+    focus = snapshot([habit(start, completed=[start])])
+    assert focus.focus_habit is not None
+    assert focus.focus_rate == 10.0
+    assert (int(focus.habit_met[0]), float(focus.habit_expected[0])) == (1, 10.0)
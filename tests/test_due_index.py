@@ -0,0 +1,54 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+from factories import TODAY, rebuilt
+from habitcore import DONE, MISSED, HabitMatrix, normalize_habits
+
+# ==================== DUE OCCURRENCES ====================
+
+def test_added_habit_is_due_from_the_day_passed_in():
+    matrix = HabitMatrix([], [], today=TODAY)
+    day = TODAY - timedelta(days=3)
+    matrix.add_habit({'id': 1, 'name': 'new', 'difficulty': 'Easy', 'completed_dates': [], 'missed_dates': []}, day)
+    assert matrix.due.created[0] == day.toordinal()
+
+def test_logging_before_a_start_rebuilds_only_that_row(monkeypatch):
+    habits = [{'id': i, 'name': str(i), 'difficulty': 'Easy', 'created_date': TODAY.isoformat(), 'schedule': schedule,
+               'completed_dates': [], 'missed_dates': []}
+              for i, schedule in enumerate([None, {'per_week': 3}, {'weekdays': ['Mon', 'Thu']}])]
+    matrix = HabitMatrix(habits, normalize_habits(habits)[0], today=TODAY)
+    matrix.ensure_day((TODAY - timedelta(days=30)).toordinal())
+    monkeypatch.setattr(matrix.due, 'rebuild', None)
+    for habit, back in zip(habits, (10, 12, 16)):
+        day = TODAY - timedelta(days=back)
+        matrix.set_status(habit, day, DONE)
+        assert matrix.due.created[habit['id']] == day.toordinal()
+    monkeypatch.undo()
+    fresh = rebuilt(matrix, habits)
+    np.testing.assert_array_equal(matrix.due.due, fresh.due.due)
+    np.testing.assert_array_equal(matrix.due.credited, fresh.due.credited)
+    np.testing.assert_array_equal(matrix.due.total_due, fresh.due.total_due)
+    np.testing.assert_array_equal(matrix.due.total_credited, fresh.due.total_credited)
+
+def test_per_week_quota_restarts_on_monday():
+    monday = date(2026, 3, 9)
+    habits = [{'id': 1, 'name': 'swim', 'difficulty': 'Easy', 'created_date': monday.isoformat(), 'schedule': {'per_week': 1},
+               'completed_dates': [], 'missed_dates': []}]
+    matrix = HabitMatrix(habits, normalize_habits(habits)[0], today=monday + timedelta(days=8))
+    matrix.ensure_day(monday.toordinal())
+    saturday, sunday, next_monday = (monday + timedelta(days=d) for d in (5, 6, 7))
+    for day in (saturday, sunday, next_monday, next_monday + timedelta(days=1)):
+        matrix.set_status(habits[0], day, DONE)
+    due = matrix.due
+    # One completion counts in each Monday-to-Sunday week, however many are logged
+    assert due.counts(monday.toordinal(), sunday.toordinal()) == (1, 1.0)
+    assert due.counts(next_monday.toordinal(), next_monday.toordinal() + 1) == (1, 2 / 7)
+    assert due.counts(sunday.toordinal(), next_monday.toordinal())[0] == 1
+    
+    # Saturday's miss hands the week's credit to Sunday, and next week is untouched
+    matrix.set_status(habits[0], saturday, MISSED)
+    assert due.counts(sunday.toordinal(), sunday.toordinal())[0] == 1
+    assert due.counts(monday.toordinal(), sunday.toordinal())[0] == 1
+    assert due.counts(next_monday.toordinal(), next_monday.toordinal())[0] == 1
+    np.testing.assert_array_equal(due.credited, rebuilt(matrix, habits).due.credited)
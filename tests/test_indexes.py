@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from factories import TODAY, random_clicks, rebuilt
+
+# ==================== INCREMENTAL INDEXES ====================
+# After every random click (see factories.random_clicks), each index updated in place
+# must equal the same index rebuilt from scratch. Edge cases live beside each index's
+# own tests.
+
+def check_streaks(matrix, fresh):
+    streaks, expected = matrix.streaks, fresh.streaks
+    for name in ('day_counts', 'breaks', 'break_counts', 'run_end', 'run_len', 'longest', 'next_break'):
+        np.testing.assert_array_equal(getattr(streaks, name), getattr(expected, name), err_msg=name)
+    for ordinal in (TODAY.toordinal() - 1, TODAY.toordinal(), TODAY.toordinal() + 1):
+        np.testing.assert_array_equal(streaks.current(ordinal), expected.current(ordinal))
+
+def check_windows(matrix, fresh):
+    windows, expected = matrix.windows, fresh.windows
+    start, end = matrix.first_day - 3, matrix.last_day + 3
+    for difficulty in (None, 'Easy', 'Hard'):
+        assert windows.counts(start, end, difficulty=difficulty) == expected.counts(start, end, difficulty=difficulty)
+        assert windows.counts(TODAY.toordinal() - 6, TODAY.toordinal(), difficulty=difficulty) == \
+            expected.counts(TODAY.toordinal() - 6, TODAY.toordinal(), difficulty=difficulty)
+    assert windows.counts(start, end, rows=[0]) == expected.counts(start, end, rows=[0])
+    np.testing.assert_array_equal(windows.per_day(), expected.per_day())
+
+def check_recent(matrix, fresh):
+    recent, expected = matrix.recent, fresh.recent
+    np.testing.assert_array_equal(recent.count, expected.count)
+    n = recent.capacity
+    for row in range(matrix.status.shape[0]):
+        np.testing.assert_array_equal(recent.last(row, n), expected.last(row, n))
+        slots = (recent.head[row] - recent.count[row] + np.arange(recent.count[row])) % n
+        expected_slots = (expected.head[row] - expected.count[row] + np.arange(expected.count[row])) % n
+        np.testing.assert_array_equal(recent.days[row, slots], expected.days[row, expected_slots])
+        assert recent.ewma(row) == expected.ewma(row)
+
+def check_due(matrix, fresh):
+    np.testing.assert_array_equal(matrix.status, fresh.status)
+    np.testing.assert_array_equal(matrix.due.due, fresh.due.due)
+    np.testing.assert_array_equal(matrix.due.credited, fresh.due.credited)
+    np.testing.assert_array_equal(matrix.due.total_due, fresh.due.total_due)
+    np.testing.assert_array_equal(matrix.due.total_credited, fresh.due.total_credited)
+
+CHECKS = {
+    'streaks': check_streaks,
+    'windows': check_windows,
+    'recent': check_recent,
+    'due': check_due,
+}
+
+@pytest.mark.parametrize('index', list(CHECKS))
+@pytest.mark.parametrize('seed', range(12))
+def test_incremental_index_matches_rebuild(index, seed):
+    for matrix, habits in random_clicks(seed):
+        CHECKS[index](matrix, rebuilt(matrix, habits))
@@ -0,0 +1,69 @@
+import multiprocessing
+
+import journal
+
+# ==================== CONCURRENT APPENDS AND COMPACTION ====================
+# Writers in several processes append while others seal and fold the journal. No event
+# may be lost or applied twice, whichever way the seals, appends and snapshot commits
+# interleave.
+
+WRITERS = 8
+BATCHES = 150
+
+def write(data_file, writer, ready):
+    # Every append starts a background compaction too
+    journal.COMPACT_THRESHOLD_BYTES = 1
+    ready.wait()
+    for batch in range(BATCHES):
+        journal.append_events(data_file, [
+            {'op': 'add', 'habit': {'id': f'{writer}-{batch}', 'name': 'h', 'completed_dates': [], 'missed_dates': []}},
+            {'op': 'complete', 'id': f'{writer}-{batch}', 'day': '2026-03-18', 'points': 1},
+        ])
+        if batch % 5 == 0:
+            journal.compact(data_file)
+
+def compact_forever(data_file, ready, stop):
+    ready.wait()
+    while not stop.is_set():
+        journal.compact(data_file)
+
+def test_concurrent_appends_and_compaction_keep_every_event(tmp_path):
+    data_file = str(tmp_path / 'habits.json')
+    context = multiprocessing.get_context('spawn')
+    ready, stop = context.Event(), context.Event()
+    writers = [context.Process(target=write, args=(data_file, w, ready)) for w in range(WRITERS)]
+    compactor = context.Process(target=compact_forever, args=(data_file, ready, stop))
+    for process in writers + [compactor]:
+        process.start()
+    ready.set()
+    for process in writers:
+        process.join(120)
+        assert process.exitcode == 0
+    stop.set()
+    compactor.join(60)
+    assert compactor.exitcode == 0
+    
+    expected = {f'{w}-{b}' for w in range(WRITERS) for b in range(BATCHES)}
+    for _ in range(2):
+        data = journal.load_store(data_file)
+        ids = [h['id'] for h in data['habits']]
+        assert len(ids) == len(expected) and set(ids) == expected
+        assert all(h['completed_dates'] == ['2026-03-18'] for h in data['habits'])
+        assert data['total_points'] == len(expected)
+        # Folding whatever is left changes nothing
+        journal.compact(data_file)
+    assert not journal.sealed_segments(data_file)
+
+def test_changes_since_sees_appends_until_a_seal(tmp_path):
+    data_file = str(tmp_path / 'habits.json')
+    journal.append_event(data_file, {'op': 'add', 'habit': {'id': 1, 'name': 'h', 'completed_dates': [], 'missed_dates': []}})
+    cursor = journal.load_store(data_file)['journal_cursor']
+    
+    journal.append_event(data_file, {'op': 'complete', 'id': 1, 'day': '2026-03-18', 'points': 5})
+    events, cursor = journal.changes_since(data_file, cursor)
+    assert [e['op'] for e in events] == ['complete']
+    assert journal.changes_since(data_file, cursor) == ([], cursor)
+    
+    journal.compact(data_file)
+    assert journal.changes_since(data_file, cursor) is None
+    assert journal.load_store(data_file)['total_points'] == 5
@@ -0,0 +1,84 @@
+import random
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+import storage
+from habitcore import HabitStore, roll_over, update_rollups
+
+# ==================== MERGING OTHER PROCESSES' APPENDS ====================
+# A loaded store catches up with what other processes appended by applying the events
+# changes_since() returns (HabitStore.apply_event). On either backend it must end exactly
+# where a fresh load would, recent-outcome ring buffers included.
+
+def random_events(rng, habits, count):
+    today = date.today()
+    events = []
+    for step in range(count):
+        if rng.random() < 0.05:
+            habit = {'id': len(habits), 'name': f'new {step}', 'difficulty': 'Hard', 'completed_dates': [], 'missed_dates': []}
+            habits.append(habit)
+            events.append({'op': 'add', 'habit': habit})
+            continue
+        day = today - timedelta(days=rng.choice([0, 0, 1, 2, 5, 12, 40]))
+        events.append({'op': rng.choice(['complete', 'complete', 'miss']), 'id': rng.choice(habits)['id'],
+                       'day': day.isoformat(), 'points': rng.choice([-5, 10])})
+    return events
+
+@pytest.mark.parametrize('backend_name', sorted(storage.BACKENDS))
+@pytest.mark.parametrize('seed', range(6))
+def test_merged_store_matches_a_fresh_load(tmp_path, seed, backend_name):
+    rng = random.Random(seed)
+    backend = storage.BACKENDS[backend_name](str(tmp_path / ('habits.db' if backend_name == 'sqlite' else 'habits.json')))
+    habits = [{'id': i, 'name': f'habit {i}', 'difficulty': 'Easy', 'completed_dates': [], 'missed_dates': []} for i in range(3)]
+    backend.save_store({'habits': habits, 'total_points': 0})
+    data = backend.load()
+    loaded, cursor = HabitStore(data), data['journal_cursor']
+    
+    for _ in range(4):
+        backend.append_many(random_events(rng, habits, 40))
+        events, cursor = backend.changes_since(cursor)
+        for event in events:
+            loaded.apply_event(event)
+        
+        fresh = HabitStore(backend.load())
+        assert loaded.total_points == fresh.total_points
+        assert [(h['id'], h['completed_dates'], h['missed_dates']) for h in loaded.habits] == \
+            [(h['id'], h['completed_dates'], h['missed_dates']) for h in fresh.habits]
+        today = date.today().toordinal()
+        np.testing.assert_array_equal(loaded.matrix.window(today - 60, today), fresh.matrix.window(today - 60, today))
+        np.testing.assert_array_equal(loaded.matrix.streaks.current(today), fresh.matrix.streaks.current(today))
+        for row in range(len(habits)):
+            np.testing.assert_array_equal(loaded.matrix.recent.last(row, 32), fresh.matrix.recent.last(row, 32))
+            assert loaded.matrix.recent.ewma(row) == fresh.matrix.recent.ewma(row)
+    backend.close()
+
+@pytest.mark.parametrize('backend_name', sorted(storage.BACKENDS))
+def test_rollover_and_report_applied_in_place_match_a_fresh_load(tmp_path, backend_name):
+    backend = storage.BACKENDS[backend_name](str(tmp_path / ('habits.db' if backend_name == 'sqlite' else 'habits.json')))
+    today = date.today()
+    days = [(today - timedelta(days=back)).isoformat() for back in range(10, 0, -1)]
+    habits = [
+        {'id': 0, 'name': 'read', 'difficulty': 'Easy', 'created_date': days[0], 'completed_dates': days[:4], 'missed_dates': []},
+        {'id': 1, 'name': 'run', 'difficulty': 'Hard', 'created_date': days[0], 'completed_dates': days[1::3], 'missed_dates': days[:1],
+         'debt': 2, 'punishment_due': True},
+    ]
+    backend.save_store({'habits': habits, 'total_points': 0, 'last_report_date': days[2]})
+    data = backend.load()
+    loaded, cursor = HabitStore(data), data['journal_cursor']
+    
+    assert roll_over(loaded, backend, today)['habits']
+    assert update_rollups(loaded, backend, today)
+    fresh = HabitStore(backend.load())
+    for key in ('betrayals', 'last_rollover_date', 'last_report_date', 'personality_history'):
+        assert loaded.data.get(key) == fresh.data.get(key), key
+    assert [(h['completed_dates'], h['missed_dates'], h.get('debt'), h.get('punishment_due')) for h in loaded.habits] == \
+        [(h['completed_dates'], h['missed_dates'], h.get('debt'), h.get('punishment_due')) for h in fresh.habits]
+    np.testing.assert_array_equal(loaded.matrix.window(today.toordinal() - 12, today.toordinal()),
+                                  fresh.matrix.window(today.toordinal() - 12, today.toordinal()))
+    # Merging them from the journal afterwards finds them already applied
+    events, _ = backend.changes_since(cursor)
+    assert [event['op'] for event in events] == ['rollover', 'report']
+    assert not any(loaded.apply_event(event) for event in events)
+    backend.close()
@@ -0,0 +1,42 @@
+from habitcore import normalize_habits
+from habitcore.normalize import day_ordinal
+
+# ==================== NORMALIZATION ====================
+
+def habit(done=(), missed=()):
+    return {'name': 'read', 'completed_dates': list(done), 'missed_dates': list(missed)}
+
+def test_dates_are_deduped_and_sorted():
+    h = habit(done=['2026-03-03', '2026-03-01', '2026-03-03', '2026-03-02'], missed=['2026-03-05', '2026-03-04', '2026-03-05'])
+    days, report = normalize_habits([h])
+    assert h['completed_dates'] == ['2026-03-01', '2026-03-02', '2026-03-03']
+    assert h['missed_dates'] == ['2026-03-04', '2026-03-05']
+    (done, missed), = days
+    assert done.tolist() == [day_ordinal(d, {}) for d in h['completed_dates']]
+    assert missed.tolist() == [day_ordinal(d, {}) for d in h['missed_dates']]
+    assert report == {'malformed': [], 'duplicates': 2, 'conflicts': 0}
+
+def test_a_day_both_done_and_missed_counts_as_done():
+    h = habit(done=['2026-03-02', '2026-03-01'], missed=['2026-03-01', '2026-03-03', '2026-03-02'])
+    days, report = normalize_habits([h])
+    assert h['completed_dates'] == ['2026-03-01', '2026-03-02']
+    assert h['missed_dates'] == ['2026-03-03']
+    assert days[0][1].tolist() == [day_ordinal('2026-03-03', {})]
+    assert report['conflicts'] == 2
+
+def test_malformed_entries_are_dropped_into_the_report():
+    bad = ['2026-3-01', '2026-02-30', '03/01/2026', '', None, 20260301, ['2026-03-01'], {'day': '2026-03-01'}]
+    h = habit(done=['2026-03-01'] + bad, missed=[['2026-03-02'], '2026-03-02'])
+    days, report = normalize_habits([h])
+    assert h['completed_dates'] == ['2026-03-01']
+    assert h['missed_dates'] == ['2026-03-02']
+    assert [entry['value'] for entry in report['malformed']] == bad + [['2026-03-02']]
+    assert {entry['field'] for entry in report['malformed']} == {'completed_dates', 'missed_dates'}
+    assert all(entry['habit'] == 'read' for entry in report['malformed'])
+    assert report['duplicates'] == 0
+
+def test_reports_add_up_over_habits():
+    habits = [habit(done=['2026-03-01', '2026-03-01'], missed=['2026-03-01']), habit(done=['x'], missed=['2026-03-02', '2026-03-02'])]
+    days, report = normalize_habits(habits)
+    assert len(days) == 2
+    assert (len(report['malformed']), report['duplicates'], report['conflicts']) == (1, 2, 1)
@@ -0,0 +1,104 @@
+import json
+import threading
+import time
+
+import persister
+import profiler
+
+# ==================== WRITE-BEHIND QUEUE ====================
+
+class ListStorage:
+    path = 'list.json'
+
+    def __init__(self):
+        self.written = []
+        self.batches = []
+        self.failing = False
+        self.gate = None
+
+    def append_many(self, events):
+        if self.gate is not None:
+            self.gate.wait()
+        if self.failing:
+            raise OSError('disk full')
+        self.batches.append(list(events))
+        self.written.extend(events)
+
+    def append(self, event):
+        self.append_many([event])
+
+def clicks(n, start=0):
+    return [{'op': 'complete', 'n': i} for i in range(start, start + n)]
+
+def test_a_burst_of_clicks_is_written_as_one_batch():
+    store = ListStorage()
+    writer = persister.Persister(store, delay=5)
+    for event in clicks(5):
+        writer.submit(event)
+    assert writer.flush(timeout=5)
+    assert store.batches == [clicks(5)]
+    assert writer.close()
+
+def test_flush_waits_until_the_backlog_is_durable():
+    store = ListStorage()
+    store.gate = threading.Event()
+    writer = persister.Persister(store)
+    writer.submit(clicks(1)[0])
+    result = []
+    flushing = threading.Thread(target=lambda: result.append(writer.flush(timeout=5)))
+    flushing.start()
+    time.sleep(0.1)
+    assert flushing.is_alive() and writer.backlog() == 1
+    store.gate.set()
+    flushing.join(5)
+    assert result == [True]
+    assert writer.backlog() == 0 and store.written == clicks(1)
+    assert writer.close()
+
+def test_failed_writes_stay_queued_with_their_error():
+    store = ListStorage()
+    store.failing = True
+    writer = persister.Persister(store, retry_delay=0.01)
+    for event in clicks(2):
+        writer.submit(event)
+    assert not writer.flush(timeout=5)
+    assert isinstance(writer.error, OSError)
+    assert writer.backlog() == 2
+    store.failing = False
+    writer.submit(clicks(1, 2)[0])
+    assert writer.flush(timeout=5)
+    assert writer.error is None
+    assert store.written == clicks(3)
+    assert writer.close()
+
+def test_close_and_restart_neither_lose_nor_repeat_events():
+    store = ListStorage()
+    store.failing = True
+    writer = persister.Persister(store, retry_delay=0.01)
+    writer.submit(clicks(1)[0])
+    assert not writer.close(timeout=5)
+    assert writer.backlog() == 1
+    writer.restart()
+    writer.submit(clicks(1, 1)[0])
+    store.failing = False
+    assert writer.flush(timeout=5)
+    assert writer.close(timeout=5)
+    # Closed: a late click is written through
+    writer.submit(clicks(1, 2)[0])
+    assert store.written == clicks(3)
+
+# ==================== WRITE-BEHIND TIMINGS ====================
+
+def test_batches_are_timed_in_the_profile_log(tmp_path, monkeypatch):
+    log = tmp_path / 'profile.jsonl'
+    monkeypatch.setattr(profiler, 'ENABLED', True)
+    monkeypatch.setattr(profiler, 'LOG_FILE', str(log))
+    store = ListStorage()
+    writer = persister.Persister(store)
+    writer.submit({'op': 'complete'})
+    writer.submit({'op': 'miss'})
+    assert writer.close()
+    assert store.written == [{'op': 'complete'}, {'op': 'miss'}]
+    lines = [json.loads(line) for line in log.read_text().splitlines()]
+    assert sum(line['events'] for line in lines) == 2
+    assert all(not line['failed'] and line['timings'][0]['name'] == 'disk.write_behind' for line in lines)
@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+import numpy as np
+
+from factories import TODAY
+from habitcore import DONE, MISSED, HabitMatrix, RecentOutcomes, normalize_habits
+
+# ==================== RECENT OUTCOMES ====================
+
+def test_ring_buffer_wraps_around_without_refilling(monkeypatch):
+    habits = [{'id': 1, 'name': 'walk', 'completed_dates': [], 'missed_dates': []}]
+    matrix = HabitMatrix(habits, normalize_habits(habits)[0], today=TODAY)
+    recent = matrix.recent
+    n = recent.capacity
+    monkeypatch.setattr(recent, 'fill', None)
+    days = [TODAY - timedelta(days=back) for back in range(n + 8, 0, -1)]
+    outcomes = [MISSED if i % 3 == 0 else DONE for i in range(len(days))]
+    for day, value in zip(days, outcomes):
+        matrix.set_status(habits[0], day, value)
+    # The newest day overwrote in place, then wrapped past the oldest slots
+    matrix.set_status(habits[0], days[-1], MISSED)
+    outcomes[-1] = MISSED
+    monkeypatch.undo()
+    
+    assert recent.count[0] == n and recent.head[0] == 8
+    assert recent.last(0, n).tolist() == outcomes[-n:]
+    assert recent.last(0, 3).tolist() == outcomes[-3:]
+    fresh = RecentOutcomes(matrix)
+    np.testing.assert_array_equal(np.sort(recent.days[0]), np.sort(fresh.days[0]))
+    assert recent.ewma(0) == fresh.ewma(0)
@@ -0,0 +1,121 @@
+import copy
+from datetime import date
+
+import numpy as np
+
+import journal
+from habitcore import HabitStore, roll_over
+from habitcore.rollover import settle_debt
+
+# ==================== END-OF-DAY ROLLOVER ====================
+# March 2026: the 2nd, 9th and 16th are Mondays.
+
+MONDAY = date(2026, 3, 9)
+
+class ListStorage:
+    def __init__(self):
+        self.events = []
+
+    def append(self, event):
+        self.events.append(event)
+
+def habit(habit_id, created='2026-03-02', schedule=None, done=(), missed=(), **fields):
+    return dict({'id': habit_id, 'name': f'habit {habit_id}', 'difficulty': 'Easy', 'created_date': created, 'schedule': schedule,
+                 'completed_dates': sorted(done), 'missed_dates': sorted(missed)}, **fields)
+
+def store_of(*habits, **data):
+    return HabitStore(dict({'habits': list(habits), 'total_points': 0, 'last_rollover_date': '2026-03-01'}, **data), MONDAY)
+
+def changes(event):
+    return {change['id']: change for change in event['habits']}
+
+def test_settle_debt_never_goes_below_zero():
+    steps = np.array([[1, -1, -1, -1, 2], [-1, -1, 0, 1, 0], [-1, -1, -1, -1, -1]])
+    debt = np.array([0, 1, 3])
+    assert settle_debt(debt, steps).tolist() == [2, 1, 0]
+    assert settle_debt(debt, np.zeros((3, 0), dtype=np.int64)).tolist() == [0, 1, 3]
+
+def test_auto_misses_land_only_on_unlogged_due_days():
+    store = store_of(
+        habit(1, schedule={'weekdays': ['Mon', 'Thu']}, done=['2026-03-02']),
+        habit(2, done=['2026-03-02', '2026-03-03'], missed=['2026-03-04']),
+    )
+    storage = ListStorage()
+    event = roll_over(store, storage, MONDAY)
+    assert storage.events == [event]
+    assert (event['start'], event['day']) == ('2026-03-02', '2026-03-08')
+    weekdays, daily = changes(event)[1], changes(event)[2]
+    # Tuesday is not a Mon/Thu day, and the logged miss on the 4th is left as it is
+    assert weekdays == {'id': 1, 'missed': ['2026-03-05'], 'debt': 1, 'punishment_due': True}
+    assert daily == {'id': 2, 'missed': ['2026-03-05', '2026-03-06', '2026-03-07', '2026-03-08'], 'debt': 5, 'punishment_due': True}
+    assert store.habits[1]['missed_dates'] == ['2026-03-04', '2026-03-05', '2026-03-06', '2026-03-07', '2026-03-08']
+    assert store.data['last_rollover_date'] == '2026-03-08'
+
+def test_betrayals_count_each_day_anything_fell_short_once():
+    store = store_of(
+        habit(1, schedule={'weekdays': ['Mon', 'Thu']}, done=['2026-03-02']),
+        habit(2, done=['2026-03-02', '2026-03-03']),
+        betrayals=2,
+    )
+    event = roll_over(store, ListStorage(), MONDAY)
+    # The 4th to the 8th; both habits fell short on the 5th
+    assert event['betrayals'] == 5
+    assert store.data['betrayals'] == 7
+
+def test_met_days_pay_debt_off_down_to_zero():
+    done = [f'2026-03-0{d}' for d in range(2, 9)]
+    store = store_of(habit(1, done=done, debt=3, punishment_due=True), habit(2, done=done, debt=9, punishment_due=True))
+    event = roll_over(store, ListStorage(), MONDAY)
+    assert changes(event)[1] == {'id': 1, 'missed': [], 'debt': 0, 'punishment_due': False}
+    assert changes(event)[2]['debt'] == 2
+    assert event['betrayals'] == 0
+
+def test_per_week_schedules_close_on_sunday():
+    store = store_of(
+        habit(1, schedule={'per_week': 2}, done=['2026-03-03']),
+        habit(2, schedule={'per_week': 2}, done=['2026-03-03', '2026-03-05']),
+        # Only existed for Saturday and Sunday, so two completions meet the week
+        habit(3, created='2026-03-07', schedule={'per_week': 3}, done=['2026-03-07', '2026-03-08']),
+    )
+    event = roll_over(store, ListStorage(), MONDAY)
+    assert changes(event) == {1: {'id': 1, 'missed': ['2026-03-08'], 'debt': 1, 'punishment_due': True}}
+    assert event['betrayals'] == 1
+
+def test_per_week_quota_counts_the_week_before_a_mid_week_start():
+    store = store_of(habit(1, schedule={'per_week': 2}, done=['2026-03-03', '2026-03-05']), last_rollover_date='2026-03-04')
+    event = roll_over(store, ListStorage(), MONDAY)
+    assert event['start'] == '2026-03-05'
+    assert event['habits'] == [] and event['betrayals'] == 0
+
+def test_first_rollover_only_seeds_the_marker():
+    store = HabitStore({'habits': [habit(1)], 'total_points': 0, 'betrayals': 4}, MONDAY)
+    storage = ListStorage()
+    event = roll_over(store, storage, MONDAY)
+    assert event == {'op': 'rollover', 'start': '2026-03-08', 'day': '2026-03-08', 'habits': [], 'betrayals': 0, 'seeded': True}
+    assert storage.events == [event]
+    assert store.habits[0]['missed_dates'] == [] and store.data['betrayals'] == 4
+    assert store.data['last_rollover_date'] == '2026-03-08'
+    assert roll_over(store, storage, MONDAY) is None
+
+def test_first_rollover_carries_on_from_the_last_report():
+    store = HabitStore({'habits': [habit(1)], 'total_points': 0, 'last_report_date': '2026-03-06'}, MONDAY)
+    event = roll_over(store, ListStorage(), MONDAY)
+    assert (event['start'], event['day']) == ('2026-03-07', '2026-03-08')
+    assert changes(event)[1]['missed'] == ['2026-03-07', '2026-03-08']
+
+def test_rolling_over_twice_applies_once():
+    data = {'habits': [habit(1, done=['2026-03-02'])], 'total_points': 0, 'last_rollover_date': '2026-03-01'}
+    original = copy.deepcopy(data)
+    store = HabitStore(data, MONDAY)
+    storage = ListStorage()
+    event = roll_over(store, storage, MONDAY)
+    after = copy.deepcopy(store.data)
+    assert roll_over(store, storage, MONDAY) is None
+    assert len(storage.events) == 1
+    # Another process's duplicate of the same range, replayed from the journal
+    assert not store.apply_event(copy.deepcopy(event))
+    assert store.data == after
+    replayed = copy.deepcopy(original)
+    for _ in range(2):
+        journal.apply_event(replayed, copy.deepcopy(event))
+    assert replayed == after
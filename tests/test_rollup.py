@@ -0,0 +1,50 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from factories import TODAY, random_clicks
+from habitcore import DIFFICULTIES, AnalyticsSnapshot, build_verdict, classify_personality, rollup_days, verdict_attempts, weekday_totals
+from habitcore.analytics import weekday_results
+
+# ==================== DAILY ROLLUPS ====================
+# rollup_days() computes every day's verdict and personality inputs for the whole range
+# at once. Each day must get the labels the per-day rules give it.
+
+def labels_for_day(matrix, ordinal, streak):
+    windows = matrix.windows
+    col = ordinal - matrix.first_day
+    attempts, completed = windows.logged[:, col + 1], windows.done[:, col + 1]
+    active = attempts > 0
+    existing = int((matrix.due.created <= ordinal).sum())
+    hard = DIFFICULTIES.index('Hard')
+    personality, _ = classify_personality(
+        existing, int(windows.total_done[col + 1]), int(windows.total_logged[col + 1] - windows.total_done[col + 1]),
+        int(windows.difficulty_done[hard, col + 1]), int(windows.difficulty_logged[hard, col + 1]),
+        attempts[active], completed[active] / attempts[active]
+    )
+    return build_verdict(verdict_attempts(matrix, ordinal), streak)['type'], personality
+
+@pytest.mark.parametrize('seed', range(8))
+def test_rollup_labels_match_the_per_day_rules(seed):
+    for step, (matrix, habits) in enumerate(random_clicks(seed, steps=30)):
+        if step % 10:
+            continue
+        rows = rollup_days(matrix, matrix.first_day, TODAY.toordinal() - 1)
+        assert [row['date'] for row in rows] == [
+            (date.fromordinal(matrix.first_day) + timedelta(days=i)).isoformat() for i in range(len(rows))
+        ]
+        for ordinal, row in enumerate(rows, matrix.first_day):
+            assert (row['verdict'], row['personality']) == labels_for_day(matrix, ordinal, row['streak']), row['date']
+
+@pytest.mark.parametrize('seed', range(8))
+def test_best_and_worst_days_read_from_rollups_match_the_grid(seed):
+    for step, (matrix, habits) in enumerate(random_clicks(seed, steps=30)):
+        if step % 10:
+            continue
+        expected = AnalyticsSnapshot(habits, matrix, 0, today=TODAY)
+        # Rolled up to a few days back; the days after come from the grid
+        rows = rollup_days(matrix, matrix.first_day, TODAY.toordinal() - 1 - step % 4)
+        snapshot = AnalyticsSnapshot(habits, matrix, 0, today=TODAY, weekday_totals=weekday_totals(rows))
+        np.testing.assert_array_equal(weekday_results(matrix.windows, weekday_totals(rows)), weekday_results(matrix.windows))
+        assert (snapshot.best_day, snapshot.worst_day) == (expected.best_day, expected.worst_day)
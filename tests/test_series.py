@@ -0,0 +1,54 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+from habitcore import AnalyticsSnapshot, CompletionSeries, HabitMatrix, normalize_habits, rollup_days
+
+# ==================== DAILY EXPECTATIONS ====================
+# A day holds the occurrences closing on it, so a weekly habit only counts on its
+# week's Sunday instead of adding a seventh of an occurrence to every day.
+
+TODAY = date(2026, 3, 18)
+MONDAY = date(2026, 3, 2)
+DAYS = [MONDAY + timedelta(days=i) for i in range(14)]
+
+def habit(habit_id, completed, schedule=None):
+    return {
+        'id': habit_id,
+        'name': f'habit {habit_id}',
+        'difficulty': 'Easy',
+        'schedule': schedule,
+        'created_date': MONDAY.isoformat(),
+        'completed_dates': [d.isoformat() for d in completed],
+        'missed_dates': [],
+    }
+
+def build(habits):
+    days, _ = normalize_habits(habits)
+    return HabitMatrix(habits, days, today=TODAY)
+
+def test_perfect_daily_and_weekly_habits_score_every_day_full():
+    matrix = build([habit(1, DAYS), habit(2, [MONDAY + timedelta(days=2), MONDAY + timedelta(days=9)], {'per_week': 1})])
+    series = CompletionSeries(matrix, DAYS[0], DAYS[-1], bucket='day', today=TODAY)
+    np.testing.assert_array_equal(series.rates, 100)
+    np.testing.assert_array_equal(series.day_rates, 100)
+    # The weekly occurrence closes on Sunday
+    np.testing.assert_array_equal(series.expected, [1] * 6 + [2] + [1] * 6 + [2])
+
+def test_weekly_habit_leaves_out_days_nothing_closed_on():
+    matrix = build([habit(1, [MONDAY + timedelta(days=2)], {'per_week': 1})])
+    series = CompletionSeries(matrix, DAYS[0], DAYS[6], bucket='day', today=TODAY)
+    assert np.isnan(series.day_rates[:6]).all()
+    assert series.day_rates[6] == 100
+    # A week-sized bucket still spreads it over the week
+    assert CompletionSeries(matrix, DAYS[0], DAYS[6], bucket='week', today=TODAY).rates.tolist() == [100]
+
+def test_trend_and_rollups_use_closing_occurrences():
+    habits = [habit(1, DAYS), habit(2, [MONDAY + timedelta(days=2), MONDAY + timedelta(days=9)], {'per_week': 1})]
+    matrix = build(habits)
+    rows = rollup_days(matrix, DAYS[0].toordinal(), DAYS[-1].toordinal())
+    assert [row['rate'] for row in rows] == [100.0] * 14
+    # Today is open and has nothing logged yet, so it expects nothing and is left out
+    trend = AnalyticsSnapshot(habits, matrix, 0, today=DAYS[-1] + timedelta(days=1)).daily_completion_trend
+    assert list(trend) == ['Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+    assert list(trend.values()) == [100.0] * 6
@@ -0,0 +1,103 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+import storage
+
+# ==================== STORAGE BACKENDS ====================
+
+HABITS = [
+    {'id': 1, 'name': 'read', 'completed_dates': ['2026-03-01', '2026-03-02', '2026-03-09'], 'missed_dates': ['2026-03-03']},
+    {'id': 2, 'name': 'run', 'completed_dates': ['2026-03-02'], 'missed_dates': ['2026-03-01', '2026-03-08', '2026-03-10']},
+]
+
+@pytest.fixture(params=sorted(storage.BACKENDS))
+def store(request, tmp_path):
+    backend = storage.BACKENDS[request.param](str(tmp_path / ('habits.db' if request.param == 'sqlite' else 'habits.json')))
+    backend.save_store({'habits': HABITS, 'total_points': 0})
+    yield backend
+    backend.close()
+
+def test_migrations_run_once(tmp_path, monkeypatch):
+    path = str(tmp_path / 'habits.db')
+    store = storage.SqliteStorage(path)
+    assert store.conn.execute("PRAGMA user_version").fetchone()[0] == len(storage.SQLITE_MIGRATIONS)
+    assert store.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'event_log'").fetchone()
+    store.close()
+    
+    # Reopening an up-to-date database runs no DDL
+    statements = []
+    connect = sqlite3.connect
+    def traced(*args, **kwargs):
+        conn = connect(*args, **kwargs)
+        conn.set_trace_callback(statements.append)
+        return conn
+    monkeypatch.setattr(storage.sqlite3, 'connect', traced)
+    storage.SqliteStorage(path).close()
+    assert statements and not any(word in sql.upper() for sql in statements for word in ('CREATE', 'DROP', 'BEGIN'))
+
+def rollup(day, done=1):
+    return {'date': day, 'done': done, 'missed': 0, 'rate': 100.0, 'streak': 1, 'verdict': 'PASS', 'personality': None, 'emoji': None, 'points': None}
+
+def test_rollups(store):
+    assert store.last_rollup_day() is None
+    store.append_rollups([rollup('2026-03-01'), rollup('2026-03-02')])
+    assert [row['date'] for row in store.load_rollups()] == ['2026-03-01', '2026-03-02']
+    store.append_rollups([rollup('2026-03-02', done=2), rollup('2026-03-03')])
+    # A re-rolled day replaces the earlier row
+    assert [(row['date'], row['done']) for row in store.load_rollups('2026-03-02')] == [('2026-03-02', 2), ('2026-03-03', 1)]
+    assert [row['date'] for row in store.load_rollups('2026-03-01', '2026-03-02')] == ['2026-03-01', '2026-03-02']
+    assert store.last_rollup_day() == '2026-03-03'
+
+def test_json_rollups_read_only_what_was_appended(tmp_path, monkeypatch):
+    store = storage.JsonStorage(str(tmp_path / 'habits.json'))
+    days = [f'2026-{month:02d}-{day:02d}' for month in range(1, 13) for day in range(1, 29)]
+    store.append_rollups([rollup(day) for day in days[:-1]])
+    assert len(store.load_rollups()) == len(days) - 1
+    
+    offsets = []
+    read_tail = storage.journal.read_tail
+    def traced(path, offset=0):
+        offsets.append(offset)
+        return read_tail(path, offset)
+    monkeypatch.setattr(storage.journal, 'read_tail', traced)
+    assert len(store.load_rollups()) == len(days) - 1
+    assert offsets == []
+    store.append_rollups([rollup(days[-1])])
+    assert store.load_rollups(days[-1]) == [rollup(days[-1])]
+    assert offsets == [os.path.getsize(store.rollups_path()) - len(json.dumps(rollup(days[-1]), separators=(',', ':'))) - 1]
+    
+    # The latest day comes from the end of the file alone
+    monkeypatch.setattr(store, 'load_rollups', None)
+    assert store.last_rollup_day() == days[-1]
+    
+    # A replaced file is read again from the start
+    monkeypatch.undo()
+    other = storage.JsonStorage(str(tmp_path / 'other.json'))
+    other.append_rollups([rollup('2027-01-01')])
+    os.replace(other.rollups_path(), store.rollups_path())
+    assert [row['date'] for row in store.load_rollups()] == ['2027-01-01']
+
+def test_sqlite_changes_since_a_trimmed_or_replaced_log(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, 'EVENT_LOG_ROWS', 2)
+    store = storage.SqliteStorage(str(tmp_path / 'habits.db'))
+    store.save_store({'habits': HABITS, 'total_points': 0})
+    cursor = store.load()['journal_cursor']
+    store.append_many([{'op': 'complete', 'id': 1, 'day': '2026-03-10', 'points': 5}, {'op': 'miss', 'id': 2, 'day': '2026-03-11'}])
+    events, latest = store.changes_since(cursor)
+    assert [event['op'] for event in events] == ['complete', 'miss']
+    assert store.changes_since(latest) == ([], latest)
+    
+    # Past 2 * EVENT_LOG_ROWS events the oldest are trimmed, and a cursor before them has to reload
+    store.append_many([{'op': 'complete', 'id': 1, 'day': f'2026-03-{day}'} for day in (12, 13, 14)])
+    assert store.changes_since(cursor) is None
+    assert [event['day'] for event in store.changes_since(store.last_event_seq() - 1)[0]] == ['2026-03-14']
+    
+    # So does every cursor once the whole store is replaced
+    latest = store.load()['journal_cursor']
+    store.save_store(store.load())
+    assert store.changes_since(latest) is None
+    assert store.changes_since(store.load()['journal_cursor']) == ([], latest + 1)
+    store.close()
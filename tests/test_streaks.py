@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from factories import TODAY
+from habitcore import DONE, MISSED, HabitMatrix, normalize_habits
+
+# ==================== INCREMENTAL STREAKS ====================
+
+def test_extending_todays_run_skips_recompute(monkeypatch):
+    habits = [{'id': 1, 'name': 'walk', 'completed_dates': [], 'missed_dates': []}]
+    days, _ = normalize_habits(habits)
+    matrix = HabitMatrix(habits, days, today=TODAY)
+    for back in range(5, 0, -1):
+        matrix.set_status(habits[0], TODAY - timedelta(days=back), DONE)
+    
+    def fail(*args):
+        raise AssertionError("recomputed a row")
+    monkeypatch.setattr(matrix.streaks, 'recompute_row', fail)
+    monkeypatch.setattr(matrix.streaks, 'recompute', fail)
+    matrix.set_status(habits[0], TODAY, DONE)
+    assert list(matrix.streaks.current(TODAY.toordinal())) == [6, 6]
+
+def test_flipping_a_done_day_to_missed_breaks_the_run():
+    habits = [{'id': 1, 'name': 'walk', 'completed_dates': [], 'missed_dates': []}]
+    matrix = HabitMatrix(habits, normalize_habits(habits)[0], today=TODAY)
+    for back in range(5, -1, -1):
+        matrix.set_status(habits[0], TODAY - timedelta(days=back), DONE)
+    assert list(matrix.streaks.current(TODAY.toordinal())) == [6, 6]
+    matrix.set_status(habits[0], TODAY - timedelta(days=2), MISSED)
+    assert list(matrix.streaks.current(TODAY.toordinal())) == [2, 2]
+    assert matrix.streaks.longest.tolist() == [3, 3]
+    matrix.set_status(habits[0], TODAY - timedelta(days=2), DONE)
+    assert list(matrix.streaks.current(TODAY.toordinal())) == [6, 6]
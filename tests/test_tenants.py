@@ -0,0 +1,79 @@
+import tenants
+
+# ==================== STORE CACHE LEASES ====================
+
+class FakeStore:
+    def memory_bytes(self):
+        return 100
+
+def make_cache(**kwargs):
+    return tenants.StoreCache(lambda backend, path: FakeStore(), sweep_seconds=0, **kwargs)
+
+def test_revoked_lease_cannot_be_acquired_again():
+    cache = make_cache()
+    lease = cache.lease('json', 'a.json', 1)
+    assert lease.acquire()
+    # Superseded while a run holds it: the run keeps the store until it releases
+    cache.get('json', 'a.json', 2)
+    assert lease.store is not None
+    assert not lease.acquire()
+    lease.release()
+    assert lease.store is None
+    assert not lease.acquire()
+
+def test_eviction_revokes_leases_not_in_use():
+    cache = make_cache(max_bytes=150)
+    lease = cache.lease('json', 'a.json', 1)
+    cache.get('json', 'b.json', 1)
+    assert cache.stats() == (1, 100)
+    assert lease.store is None
+    assert not lease.acquire()
+
+def test_loads_leave_no_lock_behind():
+    refreshed = []
+    cache = tenants.StoreCache(lambda backend, path: FakeStore(), lambda *args: refreshed.append(args) or True, sweep_seconds=0)
+    store = cache.get('json', 'a.json', 1)
+    assert cache.get('json', 'a.json', 2) is store
+    assert len(refreshed) == 1
+    cache.get('json', 'b.json', 1)
+    assert cache.loading == {}
+
+# ==================== UNLOADING WITH FAILED WRITES ====================
+
+class FlakyStorage(FakeStore):
+    path = 'flaky.json'
+
+    def __init__(self):
+        self.failing = True
+        self.written = []
+        self.closed = False
+
+    def append_many(self, events):
+        if self.failing:
+            raise OSError('disk full')
+        self.written.extend(events)
+
+    def close(self):
+        self.closed = True
+
+def test_unload_keeps_a_store_whose_writes_fail(monkeypatch):
+    store = FlakyStorage()
+    monkeypatch.setattr(tenants.storage, 'open_storage', lambda backend, path: store)
+    monkeypatch.setattr(tenants.storage, 'release_storage', lambda backend, path: store)
+    monkeypatch.setitem(tenants.persister._persisters, store, tenants.persister.Persister(store, retry_delay=0.01))
+    writer = tenants.persister.get_persister(store)
+    writer.submit({'op': 'click'})
+
+    cache = tenants.StoreCache(lambda backend, path: store, sweep_seconds=0, idle_seconds=0)
+    cache.get('json', store.path, 1)
+    assert cache.sweep() == 0
+    assert cache.stats() == (1, 100)
+    assert not store.closed
+    # The persister goes on retrying, so the click is saved once the disk recovers
+    assert tenants.persister.get_persister(store) is writer
+    store.failing = False
+    assert writer.flush(timeout=5)
+    assert store.written == [{'op': 'click'}]
+    assert cache.sweep() == 1
+    assert store.closed
+    assert store not in tenants.persister._persisters
@@ -0,0 +1,27 @@
+from datetime import date
+
+from habitcore import DONE, MISSED, HabitMatrix, normalize_habits
+
+# ==================== PREFIX-SUM WINDOWS ====================
+
+SUNDAY, MONDAY = date(2026, 3, 15), date(2026, 3, 16)
+
+def test_windows_split_at_a_week_boundary_and_follow_flips():
+    habits = [{'id': 1, 'name': 'read', 'difficulty': 'Easy', 'completed_dates': [], 'missed_dates': []},
+              {'id': 2, 'name': 'lift', 'difficulty': 'Hard', 'completed_dates': [], 'missed_dates': []}]
+    matrix = HabitMatrix(habits, normalize_habits(habits)[0], today=MONDAY)
+    matrix.set_status(habits[0], SUNDAY, DONE)
+    matrix.set_status(habits[1], SUNDAY, DONE)
+    matrix.set_status(habits[0], MONDAY, MISSED)
+    windows, sunday, monday = matrix.windows, SUNDAY.toordinal(), MONDAY.toordinal()
+    assert windows.counts(monday - 7, sunday) == (2, 2)
+    assert windows.counts(monday, monday + 6) == (0, 1)
+    assert windows.counts(sunday, monday) == (2, 3)
+    
+    # Done to missed moves a count out of done but keeps it logged; clearing drops it
+    matrix.set_status(habits[1], SUNDAY, MISSED)
+    assert windows.counts(monday - 7, sunday) == (1, 2)
+    assert windows.counts(monday - 7, sunday, difficulty='Hard') == (0, 1)
+    matrix.set_status(habits[1], SUNDAY, 0)
+    assert windows.counts(monday - 7, sunday) == (1, 1)
+    assert windows.counts(sunday, monday, rows=[0]) == (1, 2)